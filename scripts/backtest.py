@@ -0,0 +1,112 @@
+"""
+This script backtests a predictor on historical seasons.
+
+Every game day of the chosen seasons is replayed with the standings as they stood before
+it (src/historical/backtest.py) and sent to the predictor, and the predictions are scored
+against the final scores:
+
+- local: the local baseline model. By default it is trained on the other seasons in the
+  input directory, so the backtested season is out of sample. --model uses a saved model.
+- simulation: the Monte Carlo simulation (src/NHL/simulation.py) on the standings, with
+  --trials and --dispersion.
+- fake: the full assistant path (prompts, runs, polling and parsing) against the offline
+  fake assistant, with configurable latency and failures. Needs no network or API key.
+- assistant: the real assistant. Costs a run per game (or per batch).
+
+--cache serves repeated predictions from data/cache/backtest_predictions.jsonl and adds
+new ones to it, so rerunning an assistant backtest only pays for the games not yet asked.
+
+Usage:
+python scripts/backtest.py --season 20222023 [--predictor local|simulation|fake|assistant] [--workers 8]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from NHL import local_predictor  # pylint: disable=wrong-import-position
+from historical import backtest, season_replay  # pylint: disable=wrong-import-position
+
+PREDICTORS = ('local', 'simulation', 'fake', 'assistant')
+
+def print_report(report, seasons, predictor_name):
+    """Print a backtest report."""
+    print(f"Backtest of {', '.join(seasons)} with the {predictor_name} predictor")
+    print(f"Predicted {report['predicted']} of {report['games']} games on {report['game_days']} game days "
+          f"in {report['seconds']:.2f}s ({report['games_per_second']} games/s)")
+    if not report['predicted']:
+        return
+    print(f"Accuracy {report['accuracy']:.4f}, Brier score {report['brier_score']:.4f}, "
+          f"log loss {report['log_loss']:.4f} (home teams won {report['home_win_rate']:.1%})")
+    print('Calibration of the home team\'s chance of winning:')
+    print(f"{'predicted':>10} {'games':>6} {'mean':>7} {'observed':>9}")
+    for row in report['calibration']:
+        print(f"{row['bin']:>10} {row['games']:>6} {row['mean_prediction']:>7.3f} {row['observed_rate']:>9.3f}")
+
+def main():
+    '''
+    main entry point for the script
+    '''
+    parser = argparse.ArgumentParser(description='Backtest a predictor on historical seasons.')
+    parser.add_argument('--input', default=local_predictor.TRAINING_DIRECTORY,
+                        help='The game results directory to replay')
+    parser.add_argument('--season', nargs='*', default=None,
+                        help='The seasons to replay. Defaults to the latest season')
+    parser.add_argument('--predictor', choices=PREDICTORS, default='local', help='The predictor to backtest')
+    parser.add_argument('--model', default=None,
+                        help='A saved local model to use instead of training on the other seasons')
+    parser.add_argument('--trials', type=int, default=None, help='Simulated trials per game')
+    parser.add_argument('--dispersion', type=float, default=None,
+                        help='Negative binomial size of the simulated goals, 0 for Poisson')
+    parser.add_argument('--workers', type=int, default=backtest.MAX_WORKERS, help='Game days predicted at once')
+    parser.add_argument('--batch-size', type=int, default=None, help='Games per assistant run')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds each fake assistant run takes')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of fake assistant runs that fail')
+    parser.add_argument('--cache', action='store_true', help='Reuse and store predictions in the backtest cache')
+    parser.add_argument('--report', default=None, help='Also write the report as JSON to this file')
+    parser.add_argument('--verbose', action='store_true', help='Show the predictor\'s own output')
+    args = parser.parse_args()
+
+    seasons = args.season or season_replay.list_seasons(args.input)[-1:]
+
+    if args.predictor == 'local':
+        if args.model:
+            model = local_predictor.BaselineModel.load(args.model)
+        else:
+            training = [season for season in season_replay.list_seasons(args.input) if season not in seasons]
+            model = local_predictor.train_model(args.input, training)
+            print(f"Trained the local model on {model.metadata['games']} games from {', '.join(training)}")
+        predictor = backtest.local_predictor(model)
+    elif args.predictor == 'simulation':
+        predictor = backtest.simulation_predictor(args.trials, args.dispersion)
+    else:
+        predictor = backtest.assistant_predictor(batch_size=args.batch_size)
+    if args.cache:
+        predictor = backtest.CachedPredictor(predictor, args.predictor)
+
+    with contextlib.ExitStack() as stack:
+        fake = None
+        if args.predictor == 'fake':
+            from openai_actions.fake_assistant import FakeAssistant  # pylint: disable=import-outside-toplevel
+            fake = stack.enter_context(FakeAssistant(latency=args.latency, failure_rate=args.failure_rate))
+        if not args.verbose:
+            stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        results = backtest.run_backtest(args.input, seasons, predictor, args.workers)
+
+    print_report(results['report'], seasons, args.predictor)
+    if fake is not None:
+        print(f"Fake assistant: {fake.stats['runs']} runs, {fake.stats['failed_runs']} failed, "
+              f"{fake.stats['status_checks']} status checks, {fake.stats['threads']} threads "
+              f"({fake.open_threads} left undeleted)")
+    if args.cache:
+        print(f"Backtest cache: {predictor.stats['hits']} hits, {predictor.stats['misses']} misses")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as file:
+            json.dump(results['report'], file, indent=2)
+
+if __name__ == "__main__":
+    main()
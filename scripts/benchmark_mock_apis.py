@@ -0,0 +1,214 @@
+"""
+This script benchmarks the prediction slate and the historical backfill against the local
+mock NHL and OpenAI servers (src/NHL/mock_nhl_api.py, src/openai_actions/mock_openai_api.py),
+so it runs without network access or API keys.
+
+- slate: fetches today's games and the standings the way main.py does and predicts the
+  slate with game_processing.generate_game_predictions, once per --concurrency setting.
+  Reports the NHL fetch time, the prediction time, the slate's games/s and the time from
+  the start of predicting to each game's prediction.
+- backfill: backfills a historical season with scripts/historical_game_data_fetching.py,
+  once per --workers setting, and reports boxscores/s.
+
+The servers' latency, failure rates and rate limits are set from the command line, and
+the requests they saw, including the 429s and 500s, are reported for every run. Nothing
+is read from or written to the real caches: each run gets empty ones in a temporary
+directory.
+
+Usage:
+python scripts/benchmark_mock_apis.py [--concurrency 1 5 10] [--workers 2 8 16] [--run-latency 1.0]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import httpx
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from NHL import game_processing, nhl_api, prediction_cache, response_cache  # pylint: disable=wrong-import-position
+from NHL.mock_nhl_api import MockNHLServer  # pylint: disable=wrong-import-position
+from openai_actions import openai_calls, run_polling  # pylint: disable=wrong-import-position
+from openai_actions.mock_openai_api import MockOpenAIServer  # pylint: disable=wrong-import-position
+import historical_game_data_fetching as backfill  # pylint: disable=wrong-import-position
+
+SERVER_COUNTERS = ('requests', 'rate_limited', 'failures')
+
+def counters(server):
+    """Snapshot a mock server's request counters."""
+    return {name: server.stats[name] for name in SERVER_COUNTERS}
+
+def counters_since(server, before):
+    """The requests a mock server saw since a snapshot."""
+    return {name: server.stats[name] - before[name] for name in SERVER_COUNTERS}
+
+def run_slate(nhl_server, openai_server, concurrency, batch_size, work_directory, verbose):
+    """
+    Predict one slate against the mock servers.
+
+    Args:
+        nhl_server (MockNHLServer): The NHL API stand-in.
+        openai_server (MockOpenAIServer): The Assistants API stand-in.
+        concurrency (int): The runs kept in flight.
+        batch_size (int): Games per run.
+        work_directory (str): Where this run's empty caches go.
+        verbose (bool): Show the prediction output.
+
+    Returns:
+        dict: The run's timings and request counts.
+    """
+    response_cache.configure_cache(directory=os.path.join(work_directory, 'nhl_api'))
+    nhl_api.configure_session(pool_size=max(concurrency, nhl_api.MAX_STATS_WORKERS))
+    limits = httpx.Limits(max_connections=2 * concurrency, max_keepalive_connections=2 * concurrency)
+    openai_calls.configure_client(api_key='mock', base_url=openai_server.base_url,
+                                  http_client=httpx.Client(limits=limits))
+    nhl_before, openai_before = counters(nhl_server), counters(openai_server)
+    arrivals = []
+    lock = threading.Lock()
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stdout if verbose else io.StringIO()):
+        games = nhl_api.get_games_today()
+        current_standings = nhl_api.get_current_standings()
+        fetched = time.perf_counter()
+
+        def on_prediction(game, prediction):
+            with lock:
+                arrivals.append(time.perf_counter() - fetched)
+
+        game_processing.generate_game_predictions(
+            games, current_standings, max_concurrent_runs=concurrency, batch_size=batch_size,
+            on_prediction=on_prediction, cache=prediction_cache.PredictionCache(ttl=0)
+        )
+    finished = time.perf_counter()
+
+    return {
+        'concurrency': concurrency,
+        'games': len(games),
+        'predicted': len(arrivals),
+        'nhl_seconds': round(fetched - started, 3),
+        'predict_seconds': round(finished - fetched, 3),
+        'total_seconds': round(finished - started, 3),
+        'games_per_second': round(len(arrivals) / (finished - fetched), 2) if finished > fetched else None,
+        'mean_game_seconds': round(statistics.mean(arrivals), 3) if arrivals else None,
+        'max_game_seconds': round(max(arrivals), 3) if arrivals else None,
+        'nhl_requests': counters_since(nhl_server, nhl_before),
+        'openai_requests': counters_since(openai_server, openai_before),
+    }
+
+def run_backfill(nhl_server, season, workers, rate, work_directory, verbose):
+    """
+    Backfill a season from the mock NHL server.
+
+    Args:
+        nhl_server (MockNHLServer): The NHL API stand-in.
+        season (str): The season to backfill.
+        workers (int): Boxscore requests in flight.
+        rate (float): Boxscore requests started per second, 0 for no limit.
+        work_directory (str): Where this run's files and empty cache go.
+        verbose (bool): Show the backfill output.
+
+    Returns:
+        dict: The run's timing and request counts.
+    """
+    backfill.NHL_API_BASE_URL = nhl_server.base_url
+    backfill.NHL_API_TEAM_BASE_URL = nhl_server.team_base_url
+    backfill.DATA_DIRECTORY = os.path.join(work_directory, 'raw')
+    backfill.MANIFEST_DIRECTORY = os.path.join(work_directory, 'raw', 'backfill')
+    os.makedirs(backfill.DATA_DIRECTORY, exist_ok=True)
+    response_cache.configure_cache(directory=os.path.join(work_directory, 'nhl_api'))
+    nhl_api.configure_session(pool_size=workers)
+    before = counters(nhl_server)
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stdout if verbose else io.StringIO()):
+        team_data = backfill.fetch_team_data()
+        backfill.backfill_season(team_data['data'], season, workers, rate)
+    elapsed = time.perf_counter() - started
+
+    games = len(backfill.load_manifest(season))
+    return {
+        'workers': workers,
+        'games': games,
+        'team_files': len([name for name in os.listdir(backfill.DATA_DIRECTORY) if name.endswith('.csv')]),
+        'seconds': round(elapsed, 3),
+        'games_per_second': round(games / elapsed, 1) if elapsed else None,
+        'nhl_requests': counters_since(nhl_server, before),
+    }
+
+def describe_requests(requests_seen):
+    """Format a run's request counts."""
+    return (f"{requests_seen['requests']} requests, {requests_seen['rate_limited']} rate limited, "
+            f"{requests_seen['failures']} failed")
+
+def main():
+    '''
+    main entry point for the script
+    '''
+    parser = argparse.ArgumentParser(description='Benchmark the slate and the backfill against mock APIs.')
+    parser.add_argument('--concurrency', type=int, nargs='*', default=[1, 5, 10],
+                        help='Assistant runs in flight, one slate per setting')
+    parser.add_argument('--workers', type=int, nargs='*', default=[2, 8, 16],
+                        help='Backfill workers, one backfill per setting')
+    parser.add_argument('--games', type=int, default=16, help='Games on the slate')
+    parser.add_argument('--batch-size', type=int, default=game_processing.BATCH_SIZE, help='Games per assistant run')
+    parser.add_argument('--season', default=None, help='The season to backfill. Defaults to the latest one')
+    parser.add_argument('--rate', type=float, default=0, help='Backfill boxscore requests per second, 0 for no limit')
+    parser.add_argument('--latency', type=float, default=0.02, help='Seconds each mock request takes')
+    parser.add_argument('--run-latency', type=float, default=1.0, help='Seconds each mock assistant run takes')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of mock requests answered with a 500')
+    parser.add_argument('--run-failure-rate', type=float, default=0.0, help='Share of mock runs that fail')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='Mock requests allowed per second, 0 for none')
+    parser.add_argument('--poll-interval', type=float, default=None, help='Seconds before the first run status check')
+    parser.add_argument('--report', default=None, help='Also write the results as JSON to this file')
+    parser.add_argument('--verbose', action='store_true', help='Show the output of the code being benchmarked')
+    args = parser.parse_args()
+
+    server_options = {'latency': args.latency, 'jitter': 0.2, 'failure_rate': args.failure_rate,
+                      'rate_limit': args.rate_limit}
+    if args.poll_interval is not None:
+        run_polling.POLL_INITIAL_INTERVAL = args.poll_interval
+    results = {'slate': [], 'backfill': []}
+
+    with tempfile.TemporaryDirectory() as work_directory, \
+            MockNHLServer(games_per_day=args.games, recordings=None, **server_options) as nhl_server, \
+            MockOpenAIServer(run_latency=args.run_latency, run_failure_rate=args.run_failure_rate,
+                             **server_options) as openai_server:
+        nhl_api.NHL_API_BASE_URL = nhl_server.base_url
+        openai_calls.ASSISTANT_CACHE_PATH = os.path.join(work_directory, 'assistant.json')
+
+        for concurrency in args.concurrency:
+            result = run_slate(nhl_server, openai_server, concurrency, args.batch_size,
+                               os.path.join(work_directory, f'slate-{concurrency}'), args.verbose)
+            results['slate'].append(result)
+            print(f"Slate, {concurrency} runs in flight: {result['predicted']}/{result['games']} games in "
+                  f"{result['total_seconds']:.2f}s (NHL {result['nhl_seconds']:.2f}s, predictions "
+                  f"{result['predict_seconds']:.2f}s, {result['games_per_second']} games/s); per game mean "
+                  f"{result['mean_game_seconds']}s, max {result['max_game_seconds']}s")
+            print(f"  NHL: {describe_requests(result['nhl_requests'])}; "
+                  f"OpenAI: {describe_requests(result['openai_requests'])}")
+        if args.concurrency:
+            print(f"Mock assistant threads left undeleted: {openai_server.open_threads}")
+
+        season = args.season or (nhl_server.seasons[-1] if nhl_server.seasons else None)
+        for workers in args.workers if season else []:
+            result = run_backfill(nhl_server, season, workers, args.rate,
+                                  os.path.join(work_directory, f'backfill-{workers}'), args.verbose)
+            results['backfill'].append(result)
+            print(f"Backfill of {season}, {workers} workers: {result['games']} games and "
+                  f"{result['team_files']} team files in {result['seconds']:.2f}s "
+                  f"({result['games_per_second']} games/s); NHL: {describe_requests(result['nhl_requests'])}")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+if __name__ == "__main__":
+    main()
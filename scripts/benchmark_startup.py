@@ -0,0 +1,156 @@
+"""
+This script measures the cold start of main.py.
+
+Each step is timed in a fresh interpreter, so nothing is already imported or cached:
+
+- python: the interpreter alone.
+- import main: loading main.py and everything it imports, as the predictions run starts.
+- import main + openai: the same with the openai SDK imported as well, which is what
+  starting main.py cost when openai_calls imported and configured the SDK at import.
+- import openai: the SDK on its own.
+- first client: importing openai and building the client on first use (get_client).
+
+The slowest imports of main.py are listed from python -X importtime. With --resolve the
+assistant lookup is timed too, first with the ID cache file moved aside (listing the
+assistants) and then with it in place (one retrieve call). This needs an API key.
+
+Usage:
+python scripts/benchmark_startup.py [--repeat 5] [--imports 10] [--resolve]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SOURCE_DIRECTORY = os.path.join(ROOT_DIRECTORY, 'src')
+sys.path.append(SOURCE_DIRECTORY)
+from openai_actions import openai_calls  # pylint: disable=wrong-import-position
+
+# Each step's code runs in a fresh interpreter and prints its in-process seconds
+STEPS = (
+    ('python', 'pass'),
+    ('import main', 'import main'),
+    ('import main + openai', 'import main\nimport openai'),
+    ('import openai', 'import openai'),
+    ('first client', "from openai_actions import openai_calls\nopenai_calls.get_client()"),
+)
+RESOLVE_STEPS = (
+    ('assistant, uncached', 'from openai_actions import openai_calls\nopenai_calls.get_assistant()', True),
+    ('assistant, cached', 'from openai_actions import openai_calls\nopenai_calls.get_assistant()', False),
+)
+
+def run_python(code, env):
+    """
+    Run code in a fresh interpreter from the repository root, as main.py is run, and time it.
+
+    Args:
+        code (str): The code to run.
+        env (dict): The environment, with src on PYTHONPATH.
+
+    Returns:
+        tuple: (in-process seconds, wall-clock seconds of the whole interpreter).
+
+    Raises:
+        RuntimeError: If the code fails, with the last line of its error output.
+    """
+    timed = f"import time\n_started = time.perf_counter()\n{code}\nprint(time.perf_counter() - _started)"
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', timed], cwd=ROOT_DIRECTORY, env=env,
+                            capture_output=True, text=True, check=False)
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError((result.stderr.strip().splitlines() or ['exit status'])[-1])
+    return float(result.stdout.strip().splitlines()[-1]), wall
+
+def time_step(code, repeat, env):
+    """Median (in-process, wall-clock) seconds of a step over several fresh interpreters."""
+    runs = [run_python(code, env) for _ in range(repeat)]
+    return statistics.median(run[0] for run in runs), statistics.median(run[1] for run in runs)
+
+def print_step(name, step, *args):
+    """Time a step and print its line, or the error if it fails. Returns the timings or None."""
+    try:
+        timings = step(*args)
+    except RuntimeError as e:
+        print(f"{name:<24} failed: {e}")
+        return None
+    print(f"{name:<24} " + ' '.join(f"{seconds:>10.3f}s" for seconds in timings))
+    return timings
+
+def slowest_imports(count, env):
+    """
+    List main.py's slowest direct imports.
+
+    Args:
+        count (int): How many to list.
+        env (dict): The environment, with src on PYTHONPATH.
+
+    Returns:
+        list: (module, cumulative seconds) pairs, slowest first.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'], cwd=ROOT_DIRECTORY,
+                            env=env, capture_output=True, text=True, check=True)
+    imports = []
+    children = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        # A module is listed after its own imports, which are indented two more spaces
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((module.strip(), int(cumulative) / 1e6))
+        elif depth == 0:
+            if module.strip() == 'main':
+                imports = children
+            children = []
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:count]
+
+def main():
+    '''
+    main entry point for the script
+    '''
+    parser = argparse.ArgumentParser(description='Measure the cold start of main.py.')
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters per step')
+    parser.add_argument('--imports', type=int, default=10, help='How many of the slowest imports to list')
+    parser.add_argument('--resolve', action='store_true',
+                        help='Also time the assistant lookup, which calls the OpenAI API')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [SOURCE_DIRECTORY, env.get('PYTHONPATH')]))
+    # Building the client needs a key, but nothing is sent with it
+    if not env.get('NHL_OPENAI_API_KEY') and not env.get('OPENAI_API_KEY'):
+        env['NHL_OPENAI_API_KEY'] = 'benchmark'
+
+    print(f"{'step':<24} {'in process':>11} {'wall clock':>11}")
+    results = {}
+    for name, code in STEPS:
+        results[name] = print_step(name, time_step, code, args.repeat, env)
+    if results['import main'] and results['import main + openai']:
+        saved = results['import main + openai'][0] - results['import main'][0]
+        print(f"Importing openai lazily saves {saved:.3f}s of the main.py start "
+              f"({saved / results['import main + openai'][0]:.0%})")
+
+    if args.resolve:
+        cache_path = os.path.join(ROOT_DIRECTORY, openai_calls.ASSISTANT_CACHE_PATH)
+        for name, code, uncached in RESOLVE_STEPS:
+            if uncached and os.path.exists(cache_path):
+                os.replace(cache_path, f'{cache_path}.bak')
+            try:
+                print_step(name, run_python, code, env)
+            finally:
+                if uncached and os.path.exists(f'{cache_path}.bak'):
+                    os.replace(f'{cache_path}.bak', cache_path)
+
+    if args.imports:
+        print('Slowest imports of main.py:')
+        for module, seconds in slowest_imports(args.imports, env):
+            print(f"  {module:<40} {seconds:.3f}s")
+
+if __name__ == "__main__":
+    main()
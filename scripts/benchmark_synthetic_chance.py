@@ -0,0 +1,124 @@
+"""
+This script compares the row-by-row synthetic chance calculation in
+format_consolidated_data.py with the vectorized engine in src/historical/synthetic_chance.py.
+
+Every game in the training data is scored both ways, the results are checked against
+each other, and the time taken by each is printed. If a columnar store of the processed
+data has been built (scripts/build_columnar_store.py), scoring straight from its
+memory-mapped columns is timed as well.
+
+Usage:
+python scripts/benchmark_synthetic_chance.py [--input data/training_data] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from historical import columnar_store, synthetic_chance  # pylint: disable=wrong-import-position
+import format_consolidated_data  # pylint: disable=wrong-import-position
+
+TRAINING_DATA_DIRECTORY = 'data/training_data'
+PROCESSED_STORE_DIRECTORY = os.path.join(columnar_store.STORE_DIRECTORY, 'processed')
+
+def load_records(input_directory):
+    """
+    Read the game stats from every JSONL file in a directory.
+
+    Args:
+        input_directory (str): The directory holding the training data JSONL files.
+
+    Returns:
+        list: The 'prompt' dictionary of every line.
+    """
+    records = []
+    for file_path in sorted(glob.glob(os.path.join(input_directory, '*.jsonl'))):
+        with open(file_path, 'r', encoding='utf-8') as file:
+            records.extend(json.loads(line)['prompt'] for line in file if line.strip())
+    return records
+
+def best_time(function, repeat):
+    """
+    Time a function, keeping the fastest of several runs.
+
+    Args:
+        function (callable): The function to call with no arguments.
+        repeat (int): How many times to run it.
+
+    Returns:
+        tuple: (seconds, result of the last call).
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def row_wise(records):
+    """Score every game with format_consolidated_data.calculate_synthetic_chance."""
+    # The reference prints a warning for every malformed conversion
+    with contextlib.redirect_stdout(io.StringIO()):
+        chances = [format_consolidated_data.calculate_synthetic_chance(record) for record in records]
+    return np.array([home for home, _ in chances]), np.array([away for _, away in chances])
+
+def main():
+    '''
+    main entry point for the script
+    '''
+    parser = argparse.ArgumentParser(description='Benchmark the vectorized synthetic chance engine.')
+    parser.add_argument('--input', default=TRAINING_DATA_DIRECTORY,
+                        help='The directory holding the training data JSONL files')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per timing, the fastest is kept')
+    args = parser.parse_args()
+
+    records = load_records(args.input)
+    if not records:
+        print(f"No training data found in {args.input}")
+        return
+    print(f"Scoring {len(records)} games, best of {args.repeat} runs")
+
+    row_seconds, (row_home, row_away) = best_time(lambda: row_wise(records), args.repeat)
+    print(f"Row-wise:            {row_seconds:.4f}s")
+
+    def vectorized():
+        stats = synthetic_chance.stats_from_records(records)
+        home, away = synthetic_chance.calculate_synthetic_chances(stats)
+        return home, away, synthetic_chance.confidence_ratings(home, away)
+
+    vector_seconds, (home, away, _) = best_time(vectorized, args.repeat)
+    print(f"Vectorized:          {vector_seconds:.4f}s ({row_seconds / vector_seconds:.1f}x the speed)")
+
+    stats = synthetic_chance.stats_from_records(records)
+    score_seconds, _ = best_time(lambda: synthetic_chance.calculate_synthetic_chances(stats), args.repeat)
+    print(f"  scoring only:      {score_seconds:.4f}s ({row_seconds / score_seconds:.1f}x the speed)")
+
+    mismatches = int(np.count_nonzero(~np.isclose(home, row_home, atol=0.01) |
+                                      ~np.isclose(away, row_away, atol=0.01)))
+    print(f"Games differing by more than 0.01: {mismatches}")
+
+    if os.path.exists(os.path.join(PROCESSED_STORE_DIRECTORY, columnar_store.INDEX_FILE)):
+        store = columnar_store.ColumnarStore(PROCESSED_STORE_DIRECTORY)
+        columns = [name for name in synthetic_chance.STAT_COLUMNS if not name.endswith('powerPlayConversion')]
+        columns += [name for pair in columnar_store.CONVERSION_COLUMNS.values() for name in pair]
+
+        def from_store():
+            return synthetic_chance.calculate_synthetic_chances(store.load(columns))
+
+        store_seconds, _ = best_time(from_store, args.repeat)
+        print(f"Columnar store ({len(store)} rows): {store_seconds:.4f}s")
+    else:
+        print(f"No columnar store at {PROCESSED_STORE_DIRECTORY}, run scripts/build_columnar_store.py to time it")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+This script consolidates the historical game results CSV files into columnar stores.
+
+Each dataset directory (data/raw and data/processed by default) is written to its own
+store under data/columnar/, with one memory-mappable NumPy .npy file per column and an
+index of the rows belonging to each season and team. See src/historical/columnar_store.py
+for loading the stores.
+
+Usage:
+python scripts/build_columnar_store.py [--dataset raw processed]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from historical import columnar_store  # pylint: disable=wrong-import-position
+
+DATA_DIRECTORY = 'data'
+
+def main():
+    '''
+    main entry point for the script
+    '''
+    parser = argparse.ArgumentParser(description='Build the columnar historical game data stores.')
+    parser.add_argument('--dataset', nargs='+', default=['raw', 'processed'],
+                        help='The directories under data/ to consolidate')
+    args = parser.parse_args()
+
+    for dataset in args.dataset:
+        started = time.perf_counter()
+        store_directory = os.path.join(columnar_store.STORE_DIRECTORY, dataset)
+        index = columnar_store.build_store(os.path.join(DATA_DIRECTORY, dataset), store_directory)
+        print(f"Built {store_directory}: {index['rows']} rows, {len(index['columns'])} columns, "
+              f"{len(index['partitions'])} team-seasons in {time.perf_counter() - started:.2f}s")
+
+if __name__ == "__main__":
+    main()
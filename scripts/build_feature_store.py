@@ -0,0 +1,51 @@
+"""
+This script builds or updates the team feature store from the processed game results.
+
+The store (src/historical/feature_store.py) holds each team's rolling 5/10/20-game form,
+home/road splits and rest days going into every game. An existing store is loaded and
+only the team-seasons whose files changed are replayed. Once the store exists, the
+prediction prompts include each team's recent form.
+
+The prompts look teams up by game date, so only game results with a gameDate column
+count. Files processed before the backfill recorded dates (including the ones committed
+under data/processed) are stored but never found; regenerate them from a fresh backfill
+first.
+
+Usage:
+python scripts/build_feature_store.py [--input data/processed] [--rebuild]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from historical import feature_store  # pylint: disable=wrong-import-position
+
+def main():
+    '''
+    main entry point for the script
+    '''
+    parser = argparse.ArgumentParser(description='Build or update the team feature store.')
+    parser.add_argument('--input', default=feature_store.PROCESSED_DIRECTORY,
+                        help='The directory holding the processed game results')
+    parser.add_argument('--output', default=feature_store.FEATURE_STORE_PATH, help='The feature store file')
+    parser.add_argument('--rebuild', action='store_true', help='Ignore the existing store and start over')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if os.path.exists(args.output) and not args.rebuild:
+        store = feature_store.FeatureStore.load(args.output)
+    else:
+        store = feature_store.FeatureStore()
+    added = store.update(args.input)
+    store.save(args.output)
+    print(f"Added {added} games to {args.output} ({len(store)} games in total) "
+          f"in {time.perf_counter() - started:.2f}s")
+    if not store.dated_games:
+        print('Warning: none of the games have a date, so the prediction prompts will not use the store. '
+              'Rerun the backfill and the processing so the game results have a gameDate column.')
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,104 @@
 """
-This script consolidates multiple JSON files into one JSONL file.
+This script consolidates multiple JSONL files into one JSONL file.
 
-The JSON files are expected to be in the specified input directory, and the consolidated
-output is written to the specified output file.
+The JSONL files are expected to be in the specified input directory, and the consolidated
+output is written to the specified output file, in file name order.
+
+With --workers above 1, the files are split into contiguous shards that worker processes
+concatenate into per-shard files. The shards are then merged in order, so the output is
+byte-identical to the serial path.
 
 Usage:
-1. Place your JSON files in the specified input directory.
-2. Run this script to consolidate them into a single JSONL file.
+1. Place your JSONL files in the specified input directory.
+2. Run this script to consolidate them into a single JSONL file:
+   python scripts/consolidate_training_data.py [--workers 4]
 """
 
+import argparse
 import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from convert_processed_data import MAX_WORKERS, shard  # pylint: disable=wrong-import-position
 
 JSONL_DIRECTORY = 'data/training_data/'
 CONSOLIDATED_FILE_PATH = 'data/consolidated_data/consolidated_training_data.jsonl'
 
-# Consolidate JSON files into one JSONL file
-with open(CONSOLIDATED_FILE_PATH, 'w', encoding="utf-8") as outfile:
-    for file_name in os.listdir(JSONL_DIRECTORY):
-        if file_name.endswith('.jsonl'):
-            file_path = os.path.join(JSONL_DIRECTORY, file_name)
+def concatenate_files(file_paths, output_path):
+    """
+    Concatenate JSONL files into one file, line by line.
+
+    Args:
+        file_paths (list): The JSONL files, in order.
+        output_path (str): The file to write.
+
+    Returns:
+        int: The number of lines written.
+    """
+    rows = 0
+    with open(output_path, 'w', encoding="utf-8") as outfile:
+        for file_path in file_paths:
             with open(file_path, 'r', encoding="utf-8") as infile:
                 for line in infile:
                     outfile.write(line)
+                    rows += 1
+    return rows
+
+def consolidate_files(jsonl_directory=JSONL_DIRECTORY, output_path=CONSOLIDATED_FILE_PATH, max_workers=MAX_WORKERS):
+    """
+    Consolidate every JSONL file in a directory into one JSONL file.
+
+    Args:
+        jsonl_directory (str, optional): The directory holding the JSONL files.
+        output_path (str, optional): The consolidated file to write.
+        max_workers (int, optional): Worker processes to shard the files across. 1 runs serially.
+
+    Returns:
+        tuple: (files, rows) consolidated.
+    """
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    file_paths = [os.path.join(jsonl_directory, file_name)
+                  for file_name in sorted(os.listdir(jsonl_directory)) if file_name.endswith('.jsonl')]
+    if max_workers <= 1 or len(file_paths) <= 1:
+        return len(file_paths), concatenate_files(file_paths, output_path)
+
+    shards = shard(file_paths, max_workers)
+    shard_paths = [f'{output_path}.shard-{index:03d}' for index in range(len(shards))]
+    try:
+        with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+            rows = sum(executor.map(concatenate_files, shards, shard_paths))
+
+        # Merge the shards in order, so the output matches the serial path byte for byte
+        with open(output_path, 'wb') as outfile:
+            for shard_path in shard_paths:
+                with open(shard_path, 'rb') as infile:
+                    shutil.copyfileobj(infile, outfile)
+    finally:
+        for shard_path in shard_paths:
+            if os.path.exists(shard_path):
+                os.remove(shard_path)
+    return len(file_paths), rows
+
+def main():
+    '''
+    main entry point for the script
+    '''
+    parser = argparse.ArgumentParser(description='Consolidate the JSONL training data into one file.')
+    parser.add_argument('--input', default=JSONL_DIRECTORY, help='The directory holding the JSONL files')
+    parser.add_argument('--output', default=CONSOLIDATED_FILE_PATH, help='The consolidated file to write')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help='Worker processes, 1 to run serially')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    files, rows = consolidate_files(args.input, args.output, args.workers)
+    elapsed = time.perf_counter() - started
+    print(f'Consolidated {files} files, {rows} rows in {elapsed:.2f}s '
+          f'({files / elapsed if elapsed else 0:.0f} files/s, {rows / elapsed if elapsed else 0:.0f} rows/s)')
+
+if __name__ == "__main__":
+    main()
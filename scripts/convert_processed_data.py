@@ -2,46 +2,152 @@
 This script converts CSV files containing match data into JSONL format.
 Each CSV file is processed to create a JSONL file with a "prompt" and a "completion."
 
-The "prompt" includes all columns from the CSV row except 'home_goals' and 'away_goals'.
+The "prompt" includes all columns from the CSV row, including 'home_goals' and 'away_away_goals'.
 The "completion" indicates the outcome, such as 'Home team win' or 'Away team win',
-based on the comparison of 'home_goals' and 'away_goals' columns.
+based on the comparison of 'home_goals' and 'away_away_goals' columns.
+
+Files are independent, so with --workers above 1 they are sharded across a process pool;
+each file still gets its own JSONL file, identical to the serial output.
 
 Directory paths for input (CSV) and output (JSONL) files are specified 
 at the beginning of the script.
 
 Usage:
 1. Place your CSV files in the specified input directory.
-2. Run this script to convert the CSV files to JSONL format in the output directory.
+2. Run this script to convert the CSV files to JSONL format in the output directory:
+   python scripts/convert_processed_data.py [--workers 4]
 """
 
+import argparse
 import csv
 import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 # Define the directory where your CSV files are located
 CSV_DIRECTORY = 'data/processed/'
 JSONL_DIRECTORY = 'data/training_data/'
+# Worker processes used by default; 1 converts the files in this process
+MAX_WORKERS = os.cpu_count() or 1
+# The completions of the training records, also used by training_pipeline.py
+HOME_WIN_COMPLETION = 'The home team has won this game due to the statistical advantages found in the data.'
+AWAY_WIN_COMPLETION = 'The away team has won due to the statistical advantages found in the data.'
+
+def convert_row(row):
+    """
+    Convert a processed CSV row into a prompt/completion record.
+
+    Args:
+        row (dict): The row, as read by csv.DictReader.
+
+    Returns:
+        dict: The record with the row as the prompt and the game's outcome as the completion.
+    """
+    # Include 'home_goals' and 'away_away_goals' in the prompt
+    prompt = {key: row[key] for key in row}  # No longer excluding home and away goals
+
+    # Convert 'home_goals' and 'away_away_goals' to integers
+    home_goals = int(float(row['home_goals']))
+    away_goals = int(float(row['away_away_goals']))
+
+    # Determine the completion based on goals comparison
+    completion = HOME_WIN_COMPLETION if home_goals > away_goals else AWAY_WIN_COMPLETION
+    return {'prompt': prompt, 'completion': completion}
+
+def convert_file(csv_file_path, jsonl_file_path):
+    """
+    Convert one CSV file to a JSONL file.
+
+    Args:
+        csv_file_path (str): The processed CSV file.
+        jsonl_file_path (str): The JSONL file to write.
+
+    Returns:
+        int: The number of rows converted.
+    """
+    rows = 0
+    with open(csv_file_path, 'r', encoding="utf-8") as csv_file, open(jsonl_file_path, 'w', encoding="utf-8") as jsonl_file:
+        for row in csv.DictReader(csv_file):
+            # Write the JSON object to the JSONL file
+            jsonl_file.write(json.dumps(convert_row(row)) + '\n')
+            rows += 1
+    return rows
+
+def convert_shard(file_pairs):
+    """
+    Convert a shard of files, in order. Runs in a worker process.
+
+    Args:
+        file_pairs (list): (csv_file_path, jsonl_file_path) pairs.
+
+    Returns:
+        int: The number of rows converted.
+    """
+    return sum(convert_file(csv_file_path, jsonl_file_path) for csv_file_path, jsonl_file_path in file_pairs)
+
+def shard(items, count):
+    """
+    Split a list into at most count contiguous shards of near-equal size.
+
+    Args:
+        items (list): The items to split.
+        count (int): The number of shards wanted.
+
+    Returns:
+        list: The non-empty shards, in order.
+    """
+    count = max(1, min(count, len(items)))
+    size, extra = divmod(len(items), count)
+    shards = []
+    start = 0
+    for index in range(count):
+        stop = start + size + (1 if index < extra else 0)
+        shards.append(items[start:stop])
+        start = stop
+    return [items_shard for items_shard in shards if items_shard]
+
+def convert_files(csv_directory=CSV_DIRECTORY, jsonl_directory=JSONL_DIRECTORY, max_workers=MAX_WORKERS):
+    """
+    Convert every CSV file in a directory to a JSONL file.
 
-print('Starting to convert the processed data')
-for file_name in os.listdir(CSV_DIRECTORY):
-    if file_name.endswith('.csv'):
-        csv_file_path = os.path.join(CSV_DIRECTORY, file_name)
-        jsonl_file_path = os.path.join(JSONL_DIRECTORY, file_name.replace('.csv', '.jsonl'))
+    Args:
+        csv_directory (str, optional): The directory holding the processed CSV files.
+        jsonl_directory (str, optional): The directory the JSONL files are written to.
+        max_workers (int, optional): Worker processes to shard the files across. 1 runs serially.
 
-        with open(csv_file_path, 'r', encoding="utf-8") as csv_file, open(jsonl_file_path, 'w', encoding="utf-8") as jsonl_file:
-            csv_reader = csv.DictReader(csv_file)
-            for row in csv_reader:
-                # Include 'home_goals' and 'away_away_goals' in the prompt
-                prompt = {key: row[key] for key in row}  # No longer excluding home and away goals
+    Returns:
+        tuple: (files, rows) converted.
+    """
+    os.makedirs(jsonl_directory, exist_ok=True)
+    file_pairs = [
+        (os.path.join(csv_directory, file_name), os.path.join(jsonl_directory, file_name.replace('.csv', '.jsonl')))
+        for file_name in sorted(os.listdir(csv_directory)) if file_name.endswith('.csv')
+    ]
+    if max_workers <= 1 or len(file_pairs) <= 1:
+        return len(file_pairs), convert_shard(file_pairs)
 
-                # Convert 'home_goals' and 'away_away_goals' to integers
-                HOME_GOALS = int(float(row['home_goals']))
-                AWAY_GOALS = int(float(row['away_away_goals']))
+    shards = shard(file_pairs, max_workers)
+    with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+        rows = sum(executor.map(convert_shard, shards))
+    return len(file_pairs), rows
 
-                # Determine the completion based on goals comparison
-                COMPLETION = 'The home team has won this game due to the statistical advantages found in the data.' if HOME_GOALS > AWAY_GOALS else 'The away team has won due to the statistical advantages found in the data.'
+def main():
+    '''
+    main entry point for the script
+    '''
+    parser = argparse.ArgumentParser(description='Convert the processed CSV files to JSONL training data.')
+    parser.add_argument('--input', default=CSV_DIRECTORY, help='The directory holding the processed CSV files')
+    parser.add_argument('--output', default=JSONL_DIRECTORY, help='The directory the JSONL files are written to')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help='Worker processes, 1 to run serially')
+    args = parser.parse_args()
 
-                # Write the JSON object to the JSONL file
-                jsonl_file.write(json.dumps({'prompt': prompt, 'completion': COMPLETION}) + '\n')
+    print('Starting to convert the processed data')
+    started = time.perf_counter()
+    files, rows = convert_files(args.input, args.output, args.workers)
+    elapsed = time.perf_counter() - started
+    print(f'processing complete! {files} files, {rows} rows in {elapsed:.2f}s '
+          f'({files / elapsed if elapsed else 0:.0f} files/s, {rows / elapsed if elapsed else 0:.0f} rows/s)')
 
-print('processing complete!')
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,10 @@ JSONL format that simulates a conversation between a system, a user, and an assi
 The new format includes the system providing context, the user asking about the game
 outcome, and the assistant presenting the game statistics and outcome.
 
-The script reads each line from the input JSONL file, extracts necessary data,
-and then reformats it into the new conversational structure. The transformed
-data is then written to a new JSONL file.
+The script reads the input JSONL file in chunks, scores every game in a chunk at once
+with the vectorized engine in src/historical/synthetic_chance.py, and then reformats
+each line into the new conversational structure. The transformed data is then written
+to a new JSONL file.
 
 Usage:
 1. Ensure the input JSONL file is present at the specified input path.
@@ -14,15 +15,25 @@ Usage:
 """
 
 import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from historical import synthetic_chance  # pylint: disable=wrong-import-position
 
 # File paths
 INPUT_FILE_PATH = 'data/consolidated_data/consolidated_training_data.jsonl'
 OUTPUT_FILE_PATH = 'data/final_training_data/transformed_training_data.jsonl'
+# Number of lines scored together by the vectorized engine
+CHUNK_SIZE = 10000
 
 def calculate_synthetic_chance(team_stats):
     """
     Calculate the synthetic chance of winning for home and away teams.
 
+    This is the row-by-row reference for synthetic_chance.calculate_synthetic_chances,
+    which scores whole arrays of games at once and is what the script uses.
+
     Parameters:
     team_stats (dict): A dictionary containing team statistics.
 
@@ -75,6 +86,50 @@ def power_play_success_rate(conversion):
     goals, attempts = map(int, parts)
     return goals / attempts if attempts != 0 else 0
 
+def transform_lines(lines, weights=None):
+    """
+    Transform lines of NHL game data from JSONL format to a conversational format.
+
+    Parameters:
+    lines (list): Strings, each a line of JSONL data.
+    weights (dict, optional): Overrides for synthetic_chance.DEFAULT_WEIGHTS.
+
+    Returns:
+    list: Strings of the transformed data in JSON format, one per line.
+    """
+    return transform_records([json.loads(line)['prompt'] for line in lines], weights)
+
+def transform_records(team_infos, weights=None):
+    """
+    Transform the statistics of many games into conversational training examples.
+
+    Parameters:
+    team_infos (list): Dictionaries of game statistics, the 'prompt' of each JSONL line.
+    weights (dict, optional): Overrides for synthetic_chance.DEFAULT_WEIGHTS.
+
+    Returns:
+    list: Strings of the transformed data in JSON format, one per game.
+    """
+    if not team_infos:
+        return []
+
+    stats = synthetic_chance.stats_from_records(team_infos)
+    home_scores, away_scores = synthetic_chance.calculate_synthetic_scores(stats, weights)
+    # Normalized with Python floats while formatting, so the output matches calculate_synthetic_chance
+    home_chances = []
+    away_chances = []
+    for home_score, away_score in zip(home_scores.tolist(), away_scores.tolist()):
+        total_score = home_score + away_score
+        home_chances.append(round((home_score / total_score) * 100, 2) if total_score != 0 else 50)
+        away_chances.append(round((away_score / total_score) * 100, 2) if total_score != 0 else 50)
+    confidences = synthetic_chance.confidence_ratings(home_chances, away_chances)
+
+    return [
+        build_training_example(team_info, home_chance, away_chance, str(confidence))
+        for team_info, home_chance, away_chance, confidence
+        in zip(team_infos, home_chances, away_chances, confidences)
+    ]
+
 def transform_line(line):
     """
     Transform a line of NHL game data from JSONL format to a conversational format.
@@ -85,23 +140,24 @@ def transform_line(line):
     Returns:
     str: A string of the transformed data in JSON format.
     """
-    data = json.loads(line)
-    team_info = data['prompt']
-    home_chance, away_chance = calculate_synthetic_chance(team_info)
+    return transform_lines([line])[0]
+
+def build_training_example(team_info, home_chance, away_chance, confidence):
+    """
+    Build the conversational training example for one game.
+
+    Parameters:
+    team_info (dict): The game's statistics.
+    home_chance (float): The home team's synthetic percentage chance of winning.
+    away_chance (float): The away team's synthetic percentage chance of winning.
+    confidence (str): The confidence rating, 'high', 'medium' or 'low'.
 
+    Returns:
+    str: The training example in JSON format.
+    """
     # Placeholder for predicted goals and reason (to be refined)
     predicted_home_goals = team_info['home_goals']
     predicted_away_goals = team_info['away_away_goals']
-    confidence = None
-
-    # Dynamic confidence calculation
-    chance_diff = abs(home_chance - away_chance)
-    if chance_diff > 30:
-        confidence = "high"
-    elif chance_diff > 10:
-        confidence = "medium"
-    else:
-        confidence = "low"
 
     # Constructing the new message format with enhancements
     new_data = {
@@ -125,10 +181,21 @@ def transform_line(line):
     }
     return json.dumps(new_data)
 
-# Read, transform, and write to new file
-with open(INPUT_FILE_PATH, 'r', encoding='utf-8') as infile, open(OUTPUT_FILE_PATH, 'w', encoding='utf-8') as outfile:
-    for line in infile:
-        transformed_line = transform_line(line)
-        outfile.write(transformed_line + '\n')
-
-print("Transformation complete. Check the output file.")
+def main(input_file_path=INPUT_FILE_PATH, output_file_path=OUTPUT_FILE_PATH):
+    """
+    Read, transform, and write the training data to the new file, one chunk at a time.
+    """
+    with open(input_file_path, 'r', encoding='utf-8') as infile, \
+            open(output_file_path, 'w', encoding='utf-8') as outfile:
+        chunk = []
+        for line in infile:
+            chunk.append(line)
+            if len(chunk) == CHUNK_SIZE:
+                outfile.writelines(transformed + '\n' for transformed in transform_lines(chunk))
+                chunk = []
+        outfile.writelines(transformed + '\n' for transformed in transform_lines(chunk))
+
+    print("Transformation complete. Check the output file.")
+
+if __name__ == "__main__":
+    main()
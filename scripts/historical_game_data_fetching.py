@@ -1,7 +1,15 @@
 """
 NHL Game Data Fetching Script
 
-Fetches NHL game data from the NHL API for a specified season and stores it in CSV files.
+Fetches NHL game data from the NHL API for one or more seasons and stores it in CSV files.
+
+Game IDs are deduplicated across every team's schedule, so each boxscore is fetched
+once and boxscores are fetched concurrently through a rate-limited worker pool.
+Every fetched game is checkpointed to a per-season manifest, and an interrupted
+run picks up where it left off without refetching.
+
+Usage:
+python scripts/historical_game_data_fetching.py --season 20182019 20192020 --workers 8
 
 Requirements:
 - Python 3.x
@@ -10,41 +18,72 @@ Requirements:
 Developer: Steven Wangler
 """
 
+import argparse
+import json
+import os
+import sys
+import threading
 import time
 import csv
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
 
+# Share the pooled NHL API session from src/NHL/nhl_api.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from NHL import nhl_api, response_cache  # pylint: disable=wrong-import-position
+
 # Constants and configuration
-NHL_API_BASE_URL = "https://api-web.nhle.com/v1/"
-NHL_API_TEAM_BASE_URL = "https://api.nhle.com/stats/rest/"
+NHL_API_BASE_URL = nhl_api.NHL_API_BASE_URL
+NHL_API_TEAM_BASE_URL = os.getenv('NHL_API_TEAM_BASE_URL', "https://api.nhle.com/stats/rest/")
 SEASON = "20182019"
 DATA_DIRECTORY = 'data/raw'
+MANIFEST_DIRECTORY = 'data/raw/backfill'
+MAX_WORKERS = 8
+MAX_REQUESTS_PER_SECOND = 10
+
+class RateLimiter:
+    """
+    Spaces out calls across threads so no more than a fixed number start per second.
+
+    Args:
+        rate (float): The maximum number of calls per second.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def wait(self):
+        """Block until the caller is allowed to start its next call."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
 
-def make_api_request(url, max_retries=3, delay=5):
+def make_api_request(url):
     """
-    Send a request to the NHL API and handle errors with retries.
+    Send a request to the NHL API.
+
+    Requests go out on the pooled session shared with src/NHL/nhl_api.py, so
+    connections are kept alive across the whole backfill, and responses are
+    served from the on-disk NHL API response cache when possible. Failed requests
+    are retried by the session's retry policy (nhl_api.configure_session); a
+    request that still fails is given up on here.
 
     Parameters:
     url (str): The API endpoint URL.
-    max_retries (int): Maximum number of retries.
-    delay (int): Delay between retries in seconds.
 
     Returns:
-    dict: JSON response from the API, or None if all retries fail.
+    dict: JSON response from the API, or None if the request fails.
     """
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, timeout=20)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"API Request Error: {e}")
-            if attempt < max_retries - 1:
-                print(f"Retrying in {delay} seconds...")
-                time.sleep(delay)
-            else:
-                print("Maximum retries reached. Unable to fetch data.")
-    return None
+    try:
+        return nhl_api.fetch_json(url, timeout=20)
+    except (response_cache.OfflineCacheMiss, requests.exceptions.RequestException) as e:
+        print(f"API Request Error: {e}")
+        return None
 
 def fetch_team_data():
     """ Fetch and return team information from the NHL API. """
@@ -66,6 +105,16 @@ def extract_stats_from_game_data(game_data):
 
     return home_stats, away_stats
 
+def build_game_stats(game_data):
+    """ Build the combined home/away statistics row for one boxscore. """
+    home_stats, away_stats = extract_stats_from_game_data(game_data)
+    return {
+        **home_stats,
+        'gameId': game_data.get('id'),
+        'gameDate': game_data.get('gameDate'),
+        'away_team': away_stats
+    }
+
 def clean_stat_dict(stat_dict):
     """Clean a single statistics dictionary."""
     cleaned_stat = stat_dict.copy()
@@ -110,43 +159,139 @@ def write_stats_to_csv(cleaned_stats, fieldnames, filename):
         for stats in cleaned_stats:
             writer.writerow(stats)
 
-def process_team_data(team):
-    """ Process and save game data for a given team. """
-    team_name = team['fullName']
-    team_tri_code = team['triCode']
-    print(f"Processing data for {team_name} (this could take a few minutes...)")
-
-    schedule_endpoint = f"{NHL_API_BASE_URL}club-schedule-season/{team_tri_code}/{SEASON}"
+def fetch_team_schedule(team, season):
+    """ Fetch and return the list of game IDs on a team's season schedule. """
+    schedule_endpoint = f"{NHL_API_BASE_URL}club-schedule-season/{team['triCode']}/{season}"
     schedule_response = make_api_request(schedule_endpoint)
+    if not schedule_response:
+        return None
+    return [game['id'] for game in schedule_response.get('games', [])]
 
-    if schedule_response:
-        all_game_stats = []
-        for game in schedule_response.get('games', []):
-            game_data = fetch_game_data(game['id'])
-            if game_data:
-                home_stats, away_stats = extract_stats_from_game_data(game_data)
-                game_stats = {**home_stats, 'away_team': away_stats}
-                all_game_stats.append(game_stats)
-
-        if all_game_stats:
-            filename = f'{DATA_DIRECTORY}/{SEASON}_{team_name.replace(" ", "_")}_game_results.csv'
-            cleaned_stats, all_fieldnames = clean_all_stats(all_game_stats)
-            write_stats_to_csv(cleaned_stats, all_fieldnames, filename)
-        else:
-            print(f"No game stats found for {team_name}")
-    else:
-        print(f"Failed to fetch schedule for {team_name}")
+def manifest_path(season):
+    """ Return the path of the checkpoint manifest for a season. """
+    return os.path.join(MANIFEST_DIRECTORY, f'{season}_games.jsonl')
+
+def load_manifest(season):
+    """
+    Load the games already fetched for a season.
+
+    The manifest holds one JSON line per fetched game. A line cut short by an
+    interrupted run is ignored, so that game is simply fetched again.
+
+    Returns:
+    dict: Game statistics keyed by game ID.
+    """
+    fetched = {}
+    try:
+        with open(manifest_path(season), 'r', encoding='utf-8') as manifest:
+            for line in manifest:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                fetched[record['game_id']] = record['stats']
+    except FileNotFoundError:
+        pass
+    return fetched
+
+def fetch_boxscores(game_ids, season, fetched, max_workers=MAX_WORKERS, rate=MAX_REQUESTS_PER_SECOND):
+    """
+    Fetch every boxscore not yet in the manifest, checkpointing each one as it arrives.
+
+    Parameters:
+    game_ids (list): The unique game IDs of the season.
+    season (str): The season being fetched, e.g. '20182019'.
+    fetched (dict): Game statistics already fetched, keyed by game ID. Updated in place.
+    max_workers (int): The maximum number of boxscore requests in flight.
+    rate (float): The maximum number of boxscore requests started per second.
+    """
+    missing = [game_id for game_id in game_ids if game_id not in fetched]
+    print(f"{season}: {len(game_ids)} games, {len(game_ids) - len(missing)} already fetched, "
+          f"{len(missing)} to fetch")
+    if not missing:
+        return
+
+    limiter = RateLimiter(rate)
+    write_lock = threading.Lock()
+
+    def fetch(game_id):
+        limiter.wait()
+        return fetch_game_data(game_id)
+
+    os.makedirs(MANIFEST_DIRECTORY, exist_ok=True)
+    with open(manifest_path(season), 'a', encoding='utf-8') as manifest, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch, game_id): game_id for game_id in missing}
+        for done, future in enumerate(as_completed(futures), start=1):
+            game_id = futures[future]
+            game_data = future.result()
+            if not game_data:
+                print(f"Failed to fetch game {game_id}")
+                continue
+
+            stats = build_game_stats(game_data)
+            with write_lock:
+                manifest.write(json.dumps({'game_id': game_id, 'stats': stats}) + '\n')
+                manifest.flush()
+            fetched[game_id] = stats
+            if done % 100 == 0:
+                print(f"{season}: fetched {done}/{len(missing)} games")
+
+def write_team_files(team_name, schedule, fetched, season):
+    """ Write a team's game results CSV, in schedule order, from the fetched games. """
+    all_game_stats = [fetched[game_id] for game_id in schedule if game_id in fetched]
+    if not all_game_stats:
+        print(f"No game stats found for {team_name}")
+        return
+
+    filename = f'{DATA_DIRECTORY}/{season}_{team_name.replace(" ", "_")}_game_results.csv'
+    cleaned_stats, all_fieldnames = clean_all_stats(all_game_stats)
+    write_stats_to_csv(cleaned_stats, all_fieldnames, filename)
+
+def backfill_season(teams, season, max_workers=MAX_WORKERS, rate=MAX_REQUESTS_PER_SECOND):
+    """ Fetch every game of a season once and write each team's game results CSV. """
+    print(f"Fetching schedules for {season}")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        schedules = dict(zip(
+            [team['fullName'] for team in teams],
+            executor.map(lambda team: fetch_team_schedule(team, season), teams)
+        ))
+
+    game_ids = []
+    for team_name, schedule in schedules.items():
+        if schedule is None:
+            print(f"Failed to fetch schedule for {team_name}")
+            continue
+        game_ids.extend(schedule)
+    game_ids = list(dict.fromkeys(game_ids))
+
+    fetched = load_manifest(season)
+    fetch_boxscores(game_ids, season, fetched, max_workers, rate)
+
+    for team_name, schedule in schedules.items():
+        if schedule:
+            write_team_files(team_name, schedule, fetched, season)
 
 def main():
     '''
     main entry point for the script
     '''
+    parser = argparse.ArgumentParser(description='Fetch historical NHL game data.')
+    parser.add_argument('--season', nargs='+', default=[SEASON],
+                        help='One or more seasons to fetch, e.g. 20182019 20192020')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help='Maximum number of requests in flight')
+    parser.add_argument('--rate', type=float, default=MAX_REQUESTS_PER_SECOND,
+                        help='Maximum number of boxscore requests started per second')
+    args = parser.parse_args()
+
     print('Running NHL game data fetching script')
     team_data = fetch_team_data()
     if team_data and 'data' in team_data:
-        for team in team_data['data']:
-            process_team_data(team)
+        for season in args.season:
+            backfill_season(team_data['data'], season, args.workers, args.rate)
         print('*** Historical fetching completed ***')
+        print(f"NHL API requests: {nhl_api.get_request_stats()}")
     else:
         print("Failed to fetch team data.")
 
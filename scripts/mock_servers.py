@@ -0,0 +1,67 @@
+"""
+This script runs the mock NHL and OpenAI servers until it is interrupted, so main.py and
+the historical fetcher can be run against them from another shell without network access
+or API keys:
+
+    NHL_API_BASE_URL=http://127.0.0.1:8801/v1/ \\
+    NHL_API_TEAM_BASE_URL=http://127.0.0.1:8801/stats/rest/ \\
+    OPENAI_BASE_URL=http://127.0.0.1:8802/v1 NHL_OPENAI_API_KEY=mock \\
+    NHL_ASSISTANT_CACHE_PATH=data/cache/mock_assistant.json python src/main.py
+
+The exact settings are printed on start. NHL API payloads recorded in the response cache
+are replayed, everything else is synthesized from data/raw (src/NHL/mock_nhl_api.py).
+
+Usage:
+python scripts/mock_servers.py [--nhl-port 8801] [--openai-port 8802] [--latency 0.05] [--run-latency 2]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from NHL import response_cache  # pylint: disable=wrong-import-position
+from NHL.mock_nhl_api import MockNHLServer, RAW_DIRECTORY  # pylint: disable=wrong-import-position
+from openai_actions.mock_openai_api import MockOpenAIServer  # pylint: disable=wrong-import-position
+
+def main():
+    '''
+    main entry point for the script
+    '''
+    parser = argparse.ArgumentParser(description='Run the mock NHL and OpenAI servers.')
+    parser.add_argument('--nhl-port', type=int, default=8801, help='The mock NHL API port')
+    parser.add_argument('--openai-port', type=int, default=8802, help='The mock OpenAI API port')
+    parser.add_argument('--input', default=RAW_DIRECTORY, help='The game results to synthesize NHL payloads from')
+    parser.add_argument('--recordings', default=response_cache.CACHE_DIRECTORY,
+                        help='A response cache directory to replay NHL payloads from')
+    parser.add_argument('--no-recordings', action='store_true', help='Synthesize every NHL payload')
+    parser.add_argument('--games', type=int, default=8, help='Games on each synthetic schedule day')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds each request takes')
+    parser.add_argument('--run-latency', type=float, default=2.0, help='Seconds each assistant run takes')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of requests answered with a 500')
+    parser.add_argument('--run-failure-rate', type=float, default=0.0, help='Share of assistant runs that fail')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='Requests allowed per second, 0 for none')
+    args = parser.parse_args()
+
+    options = {'latency': args.latency, 'jitter': 0.2, 'failure_rate': args.failure_rate,
+               'rate_limit': args.rate_limit}
+    nhl_server = MockNHLServer(args.input, None if args.no_recordings else args.recordings,
+                               games_per_day=args.games, port=args.nhl_port, **options)
+    openai_server = MockOpenAIServer(run_latency=args.run_latency, run_failure_rate=args.run_failure_rate,
+                                     port=args.openai_port, **options)
+    with nhl_server, openai_server:
+        print(f"Mock NHL API on {nhl_server.url} ({len(nhl_server.recorded)} recorded payloads), "
+              f"mock OpenAI API on {openai_server.url}")
+        print('Run against them with:')
+        print(f"  NHL_API_BASE_URL={nhl_server.base_url} NHL_API_TEAM_BASE_URL={nhl_server.team_base_url} "
+              f"OPENAI_BASE_URL={openai_server.base_url} NHL_OPENAI_API_KEY=mock "
+              f"NHL_ASSISTANT_CACHE_PATH=data/cache/mock_assistant.json")
+        print('Press Ctrl+C to stop')
+        try:
+            openai_server.serve_forever()
+        finally:
+            print(f"NHL API requests: {nhl_server.stats}")
+            print(f"OpenAI API requests: {openai_server.stats}")
+
+if __name__ == "__main__":
+    main()
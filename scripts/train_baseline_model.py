@@ -0,0 +1,74 @@
+"""
+This script trains the local baseline predictor on the historical game results.
+
+The seasons are replayed game by game to rebuild the standings both teams had going into
+each game, and the model (src/NHL/local_predictor.py) is fitted on them and saved as JSON.
+Holding out a season reports the model's accuracy on games it was not trained on.
+
+Usage:
+python scripts/train_baseline_model.py [--input data/raw] [--holdout 20222023]
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from NHL import local_predictor, standings  # pylint: disable=wrong-import-position
+from historical import season_replay  # pylint: disable=wrong-import-position
+
+def evaluate(model, games):
+    """
+    Score the model's win probabilities on replayed games.
+
+    Args:
+        model (local_predictor.BaselineModel): The trained model.
+        games (list): Games as yielded by season_replay.replay_seasons.
+
+    Returns:
+        tuple: (games scored, accuracy, Brier score).
+    """
+    rows = []
+    outcomes = []
+    for game in games:
+        home = standings.add_derived_fields(game['home_standing'])
+        away = standings.add_derived_fields(game['away_standing'])
+        if min(home['gamesPlayed'], away['gamesPlayed']) < local_predictor.MIN_GAMES_PLAYED:
+            continue
+        rows.append(local_predictor.win_features(home, away))
+        outcomes.append(1.0 if game['home_goals'] > game['away_goals'] else 0.0)
+    if not rows:
+        return 0, 0.0, 0.0
+    probabilities = model.win_probabilities(rows)
+    outcomes = np.array(outcomes)
+    return len(rows), float(np.mean((probabilities > 0.5) == (outcomes == 1))), float(np.mean((probabilities - outcomes) ** 2))
+
+def main():
+    '''
+    main entry point for the script
+    '''
+    parser = argparse.ArgumentParser(description='Train the local baseline predictor.')
+    parser.add_argument('--input', default=local_predictor.TRAINING_DIRECTORY,
+                        help='The game results directory to train on')
+    parser.add_argument('--output', default=local_predictor.MODEL_PATH, help='The model file to write')
+    parser.add_argument('--holdout', nargs='*', default=[],
+                        help='Seasons left out of training and reported on')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    seasons = [season for season in season_replay.list_seasons(args.input) if season not in args.holdout]
+    model = local_predictor.train_model(args.input, seasons)
+    model.save(args.output)
+    print(f"Trained on {model.metadata['games']} games from {', '.join(seasons)} in "
+          f"{time.perf_counter() - started:.2f}s: accuracy {model.metadata['training_accuracy']}, "
+          f"log loss {model.metadata['training_log_loss']}")
+
+    if args.holdout:
+        count, accuracy, brier = evaluate(model, season_replay.replay_seasons(args.input, args.holdout))
+        print(f"Held out {', '.join(args.holdout)}: {count} games, accuracy {accuracy:.4f}, Brier score {brier:.4f}")
+    print(f"Saved the model to {args.output}")
+
+if __name__ == "__main__":
+    main()
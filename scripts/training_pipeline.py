@@ -0,0 +1,592 @@
+"""
+This script builds the fine-tuning data from the raw game results in a single streaming pass.
+
+It replaces running the cleansing notebook, convert_processed_data.py,
+consolidate_training_data.py and format_consolidated_data.py one after another. Each step
+is a generator stage, so records flow from the raw CSV files through cleaning, labelling
+and chat formatting into the final JSONL file without any intermediate files. Memory use
+stays flat: cleaning holds one team-season file at a time and formatting holds one chunk
+of games.
+
+The data stages are:
+    raw        data/raw/*.csv, written by historical_game_data_fetching.py
+    processed  data/processed/*_Processed.csv, cleaned as in game_data_cleansing.ipynb
+    training   data/training_data/*_Processed.jsonl, prompt/completion records
+    final      data/final_training_data/transformed_training_data.jsonl, chat examples
+
+Any range of stages can be run. The pipeline reads the --from stage's files and writes
+the --to stage's files, e.g. --from processed --to training only relabels the data.
+
+With --incremental, a manifest records the content hash of every input file and the
+outputs derived from it, and each stage only rebuilds the files whose input changed. The
+intermediate stages are written to their usual directories. The final JSONL is made of one
+segment per training file; unchanged segments are kept where they are, and the file is
+only rewritten from the first segment that changed, so adding a new team-season only
+formats and appends that file's games.
+
+Usage:
+python scripts/training_pipeline.py [--from raw] [--to final] [--output PATH] [--incremental]
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import format_consolidated_data  # pylint: disable=wrong-import-position
+from convert_processed_data import AWAY_WIN_COMPLETION, HOME_WIN_COMPLETION  # pylint: disable=wrong-import-position
+
+STAGES = ('raw', 'processed', 'training', 'final')
+STAGE_DIRECTORIES = {
+    'raw': 'data/raw',
+    'processed': 'data/processed',
+    'training': 'data/training_data',
+}
+FINAL_OUTPUT_PATH = format_consolidated_data.OUTPUT_FILE_PATH
+MANIFEST_PATH = 'data/cache/training_pipeline_manifest.json'
+# Bump when a stage's output changes for the same input, so incremental runs rebuild everything
+MANIFEST_VERSION = 2
+FACEOFF_COLUMNS = ('away_faceoffWinningPctg', 'faceoffWinningPctg')
+
+# A record flowing through the pipeline: the file it belongs to and its data
+Record = namedtuple('Record', ['source', 'data'])
+
+def stage_inputs(stage, directory):
+    """
+    List the files a stage reads, in pipeline order.
+
+    Args:
+        stage (str): The stage the files belong to.
+        directory (str): The directory holding them.
+
+    Returns:
+        list: The file names.
+    """
+    extension = '.jsonl' if stage == 'training' else '.csv'
+    return sorted(file_name for file_name in os.listdir(directory) if file_name.endswith(extension))
+
+def read_records(stage, directory, file_names=None):
+    """
+    Stream the records of a stage's files.
+
+    Args:
+        stage (str): The stage the files belong to, 'raw', 'processed' or 'training'.
+        directory (str): The directory holding the files.
+        file_names (list, optional): The files to read. Defaults to every file of the stage.
+
+    Yields:
+        Record: The file name and the row, as a dictionary of strings for CSV files
+        or the decoded record for JSONL files.
+    """
+    for file_name in stage_inputs(stage, directory) if file_names is None else file_names:
+        with open(os.path.join(directory, file_name), 'r', encoding='utf-8') as file:
+            if stage == 'training':
+                for line in file:
+                    if line.strip():
+                        yield Record(file_name, json.loads(line))
+            else:
+                for row in csv.DictReader(file):
+                    yield Record(file_name, row)
+
+def output_name(stage, file_name):
+    """
+    Name the file a stage derives from one of its input files.
+
+    Args:
+        stage (str): The stage being produced, 'processed' or 'training'.
+        file_name (str): The input file name.
+
+    Returns:
+        str: e.g. 'X_Processed.csv' for 'X.csv' when producing 'processed'.
+    """
+    if stage == 'processed':
+        return file_name.replace('.csv', '_Processed.csv')
+    return file_name.replace('.csv', '.jsonl')
+
+def clean_records(records):
+    """
+    Clean raw game results rows, one file at a time.
+
+    Args:
+        records (iterable): Records of raw rows.
+
+    Yields:
+        Record: The cleaned rows, with the file renamed to its _Processed.csv name.
+    """
+    for source, group in itertools.groupby(records, key=lambda record: record.source):
+        processed_name = output_name('processed', source)
+        for row in clean_rows([record.data for record in group]):
+            yield Record(processed_name, row)
+
+def clean_rows(rows):
+    """
+    Clean the rows of one raw game results file.
+
+    This applies the same rules as game_data_cleansing.ipynb and writes values the way
+    pandas would: faceoff percentages are scaled to fractions when the file holds values
+    above 1, missing values become 0, and numeric columns with missing values become floats.
+
+    Args:
+        rows (list): The file's rows as dictionaries of strings.
+
+    Returns:
+        list: The cleaned rows.
+    """
+    cleaned = [dict(row) for row in rows]
+    for column in (rows[0] if rows else {}):
+        values = [row[column] for row in rows]
+        numbers = parse_numbers(values)
+        if numbers is None:
+            for row in cleaned:
+                if row[column] == '':
+                    row[column] = '0'
+            continue
+
+        present = [number for number in numbers if number is not None]
+        scale = 100 if column in FACEOFF_COLUMNS and present and max(present) > 1 else 1
+        is_float = scale != 1 or None in numbers or any(not is_integer_text(value) for value in values)
+        for row, number in zip(cleaned, numbers):
+            if is_float:
+                row[column] = repr(number / scale if number is not None else 0.0)
+            else:
+                row[column] = str(int(number))
+    return cleaned
+
+def parse_numbers(values):
+    """
+    Parse a column of CSV values as numbers.
+
+    Args:
+        values (list): The column's values.
+
+    Returns:
+        list: A float (or None for an empty value) per value, or None if any value is not numeric.
+    """
+    numbers = []
+    for value in values:
+        if value == '':
+            numbers.append(None)
+            continue
+        try:
+            numbers.append(float(value))
+        except ValueError:
+            return None
+    return numbers
+
+def is_integer_text(value):
+    """Check whether a CSV value is written as a whole number, e.g. '12' but not '12.0'."""
+    return value.strip().lstrip('+-').isdigit()
+
+def label_records(records):
+    """
+    Label cleaned rows with the game's outcome, as convert_processed_data.py does.
+
+    Args:
+        records (iterable): Records of cleaned rows.
+
+    Yields:
+        Record: The prompt/completion record, with the file renamed to its .jsonl name.
+    """
+    for source, row in records:
+        home_goals = int(float(row['home_goals']))
+        away_goals = int(float(row['away_away_goals']))
+        completion = HOME_WIN_COMPLETION if home_goals > away_goals else AWAY_WIN_COMPLETION
+        yield Record(output_name('training', source), {'prompt': dict(row), 'completion': completion})
+
+def format_records(records, chunk_size=format_consolidated_data.CHUNK_SIZE, weights=None):
+    """
+    Turn labelled records into chat-format training examples, a chunk of games at a time.
+
+    Args:
+        records (iterable): Prompt/completion records.
+        chunk_size (int, optional): The number of games scored together.
+        weights (dict, optional): Overrides for the synthetic chance weights.
+
+    Yields:
+        Record: The source file and the training example as a JSON string.
+    """
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return
+        examples = format_consolidated_data.transform_records([record.data['prompt'] for record in chunk], weights)
+        for record, example in zip(chunk, examples):
+            yield Record(record.source, example)
+
+def write_csv_files(records, directory):
+    """
+    Write records to one CSV file per source.
+
+    Args:
+        records (iterable): Records of rows.
+        directory (str): The directory the files are written to.
+
+    Returns:
+        int: The number of rows written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for source, group in itertools.groupby(records, key=lambda record: record.source):
+        with open(os.path.join(directory, source), 'w', encoding='utf-8', newline='') as csv_file:
+            writer = None
+            for record in group:
+                if writer is None:
+                    writer = csv.DictWriter(csv_file, fieldnames=list(record.data), lineterminator='\n')
+                    writer.writeheader()
+                writer.writerow(record.data)
+                count += 1
+    return count
+
+def write_jsonl_files(records, directory):
+    """
+    Write records to one JSONL file per source.
+
+    Args:
+        records (iterable): Records of JSON-serializable data.
+        directory (str): The directory the files are written to.
+
+    Returns:
+        int: The number of records written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for source, group in itertools.groupby(records, key=lambda record: record.source):
+        with open(os.path.join(directory, source), 'w', encoding='utf-8') as jsonl_file:
+            for record in group:
+                jsonl_file.write(json.dumps(record.data) + '\n')
+                count += 1
+    return count
+
+def write_jsonl(records, file_path):
+    """
+    Write already serialized records to a single JSONL file.
+
+    Args:
+        records (iterable): Records whose data is a JSON string.
+        file_path (str): The file to write.
+
+    Returns:
+        int: The number of lines written.
+    """
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    count = 0
+    with open(file_path, 'w', encoding='utf-8') as outfile:
+        for record in records:
+            outfile.write(record.data + '\n')
+            count += 1
+    return count
+
+# Stage -> the transform producing it from the previous stage
+TRANSFORMS = {
+    'processed': clean_records,
+    'training': label_records,
+    'final': format_records,
+}
+
+def build_pipeline(start, stop, input_directory=None):
+    """
+    Chain the stages from start to stop into one record stream.
+
+    Args:
+        start (str): The stage to read, 'raw', 'processed' or 'training'.
+        stop (str): The stage to produce, after start.
+        input_directory (str, optional): Where the start stage's files are. Defaults to STAGE_DIRECTORIES.
+
+    Returns:
+        iterator: Records of the stop stage.
+
+    Raises:
+        ValueError: If the stages are unknown or out of order.
+    """
+    if start not in STAGE_DIRECTORIES or stop not in TRANSFORMS or STAGES.index(start) >= STAGES.index(stop):
+        raise ValueError(f"Cannot run the pipeline from '{start}' to '{stop}'")
+
+    records = read_records(start, input_directory or STAGE_DIRECTORIES[start])
+    for stage in STAGES[STAGES.index(start) + 1:STAGES.index(stop) + 1]:
+        records = TRANSFORMS[stage](records)
+    return records
+
+def run_pipeline(start='raw', stop='final', input_directory=None, output_path=None):
+    """
+    Run the stages from start to stop and write the stop stage's files.
+
+    Args:
+        start (str, optional): The stage to read.
+        stop (str, optional): The stage to produce.
+        input_directory (str, optional): Where the start stage's files are.
+        output_path (str, optional): The output directory, or the output file for 'final'.
+
+    Returns:
+        int: The number of records written.
+    """
+    records = build_pipeline(start, stop, input_directory)
+    if stop == 'final':
+        return write_jsonl(records, output_path or FINAL_OUTPUT_PATH)
+    if stop == 'training':
+        return write_jsonl_files(records, output_path or STAGE_DIRECTORIES['training'])
+    return write_csv_files(records, output_path or STAGE_DIRECTORIES['processed'])
+
+def file_hash(file_path):
+    """
+    Hash a file's contents.
+
+    Args:
+        file_path (str): The file to hash.
+
+    Returns:
+        str: The SHA-256 hex digest, or None if the file does not exist.
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    """
+    Load the incremental build manifest.
+
+    Args:
+        manifest_path (str, optional): The manifest file.
+
+    Returns:
+        dict: The manifest, empty if it is missing, unreadable or from another MANIFEST_VERSION.
+    """
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {'version': MANIFEST_VERSION}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {'version': MANIFEST_VERSION}
+    return manifest
+
+def save_manifest(manifest, manifest_path=MANIFEST_PATH):
+    """Write the manifest, swapping it into place so a crash never leaves half a file."""
+    directory = os.path.dirname(manifest_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f'{manifest_path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(temp_path, manifest_path)
+
+def update_stage(stage, input_directory, output_directory, manifest):
+    """
+    Rebuild the files of a stage whose input files changed.
+
+    A file is rebuilt when its input's hash differs from the manifest's, or when the
+    output recorded for it is missing or has been changed since. Outputs of input files
+    that no longer exist are removed.
+
+    The manifest keeps the files of each input directory apart, and records the output
+    directory they were written to. Running on another input directory starts its own
+    record rather than treating the first directory's files as deleted, and a stale
+    output is only removed from the current output directory.
+
+    Args:
+        stage (str): The stage to produce, 'processed' or 'training'.
+        input_directory (str): The previous stage's directory.
+        output_directory (str): The directory the stage's files are written to.
+        manifest (dict): The build manifest, updated in place.
+
+    Returns:
+        tuple: (rebuilt, total) file counts.
+    """
+    previous = STAGES[STAGES.index(stage) - 1]
+    directories = manifest.setdefault('stages', {}).setdefault(stage, {})
+    output_root = os.path.abspath(output_directory)
+    recorded = directories.setdefault(os.path.abspath(input_directory), {})
+    if recorded.get('output_directory') != output_root:
+        # Outputs written elsewhere are left alone, and this directory is rebuilt from scratch
+        recorded.clear()
+        recorded['output_directory'] = output_root
+    entries = recorded.setdefault('files', {})
+    file_names = stage_inputs(previous, input_directory)
+    rebuilt = 0
+    for file_name in file_names:
+        input_hash = file_hash(os.path.join(input_directory, file_name))
+        output_path = os.path.join(output_directory, output_name(stage, file_name))
+        entry = entries.get(file_name, {})
+        if (entry.get('input_sha256') == input_hash and entry.get('output') == output_path
+                and entry.get('output_sha256') == file_hash(output_path)):
+            continue
+
+        records = TRANSFORMS[stage](read_records(previous, input_directory, [file_name]))
+        writer = write_csv_files if stage == 'processed' else write_jsonl_files
+        rows = writer(records, output_directory)
+        entries[file_name] = {
+            'input_sha256': input_hash,
+            'output': output_path,
+            'output_sha256': file_hash(output_path),
+            'rows': rows,
+        }
+        rebuilt += 1
+
+    for file_name in set(entries) - set(file_names):
+        stale_output = entries.pop(file_name)['output']
+        if os.path.dirname(os.path.abspath(stale_output)) == output_root and os.path.exists(stale_output):
+            os.remove(stale_output)
+    return rebuilt, len(file_names)
+
+def update_final(input_directory, output_path, manifest):
+    """
+    Splice the final JSONL file from one segment per training file.
+
+    The manifest records each segment's byte offset and length, along with the input
+    directory and output file they belong to; a run with either changed starts over.
+    Leading segments whose training file is unchanged are left in place; the file is
+    truncated at the first changed segment, and the rest is written back, copying
+    unchanged segments' bytes and formatting only the changed files.
+
+    Args:
+        input_directory (str): The training stage's directory.
+        output_path (str): The final JSONL file.
+        manifest (dict): The build manifest, updated in place.
+
+    Returns:
+        tuple: (rebuilt, total) segment counts.
+    """
+    final = manifest.get('final', {})
+    segments = final.get('segments', [])
+    try:
+        output_stat = os.stat(output_path)
+    except FileNotFoundError:
+        output_stat = None
+    # Hashing the whole output on every run would defeat the point; size and mtime
+    # are enough to notice it was rewritten by something else
+    if (output_stat is None or final.get('path') != os.path.abspath(output_path)
+            or final.get('input_directory') != os.path.abspath(input_directory)
+            or final.get('size') != output_stat.st_size or final.get('mtime_ns') != output_stat.st_mtime_ns):
+        segments = []
+
+    sources = [(file_name, file_hash(os.path.join(input_directory, file_name)))
+               for file_name in stage_inputs('training', input_directory)]
+    kept = 0
+    while (kept < len(sources) and kept < len(segments)
+           and (segments[kept]['source'], segments[kept]['input_sha256']) == sources[kept]):
+        kept += 1
+    splice_offset = segments[kept - 1]['offset'] + segments[kept - 1]['length'] if kept else 0
+
+    reusable = {(segment['source'], segment['input_sha256']): segment for segment in segments[kept:]}
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # An existing file is updated in place, so its unchanged segments can be read back
+    # before the tail is truncated; only a missing file is created empty
+    with open(output_path, 'r+b' if os.path.exists(output_path) else 'wb') as outfile:
+        # Later unchanged segments are read before the tail is overwritten
+        copied = {}
+        for key in sources[kept:]:
+            if key in reusable:
+                outfile.seek(reusable[key]['offset'])
+                copied[key] = outfile.read(reusable[key]['length'])
+
+        outfile.seek(splice_offset)
+        outfile.truncate()
+        new_segments = segments[:kept]
+        offset = splice_offset
+        rebuilt = 0
+        for file_name, input_hash in sources[kept:]:
+            data = copied.get((file_name, input_hash))
+            if data is None:
+                lines = format_records(read_records('training', input_directory, [file_name]))
+                data = ''.join(record.data + '\n' for record in lines).encode('utf-8')
+                rebuilt += 1
+            outfile.write(data)
+            new_segments.append({'source': file_name, 'input_sha256': input_hash,
+                                 'offset': offset, 'length': len(data)})
+            offset += len(data)
+        outfile.flush()
+        os.fsync(outfile.fileno())
+
+    output_stat = os.stat(output_path)
+    manifest['final'] = {'path': os.path.abspath(output_path), 'input_directory': os.path.abspath(input_directory),
+                         'size': output_stat.st_size, 'mtime_ns': output_stat.st_mtime_ns,
+                         'segments': new_segments}
+    return rebuilt, len(sources)
+
+def run_incremental(start='raw', stop='final', input_directory=None, output_path=None,
+                    manifest_path=MANIFEST_PATH):
+    """
+    Bring the stages from start to stop up to date, rebuilding only what changed.
+
+    Args:
+        start (str, optional): The stage to read.
+        stop (str, optional): The stage to produce.
+        input_directory (str, optional): Where the start stage's files are.
+        output_path (str, optional): The output directory, or the output file for 'final'.
+        manifest_path (str, optional): The build manifest.
+
+    Returns:
+        dict: stage -> (rebuilt, total) file counts.
+
+    Raises:
+        ValueError: If the stages are unknown or out of order.
+    """
+    if start not in STAGE_DIRECTORIES or stop not in TRANSFORMS or STAGES.index(start) >= STAGES.index(stop):
+        raise ValueError(f"Cannot run the pipeline from '{start}' to '{stop}'")
+
+    manifest = load_manifest(manifest_path)
+    counts = {}
+    directory = input_directory or STAGE_DIRECTORIES[start]
+    try:
+        for stage in STAGES[STAGES.index(start) + 1:STAGES.index(stop) + 1]:
+            if stage == 'final':
+                counts[stage] = update_final(directory, output_path or FINAL_OUTPUT_PATH, manifest)
+                break
+            stage_directory = output_path if stage == stop and output_path else STAGE_DIRECTORIES[stage]
+            counts[stage] = update_stage(stage, directory, stage_directory, manifest)
+            directory = stage_directory
+    finally:
+        save_manifest(manifest, manifest_path)
+    return counts
+
+def main():
+    '''
+    main entry point for the script
+    '''
+    parser = argparse.ArgumentParser(description='Build the fine-tuning data from the raw game results.')
+    parser.add_argument('--from', dest='start', choices=STAGES[:-1], default='raw',
+                        help='The stage to read')
+    parser.add_argument('--to', dest='stop', choices=STAGES[1:], default='final',
+                        help='The stage to produce')
+    parser.add_argument('--input', help="The start stage's directory, if not the default")
+    parser.add_argument('--output', help='The output directory, or the output file for the final stage')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only rebuild the outputs whose inputs changed since the last incremental run')
+    parser.add_argument('--manifest', default=MANIFEST_PATH, help='The incremental build manifest')
+    args = parser.parse_args()
+
+    if STAGES.index(args.start) >= STAGES.index(args.stop):
+        parser.error(f"Cannot run the pipeline from '{args.start}' to '{args.stop}'")
+
+    started = time.perf_counter()
+    if args.incremental:
+        counts = run_incremental(args.start, args.stop, args.input, args.output, args.manifest)
+    else:
+        count = run_pipeline(args.start, args.stop, args.input, args.output)
+    elapsed = time.perf_counter() - started
+
+    if args.incremental:
+        for stage, (rebuilt, total) in counts.items():
+            print(f"{stage}: rebuilt {rebuilt} of {total} files")
+        print(f"Incremental update finished in {elapsed:.2f}s")
+        return
+    print(f"Wrote {count} {args.stop} records from {args.start} in {elapsed:.2f}s "
+          f"({count / elapsed if elapsed else 0:.0f} records/s)")
+
+if __name__ == "__main__":
+    main()
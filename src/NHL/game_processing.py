@@ -5,146 +5,668 @@ This module provides functions for generating game predictions based on current
 standings and game information.
 """
 import datetime
+import itertools
+import json
+import os
 import time
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from openai_actions import openai_calls
+from openai_actions import run_polling
+from openai_actions import thread_manager
+from NHL import local_predictor
+from NHL import prediction_cache
+from NHL import simulation
+from NHL import standings
+from general import prediction_parser
+from general import telemetry
+from general import templates
+from historical import feature_store
 
-def generate_game_predictions(games_today, current_standings):
+# Where predictions come from: 'assistant', 'local', 'fallback' (the assistant, then the
+# local model for any game it could not predict) or 'prefilter' (the local model for
+# games it rates with high confidence, the assistant with local fallback for the rest)
+PREDICTOR = os.getenv('NHL_PREDICTOR', 'assistant')
+PREDICTORS = ('assistant', 'local', 'fallback', 'prefilter')
+
+# Number of assistant runs allowed in flight at the same time
+MAX_CONCURRENT_RUNS = int(os.getenv('NHL_MAX_CONCURRENT_RUNS', '5'))
+
+# Number of games sent to the assistant in one request; 0 or 1 predicts each game on its own
+BATCH_SIZE = int(os.getenv('NHL_PREDICTION_BATCH_SIZE', '0'))
+
+GAME_MESSAGE_TEMPLATE_PATH = 'src/game_message_template.txt'
+BATCH_MESSAGE_TEMPLATE_PATH = 'src/batch_message_template.txt'
+BATCH_GAME_SEPARATOR = '\n\n==========\n\n'
+
+# Recent form older than this many days (e.g. from last season) is left out of the prompt
+FEATURE_MAX_REST_DAYS = 30
+
+# A unit of work sent to the assistant: one game, or a batch of several games in one message
+PredictionJob = namedtuple('PredictionJob', ['indices', 'message', 'description', 'is_batch'])
+
+# Where each placeholder in the game message template comes from: (source, key).
+# Sources are the game itself, the home and away teams' standings and the run context.
+GAME_MESSAGE_FIELDS = {
+    'home': ('game', 'home_team'),
+    'hWins': ('home', 'wins'),
+    'hLosses': ('home', 'losses'),
+    'hOTLosses': ('home', 'otLosses'),
+    'hL10W': ('home', 'l10Wins'),
+    'hL10L': ('home', 'l10Losses'),
+    'hGaL10': ('home', 'l10GoalsAgainst'),
+    'hGfL10': ('home', 'l10GoalsFor'),
+    'hGP': ('home', 'gamesPlayed'),
+    'homeGoalDiff': ('home', 'goalDifferential'),
+    'homeGoalDiffPerct': ('home', 'goalDifferentialPctg'),
+    'homeGoalsAgainst': ('home', 'goalAgainst'),
+    'homeGoalsFor': ('home', 'goalFor'),
+    'homeWinsHome': ('home', 'homeWins'),
+    'homeLossesHome': ('home', 'homeLosses'),
+    'homeStreakType': ('home', 'streakCode'),
+    'homeStreakLength': ('home', 'streakCount'),
+    'away': ('game', 'away_team'),
+    'aWins': ('away', 'wins'),
+    'aLosses': ('away', 'losses'),
+    'aOTLosses': ('away', 'otLosses'),
+    'aL10W': ('away', 'l10Wins'),
+    'aL10L': ('away', 'l10Losses'),
+    'aGaL10': ('away', 'l10GoalsAgainst'),
+    'aGfL10': ('away', 'l10GoalsFor'),
+    'aGP': ('away', 'gamesPlayed'),
+    'awayGoalDiff': ('away', 'goalDifferential'),
+    'awayGoalDiffPerct': ('away', 'goalDifferentialPctg'),
+    'awayGoalsAgainst': ('away', 'goalAgainst'),
+    'awayGoalsFor': ('away', 'goalFor'),
+    'awayWinsRoad': ('away', 'roadWins'),
+    'awayLossesRoad': ('away', 'roadLosses'),
+    'awayStreakType': ('away', 'streakCode'),
+    'awayStreakLength': ('away', 'streakCount'),
+    'venue': ('game', 'venue'),
+    'gameDate': ('context', 'gameDate'),
+}
+
+def generate_predictions(games_today, current_standings, predictor=PREDICTOR, on_prediction=None):
+    """
+    Predict a slate of games with the assistant, the local model or both.
+
+    Args:
+        games_today (list): A list of dictionaries containing information
+        about the games to predict.
+        current_standings (list or StandingsSnapshot): The current team standings.
+        predictor (str, optional): One of PREDICTORS.
+        on_prediction (callable, optional): Called with (game, prediction) for each prediction.
+
+    Returns:
+        list: The predictions, in schedule order.
+
+    Raises:
+        ValueError: If predictor is not one of PREDICTORS.
+    """
+    if predictor not in PREDICTORS:
+        raise ValueError(f"Unknown predictor '{predictor}', expected one of {', '.join(PREDICTORS)}")
+    current_standings = standings.as_snapshot(current_standings)
+    if predictor == 'local':
+        return local_predictor.generate_game_predictions(games_today, current_standings, on_prediction)
+    if predictor == 'assistant':
+        return generate_game_predictions(games_today, current_standings, on_prediction=on_prediction)
+
+    predictions = {}
+
+    def collect(game, prediction):
+        predictions[id(game)] = prediction
+        if on_prediction is not None:
+            on_prediction(game, prediction)
+
+    remaining = list(games_today)
+    if predictor == 'prefilter':
+        local_predictions = {}
+        local_predictor.generate_game_predictions(
+            games_today, current_standings, lambda game, prediction: local_predictions.update({id(game): prediction})
+        )
+        for game in games_today:
+            prediction = local_predictions.get(id(game))
+            if prediction is not None and json.loads(prediction)[0]['confidence rating'] == 'high':
+                collect(game, prediction)
+        remaining = [game for game in games_today if id(game) not in predictions]
+        print(f"Local model predicted {len(games_today) - len(remaining)} games with high confidence, "
+              f"sending {len(remaining)} to the assistant")
+
+    if remaining:
+        try:
+            generate_game_predictions(remaining, current_standings, on_prediction=collect)
+        except Exception as e:
+            print(f"The assistant could not predict the games: {e}")
+
+    unanswered = [game for game in remaining if id(game) not in predictions]
+    if unanswered:
+        print(f"Falling back to the local model for {len(unanswered)} games")
+        local_predictor.generate_game_predictions(unanswered, current_standings, collect)
+    return [predictions[id(game)] for game in games_today if id(game) in predictions]
+
+def generate_game_predictions(games_today, current_standings, max_concurrent_runs=MAX_CONCURRENT_RUNS,
+                              batch_size=BATCH_SIZE, on_prediction=None, game_date=None, cache=None):
     """
     Generate predictions for a list of games using current standings.
 
+    Every game's prompt is rendered up front in one pass. Each game then gets
+    its own short-lived thread and run on the assistant (see
+    openai_actions.thread_manager), and up to
+    max_concurrent_runs runs are kept in flight at the same time. A single
+    RunPoller watches every outstanding run, and results are returned in
+    schedule order regardless of which run finishes first.
+
+    Games whose prompt was already answered with the same standings are served
+    from the prediction cache without starting a run.
+
+    With a batch_size above 1, games are instead sent in chunks of batch_size
+    games per run, and the assistant answers each chunk with one JSON array.
+    Games missing from a chunk's answer fall back to a run of their own.
+
+    If on_prediction is given, it is called with (game, prediction) as soon as each
+    game's prediction is available, so predictions can be stored as they arrive.
+
     Args:
         games_today (list): A list of dictionaries containing information 
         about the games to predict.
-        current_standings (list): A list of dictionaries containing current team standings.
+        current_standings (list or StandingsSnapshot): The current team standings.
+        max_concurrent_runs (int, optional): The maximum number of runs in flight.
+        batch_size (int, optional): The number of games per run in batch mode.
+        on_prediction (callable, optional): Called with (game, prediction) for each prediction.
+        game_date (str, optional): The game date as YYYY-MM-DD. Defaults to today.
+        cache (PredictionCache, optional): The prediction cache. Defaults to the shared cache.
 
     Returns:
         list: A list of predictions for each game.
     """
+    slate_started = time.perf_counter()
+    current_standings = standings.as_snapshot(current_standings)
+    with telemetry.span('slate.render'):
+        prediction_messages = generate_game_prediction_messages(games_today, current_standings, game_date)
     assistant = openai_calls.get_assistant()
-    thread = openai_calls.create_thread()
-    results = []
-    for game in games_today:
-        try:
-            teams_info = get_teams_recent_info(game, current_standings)
-            prediction_message = generate_game_prediction_message(game, teams_info)
-            #openai_message = ai_formatting.combine_contents_into_message(prediction_message)
-            #prediction = openai_calls.generate_chat_completions(openai_message)
-
-            openai_calls.add_message_to_thread(thread.id, prediction_message)
-            run = openai_calls.run_assistant_on_thread(thread.id, assistant)
-            
-            while True:
-                status = openai_calls.check_run_status(thread.id, run.id)
-                if status == 'completed':
-                    break
-                print('Waiting for ai completion...')
-                time.sleep(20)
-            
-            response = openai_calls.get_messages(thread.id)
-            prediction = response.data[0]
-            for content in prediction.content:
-                if not hasattr(content, 'type'):
+    cache = prediction_cache.get_cache() if cache is None else cache
+    cache.invalidate(current_standings.fingerprint)
+
+    predictions = {}
+    cache_keys = {}
+    uncached = []
+
+    def deliver(index, prediction):
+        predictions[index] = prediction
+        telemetry.record('game.total', time.perf_counter() - slate_started, telemetry.game_label(games_today[index]))
+        if on_prediction is not None:
+            on_prediction(games_today[index], prediction)
+
+    for index in range(len(games_today)):
+        if prediction_messages[index] is None:
+            continue
+        cache_keys[index] = prediction_cache.prediction_key(assistant, prediction_messages[index])
+        cached_prediction = cache.get(cache_keys[index])
+        if cached_prediction is not None:
+            deliver(index, cached_prediction)
+        else:
+            uncached.append(index)
+
+    waiting = deque()
+    queued_at = {}
+
+    def enqueue(jobs):
+        for job in jobs:
+            queued_at[id(job)] = time.perf_counter()
+            waiting.append(job)
+
+    enqueue(plan_prediction_jobs(games_today, prediction_messages, uncached, batch_size))
+    max_concurrent_runs = max(1, max_concurrent_runs)
+    poller = run_polling.RunPoller()
+    job_ids = itertools.count()
+    running = {}
+    fetching = {}
+
+    with thread_manager.ThreadManager() as threads, ThreadPoolExecutor(max_workers=max_concurrent_runs) as executor:
+        while waiting or poller.pending or fetching:
+            # Top up the runs in flight, submitting the new ones in parallel
+            starting = []
+            while waiting and poller.pending + len(starting) < max_concurrent_runs:
+                job = waiting.popleft()
+                telemetry.record('run.queued', time.perf_counter() - queued_at.pop(id(job)),
+                                 job_games(job, games_today))
+                starting.append((job, executor.submit(start_prediction_run, job, assistant, threads, games_today)))
+            for job, future in starting:
+                started = future.result()
+                if started is None:
+                    enqueue(fallback_jobs(job, job.indices, games_today, prediction_messages))
                     continue
+                job_id = next(job_ids)
+                running[job_id] = job
+                poller.add(job_id, *started)
 
-                if content.type == 'text' and hasattr(content, 'text') and hasattr(content.text, 'value'):
-                    prediction = content.text.value
-                    break
+            for result in poller.wait_next():
+                job = running.pop(result.key)
+                labels = job_games(job, games_today)
+                telemetry.record('run.model', result.elapsed, labels, result.outcome != 'succeeded')
+                telemetry.count('run.polls', result.polls, labels)
+                telemetry.count(f'run.outcome.{result.outcome}')
+                if result.outcome == 'succeeded':
+                    fetching[executor.submit(
+                        fetch_prediction, job, result.thread_id, result.run_id, threads, games_today
+                    )] = job
+                else:
+                    executor.submit(threads.release, result.thread_id)
+                    print(f"Run for {job.description} ended as '{result.status}' "
+                          f"({result.outcome}) after {result.elapsed:.1f}s")
+                    enqueue(fallback_jobs(job, job.indices, games_today, prediction_messages))
 
-            print(f'\n\n\n{prediction}')
-            results.append(prediction)
-        except Exception as e:
-            print(f"Error predicting game: {str(e)}")
-    return results
+            if fetching and not poller.pending and not waiting:
+                wait(fetching, return_when=FIRST_COMPLETED)
+            for future in [future for future in fetching if future.done()]:
+                job = fetching.pop(future)
+                answered = resolve_job_predictions(job, future.result(), games_today)
+                for index, prediction in answered.items():
+                    deliver(index, prediction)
+                    cache.put(cache_keys[index], prediction, current_standings.fingerprint)
+                unanswered = [index for index in job.indices if index not in answered]
+                enqueue(fallback_jobs(job, unanswered, games_today, prediction_messages))
+
+    telemetry.record('slate.predict', time.perf_counter() - slate_started)
+    print(f"Prediction cache: {cache.stats['hits']} hits, {cache.stats['misses']} misses")
+    return [predictions[index] for index in sorted(predictions)]
+
+def plan_prediction_jobs(games, prediction_messages, indices, batch_size=BATCH_SIZE):
+    """
+    Group games into the jobs sent to the assistant.
+
+    Args:
+        games (list): A list of dictionaries containing information about the games.
+        prediction_messages (list): The rendered message for each game.
+        indices (list): The positions in games of the games to predict.
+        batch_size (int, optional): The number of games per job; 0 or 1 for one job per game.
+
+    Returns:
+        list: PredictionJob entries covering every index once.
+    """
+    if batch_size <= 1:
+        return [single_game_job(index, games, prediction_messages) for index in indices]
+
+    jobs = []
+    for start in range(0, len(indices), batch_size):
+        chunk = indices[start:start + batch_size]
+        if len(chunk) == 1:
+            jobs.append(single_game_job(chunk[0], games, prediction_messages))
+        else:
+            jobs.append(PredictionJob(
+                chunk,
+                generate_batch_prediction_message([games[index] for index in chunk],
+                                                  [prediction_messages[index] for index in chunk]),
+                f"batch of {len(chunk)} games",
+                True
+            ))
+    return jobs
+
+def single_game_job(index, games, prediction_messages):
+    """
+    Build the job that predicts one game on its own.
+
+    Args:
+        index (int): The position of the game in games.
+        games (list): A list of dictionaries containing information about the games.
+        prediction_messages (list): The rendered message for each game.
+
+    Returns:
+        PredictionJob: The single-game job.
+    """
+    return PredictionJob([index], prediction_messages[index], f"game {describe_matchup(games[index])}", False)
+
+def fallback_jobs(job, indices, games, prediction_messages):
+    """
+    List the single-game jobs that retry the games a batch job did not answer.
+
+    Args:
+        job (PredictionJob): The job that did not answer every game.
+        indices (list): The positions of the unanswered games.
+        games (list): A list of dictionaries containing information about the games.
+        prediction_messages (list): The rendered message for each game.
+
+    Returns:
+        list: One job per unanswered game, or an empty list if job was already a single game.
+    """
+    if not job.is_batch or not indices:
+        return []
+    print(f"Falling back to single-game runs for {len(indices)} games from a {job.description}")
+    return [single_game_job(index, games, prediction_messages) for index in indices]
+
+def generate_batch_prediction_message(games, prediction_messages):
+    """
+    Combine several games' prediction messages into one request.
+
+    Args:
+        games (list): The games in the batch.
+        prediction_messages (list): The rendered message for each game.
+
+    Returns:
+        str: The batch message, with each game's section headed by its game ID.
+    """
+    sections = [
+        f"Game ID: {game.get('game_id')}\n{message}"
+        for game, message in zip(games, prediction_messages)
+    ]
+    return templates.load_template(BATCH_MESSAGE_TEMPLATE_PATH).render({
+        'game_count': len(games),
+        'games': BATCH_GAME_SEPARATOR.join(sections),
+    })
+
+def start_prediction_run(job, assistant, threads, games=None):
+    """
+    Start an assistant run for a job on its own thread.
+
+    Args:
+        job (PredictionJob): The job to run.
+        assistant (str): The ID of the assistant to run.
+        threads (ThreadManager): Creates the run's thread and cleans it up.
+        games (list, optional): The slate the job's indices point into, to charge the
+        time to its games in the run report.
+
+    Returns:
+        tuple: The (thread_id, run_id) of the started run, or None if it could not be started.
+    """
+    try:
+        with telemetry.span('run.start', job_games(job, games)):
+            return threads.start_run(job.message, assistant)
+    except Exception as e:
+        print(f"Error predicting {job.description}: {str(e)}")
+        return None
+
+def fetch_prediction(job, thread_id, run_id, threads, games=None):
+    """
+    Read the assistant's prediction from a thread whose run has completed.
+
+    Only the run's reply is fetched, and the thread is released once it has been read.
+
+    Args:
+        job (PredictionJob): The job the run was started for.
+        thread_id (str): The ID of the thread the prediction was written to.
+        run_id (str): The ID of the completed run.
+        threads (ThreadManager): The manager the thread was created with.
+        games (list, optional): The slate the job's indices point into, to charge the
+        time to its games in the run report.
+
+    Returns:
+        str: The prediction text from the assistant, or None if it could not be read.
+    """
+    try:
+        with telemetry.span('run.fetch', job_games(job, games)):
+            message = threads.read_reply(thread_id, run_id)
+        if message is None:
+            print(f"No reply from the assistant for {job.description}")
+            return None
+        prediction = extract_prediction_text(message)
+        print(f'\n\n\n{prediction}')
+        return prediction
+    except Exception as e:
+        print(f"Error reading prediction for {job.description}: {str(e)}")
+        return None
+
+def job_games(job, games):
+    """
+    The run report labels of a job's games.
+
+    Args:
+        job (PredictionJob): The job.
+        games (list or None): The slate the job's indices point into.
+
+    Returns:
+        list or None: The game labels, or None without a slate.
+    """
+    if games is None:
+        return None
+    return [telemetry.game_label(games[index]) for index in job.indices]
+
+def resolve_job_predictions(job, prediction, games):
+    """
+    Assign the assistant's answer for a job to the games in it.
+
+    Args:
+        job (PredictionJob): The job the answer belongs to.
+        prediction (str): The assistant's answer, or None if it could not be read.
+        games (list): A list of dictionaries containing information about the games.
+
+    Returns:
+        dict: The prediction for each answered game, keyed by its position in games.
+    """
+    if prediction is None:
+        return {}
+    if not job.is_batch:
+        return {job.indices[0]: prediction}
+    return parse_batch_predictions(prediction, {index: games[index] for index in job.indices})
 
-def generate_game_prediction_message(game, teams_info):
+def parse_batch_predictions(response_text, games_by_index):
+    """
+    Split a batch answer into one prediction per game.
+
+    The answer must hold a JSON array of prediction objects. Each object must pass
+    prediction_parser.validate_prediction and is matched to a game by its 'game id'
+    field, or by the home and away team names. Objects that fail either check are dropped.
+
+    Args:
+        response_text (str): The assistant's answer to a batch message.
+        games_by_index (dict): The games in the batch, keyed by their position in the slate.
+
+    Returns:
+        dict: Each matched game's prediction as a JSON array string holding its one
+        normalized prediction object, keyed by the game's position in the slate.
+    """
+    try:
+        items = prediction_parser.extract_json_payload(response_text)
+    except prediction_parser.PredictionParseError:
+        items = None
+    if not isinstance(items, list):
+        print('Batch prediction did not contain a JSON array')
+        return {}
+
+    by_game_id = {str(game.get('game_id')): index for index, game in games_by_index.items()}
+    by_teams = {(game.get('home_team'), game.get('away_team')): index for index, game in games_by_index.items()}
+
+    answered = {}
+    for item in items:
+        try:
+            item = prediction_parser.validate_prediction(item)
+        except prediction_parser.PredictionValidationError as e:
+            print(f"Dropping batch prediction: {e}")
+            continue
+        index = by_game_id.get(str(item.get('game id')))
+        if index is None:
+            index = by_teams.get((item['home team name'], item['away team name']))
+        if index is not None and index not in answered:
+            answered[index] = json.dumps([item], ensure_ascii=False)
+    return answered
+
+def describe_matchup(game):
+    """
+    Format a game as 'AWAY @ HOME' for log messages.
+
+    Args:
+        game (dict): A dictionary containing information about the game.
+
+    Returns:
+        str: The matchup description.
+    """
+    return f"{game.get('away_team')} @ {game.get('home_team')}"
+
+def extract_prediction_text(message):
+    """
+    Pull the text value out of an assistant message.
+
+    Args:
+        message (openai.ThreadMessage): The assistant message holding the prediction.
+
+    Returns:
+        str: The text content of the message, or the message itself if it has no text.
+    """
+    for content in message.content:
+        if not hasattr(content, 'type'):
+            continue
+
+        if content.type == 'text' and hasattr(content, 'text') and hasattr(content.text, 'value'):
+            return content.text.value
+    return message
+
+def get_game_message_template():
+    """
+    Load the game message template and check it against GAME_MESSAGE_FIELDS.
+
+    The template is read and parsed once per process.
+
+    Returns:
+        templates.PromptTemplate: The parsed game message template.
+
+    Raises:
+        templates.TemplateError: If the template uses a placeholder with no source.
+    """
+    template = templates.load_template(GAME_MESSAGE_TEMPLATE_PATH)
+    template.validate(GAME_MESSAGE_FIELDS)
+    return template
+
+def generate_game_prediction_message(game, teams_info, game_date=None, teams_features=None, simulated=None):
     """
     Generate a game prediction message based on game and team information.
 
     Args:
         game (dict): A dictionary containing information about the game.
         teams_info (tuple): A tuple containing home and away team information.
+        game_date (str, optional): The game date as YYYY-MM-DD. Defaults to today.
+        teams_features (tuple, optional): The home and away teams' recent form from the
+        feature store. Either may be None. When given, it is added after the template.
+        simulated (SimulationResult, optional): The game's Monte Carlo simulation, added
+        last when given.
 
     Returns:
         str: A formatted game prediction message.
+
+    Raises:
+        templates.TemplateError: If the template cannot be filled from the game and team data.
     """
-    try:
-        home_team_data, away_team_data = teams_info
-        file_path = 'src/game_message_template.txt'
-
-        # Read the content of the file
-        with open(file_path, 'r', encoding="utf-8") as file:
-            template_from_file = file.read()
-
-        # Now format the template with the payload data
-        formatted_text_from_file = template_from_file.format(
-            home=game['home_team'],
-            hWins=home_team_data['wins'],
-            hLosses=home_team_data['losses'],
-            hOTLosses=home_team_data['otLosses'],
-            hL10W=home_team_data['l10Wins'],
-            hL10L=home_team_data['l10Losses'],
-            hGaL10=home_team_data['l10GoalsAgainst'],
-            hGfL10=home_team_data['l10GoalsFor'],
-            hGP=home_team_data['gamesPlayed'],
-            homeGoalDiff=home_team_data['goalDifferential'],
-            homeGoalDiffPerct=home_team_data['goalDifferentialPctg'],
-            homeGoalsAgainst=home_team_data['goalAgainst'],
-            homeGoalsFor=home_team_data['goalFor'],
-            homeWinsHome=home_team_data['homeWins'],
-            homeLossesHome=home_team_data['homeLosses'],
-            homeStreakType=home_team_data['streakCode'],
-            homeStreakLength=home_team_data['streakCount'],
-            away=game['away_team'],
-            aWins=away_team_data['wins'],
-            aLosses=away_team_data['losses'],
-            aOTLosses=away_team_data['otLosses'],
-            aL10W=away_team_data['l10Wins'],
-            aL10L=away_team_data['l10Losses'],
-            aGaL10=away_team_data['l10GoalsAgainst'],
-            aGfL10=away_team_data['l10GoalsFor'],
-            aGP=away_team_data['gamesPlayed'],
-            awayGoalDiff=away_team_data['goalDifferential'],
-            awayGoalDiffPerct=away_team_data['goalDifferentialPctg'],
-            awayGoalsAgainst=away_team_data['goalAgainst'],
-            awayGoalsFor=away_team_data['goalFor'],
-            awayWinsRoad=away_team_data['roadWins'],
-            awayLossesRoad=away_team_data['roadLosses'],
-            awayStreakType=away_team_data['streakCode'],
-            awayStreakLength=away_team_data['streakCount'],
-            venue=game['venue'],
-            gameDate = datetime.date.today().strftime("%Y-%m-%d")
-        )
-        return formatted_text_from_file
-    except Exception as ex:
-        print(f'There was an error generating the game prediction: {ex}')
-        return None
+    home_team_data, away_team_data = teams_info
+    sources = {
+        'game': game,
+        'home': home_team_data,
+        'away': away_team_data,
+        'context': {'gameDate': game_date or datetime.date.today().strftime("%Y-%m-%d")},
+    }
 
-def get_teams_recent_info(game, current_standings):
+    values = {}
+    for field, (source, key) in GAME_MESSAGE_FIELDS.items():
+        if key in sources[source]:
+            values[field] = sources[source][key]
+    with telemetry.span('prompt.render', telemetry.game_label(game)):
+        message = get_game_message_template().render(values)
+
+    recent_form = [
+        feature_store.describe_features(label, features)
+        for label, features in zip(('Home team', 'Away team'), teams_features or ())
+        if features is not None
+    ]
+    if recent_form:
+        message += '\n\nRecent form from the game results:\n' + '\n'.join(recent_form)
+    if simulated is not None:
+        message += '\n\n' + simulation.describe_for_prompt(simulated)
+    return message
+
+def generate_game_prediction_messages(games, current_standings, game_date=None, features=None,
+                                      trials=simulation.TRIALS):
     """
-    Get recent information for the home and away teams from the current standings.
+    Render the prediction messages for a whole slate of games in one pass.
+
+    The whole slate is simulated at once (see NHL.simulation) before any message is
+    rendered, and each game's results are added to its message.
+
+    Args:
+        games (list): A list of dictionaries containing information about the games.
+        current_standings (list or StandingsSnapshot): The current team standings.
+        game_date (str, optional): The game date as YYYY-MM-DD. Defaults to today.
+        features (FeatureStore, optional): Adds each team's recent form to its messages.
+        Defaults to the store built by scripts/build_feature_store.py, if there is one
+        with dated games (see feature_store.get_feature_store).
+        trials (int, optional): The simulated trials per game; 0 leaves the simulation out.
+
+    Returns:
+        list: The message for each game, in the same order as games. Games whose
+        message could not be rendered are None.
+
+    Raises:
+        templates.TemplateError: If the template itself is invalid.
+    """
+    get_game_message_template()
+    current_standings = standings.as_snapshot(current_standings)
+    game_date = game_date or datetime.date.today().strftime("%Y-%m-%d")
+    features = features or feature_store.get_feature_store()
+
+    inputs = {}
+    for index, game in enumerate(games):
+        try:
+            teams_info = get_teams_recent_info(game, current_standings)
+        except standings.TeamNotFoundError as ex:
+            print(f'There was an error generating the game prediction for {describe_matchup(game)}: {ex}')
+            continue
+        inputs[index] = (teams_info, get_teams_features(game, features, game_date) if features else None)
+
+    simulated = {}
+    if trials > 0 and inputs:
+        with telemetry.span('slate.simulate'):
+            results = simulation.simulate_games(
+                [teams_info for teams_info, _ in inputs.values()],
+                [teams_features for _, teams_features in inputs.values()],
+                trials=trials, league_average=simulation.league_goals_per_game(current_standings.teams),
+                keys=[telemetry.game_label(games[index]) for index in inputs]
+            )
+        simulated = dict(zip(inputs, results))
+
+    messages = []
+    for index, game in enumerate(games):
+        if index not in inputs:
+            messages.append(None)
+            continue
+        teams_info, teams_features = inputs[index]
+        try:
+            messages.append(generate_game_prediction_message(game, teams_info, game_date, teams_features,
+                                                             simulated.get(index)))
+        except templates.TemplateError as ex:
+            print(f'There was an error generating the game prediction for {describe_matchup(game)}: {ex}')
+            messages.append(None)
+    return messages
+
+def get_teams_features(game, features, game_date):
+    """
+    Look up the home and away teams' recent form in the feature store.
 
     Args:
         game (dict): A dictionary containing information about the game.
-        current_standings (list): A list of dictionaries containing current team standings.
+        features (FeatureStore): The feature store.
+        game_date (str): The game date as YYYY-MM-DD.
 
     Returns:
-        tuple: A tuple containing information for the home and away teams.
+        tuple: The home and away teams' features, None for a team with no recent games.
     """
-    # Find the home and away team data
-    home_team_data = [item for item in current_standings if item.get('teamAbbrev', {}).get('default') == game['home_team']]
-    away_team_data = [item for item in current_standings if item.get('teamAbbrev', {}).get('default') == game['away_team']]
+    teams_features = []
+    for team in (game['home_team'], game['away_team']):
+        team_features = features.features(team, game_date)
+        if team_features is not None and (team_features['rest_days'] is None
+                                          or team_features['rest_days'] > FEATURE_MAX_REST_DAYS):
+            team_features = None
+        teams_features.append(team_features)
+    return tuple(teams_features)
+
+def get_teams_recent_info(game, current_standings):
+    """
+    Get recent information for the home and away teams from the current standings.
 
-    # Handling the case where no matching item is found for either team
-    if not home_team_data:
-        print("No data found for the home team.")
-        home_team_info = None
-    else:
-        home_team_info = home_team_data[0]  # Assuming only one item is expected
+    Args:
+        game (dict): A dictionary containing information about the game.
+        current_standings (list or StandingsSnapshot): The current team standings.
+        Passing a StandingsSnapshot avoids re-indexing the standings for every game.
 
-    if not away_team_data:
-        print("No data found for the away team.")
-        away_team_info = None
-    else:
-        away_team_info = away_team_data[0]  # Assuming only one item is expected
+    Returns:
+        tuple: A tuple containing information for the home and away teams.
 
-    return home_team_info, away_team_info
+    Raises:
+        standings.TeamNotFoundError: If either team is not in the standings.
+    """
+    return standings.as_snapshot(current_standings).teams_for_game(game)
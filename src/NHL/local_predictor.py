@@ -0,0 +1,471 @@
+"""
+Module: local_predictor.py
+
+This module provides a local baseline predictor that needs neither the OpenAI API nor
+the network once the standings are fetched.
+
+The model is trained with NumPy on the historical game results, replayed with
+historical.season_replay so every game is seen with the standings both teams had going
+into it. A logistic regression on the difference between the teams' standings rates
+gives the home team's chance of winning, and a Poisson regression per side gives the
+expected goals. The trained coefficients are saved as JSON, so predicting only needs the
+model file: a full slate takes a few milliseconds.
+
+generate_game_predictions takes the same arguments and returns predictions in the same
+form as game_processing.generate_game_predictions, so the two can be swapped or combined
+(see game_processing.generate_predictions).
+"""
+
+import datetime
+import json
+import os
+import threading
+import numpy as np
+from NHL import simulation
+from NHL import standings
+from general import telemetry
+from historical import season_replay
+from historical import synthetic_chance
+
+MODEL_PATH = os.getenv('NHL_LOCAL_MODEL_PATH', 'data/models/baseline_model.json')
+TRAINING_DIRECTORY = 'data/raw'
+MODEL_VERSION = 1
+# Games where either team had played fewer than this are left out of training
+MIN_GAMES_PLAYED = 5
+L2_PENALTY = 1.0
+NEWTON_ITERATIONS = 25
+
+def win_features(home, away):
+    """
+    The logistic regression inputs for a game.
+
+    Args:
+        home (dict): The home team's standings entry, with the standings.DERIVED_RATES fields.
+        away (dict): The away team's standings entry, with the standings.DERIVED_RATES fields.
+
+    Returns:
+        dict: Feature name -> value.
+    """
+    return {
+        'point_pctg_diff': point_pctg(home) - point_pctg(away),
+        'goals_for_diff': home['goalsForPerGame'] - away['goalsForPerGame'],
+        'goals_against_diff': home['goalsAgainstPerGame'] - away['goalsAgainstPerGame'],
+        'l10_win_pctg_diff': l10_win_pctg(home) - l10_win_pctg(away),
+        'l10_goals_for_diff': home['l10GoalsForPerGame'] - away['l10GoalsForPerGame'],
+        'l10_goals_against_diff': home['l10GoalsAgainstPerGame'] - away['l10GoalsAgainstPerGame'],
+        'home_win_pctg': home['homeWinPctg'],
+        'away_road_win_pctg': away['roadWinPctg'],
+    }
+
+def goal_features(team, opponent, side):
+    """
+    The Poisson regression inputs for one team's goals in a game.
+
+    Args:
+        team (dict): The scoring team's standings entry, with the derived rates.
+        opponent (dict): The opponent's standings entry, with the derived rates.
+        side (str): 'home' or 'road', the scoring team's side.
+
+    Returns:
+        dict: Feature name -> value.
+    """
+    opponent_side = 'road' if side == 'home' else 'home'
+    return {
+        'goals_for': team['goalsForPerGame'],
+        'opponent_goals_against': opponent['goalsAgainstPerGame'],
+        'side_goals_for': team[f'{side}GoalsForPerGame'],
+        'opponent_side_goals_against': opponent[f'{opponent_side}GoalsAgainstPerGame'],
+        'l10_goals_for': team['l10GoalsForPerGame'],
+        'opponent_l10_goals_against': opponent['l10GoalsAgainstPerGame'],
+    }
+
+def point_pctg(team):
+    """A team's share of the points available, from its record."""
+    games = team.get('gamesPlayed') or 0
+    if not games:
+        return 0.0
+    return (2 * team.get('wins', 0) + team.get('otLosses', 0)) / (2 * games)
+
+def l10_win_pctg(team):
+    """A team's win share over its last 10 games."""
+    games = team.get('l10GamesPlayed') or 0
+    return team.get('l10Wins', 0) / games if games else 0.0
+
+def fit_logistic(features, outcomes, penalty=L2_PENALTY, iterations=NEWTON_ITERATIONS):
+    """
+    Fit an L2-regularized logistic regression with Newton's method.
+
+    Args:
+        features (numpy.ndarray): Standardized inputs, one row per game.
+        outcomes (numpy.ndarray): 1 for a home win, 0 otherwise.
+        penalty (float, optional): The L2 penalty on the coefficients (not the intercept).
+        iterations (int, optional): The maximum number of Newton steps.
+
+    Returns:
+        numpy.ndarray: The intercept followed by the coefficients.
+    """
+    design = np.column_stack([np.ones(len(features)), features])
+    weights = np.zeros(design.shape[1])
+    regularization = np.full(design.shape[1], penalty)
+    regularization[0] = 0.0
+    for _ in range(iterations):
+        probabilities = 1.0 / (1.0 + np.exp(-design @ weights))
+        gradient = design.T @ (probabilities - outcomes) + regularization * weights
+        hessian = (design.T * (probabilities * (1 - probabilities))) @ design + np.diag(regularization)
+        step = np.linalg.solve(hessian, gradient)
+        weights -= step
+        if np.max(np.abs(step)) < 1e-8:
+            break
+    return weights
+
+def fit_poisson(features, counts, penalty=L2_PENALTY, iterations=NEWTON_ITERATIONS):
+    """
+    Fit an L2-regularized Poisson regression with a log link, by Newton's method.
+
+    Args:
+        features (numpy.ndarray): Standardized inputs, one row per game.
+        counts (numpy.ndarray): The goals scored.
+        penalty (float, optional): The L2 penalty on the coefficients (not the intercept).
+        iterations (int, optional): The maximum number of Newton steps.
+
+    Returns:
+        numpy.ndarray: The intercept followed by the coefficients.
+    """
+    design = np.column_stack([np.ones(len(features)), features])
+    weights = np.zeros(design.shape[1])
+    weights[0] = np.log(max(counts.mean(), 1e-6))
+    regularization = np.full(design.shape[1], penalty)
+    regularization[0] = 0.0
+    for _ in range(iterations):
+        rates = np.exp(design @ weights)
+        gradient = design.T @ (rates - counts) + regularization * weights
+        hessian = (design.T * rates) @ design + np.diag(regularization)
+        step = np.linalg.solve(hessian, gradient)
+        weights -= step
+        if np.max(np.abs(step)) < 1e-8:
+            break
+    return weights
+
+class LinearModel:
+    """
+    A fitted linear model over named, standardized features.
+
+    Args:
+        feature_names (list): The input names, in coefficient order.
+        mean (list): The training mean of each input.
+        scale (list): The training standard deviation of each input.
+        weights (list): The intercept followed by a coefficient per input.
+    """
+
+    def __init__(self, feature_names, mean, scale, weights):
+        self.feature_names = list(feature_names)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+
+    @classmethod
+    def fit(cls, rows, targets, fitter):
+        """
+        Standardize the inputs and fit a model.
+
+        Args:
+            rows (list): Feature dictionaries, one per game.
+            targets (numpy.ndarray): The value to predict for each game.
+            fitter (callable): fit_logistic or fit_poisson.
+
+        Returns:
+            LinearModel: The fitted model.
+        """
+        feature_names = list(rows[0])
+        matrix = np.array([[row[name] for name in feature_names] for row in rows], dtype=np.float64)
+        mean = matrix.mean(axis=0)
+        scale = matrix.std(axis=0)
+        scale[scale == 0] = 1.0
+        return cls(feature_names, mean, scale, fitter((matrix - mean) / scale, targets))
+
+    def linear(self, rows):
+        """The linear predictor for feature dictionaries, as an array."""
+        matrix = np.array([[row[name] for name in self.feature_names] for row in rows], dtype=np.float64)
+        return self.weights[0] + ((matrix - self.mean) / self.scale) @ self.weights[1:]
+
+    def to_dict(self):
+        """dict: The model as JSON-serializable values."""
+        return {
+            'features': self.feature_names,
+            'mean': self.mean.tolist(),
+            'scale': self.scale.tolist(),
+            'weights': self.weights.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a model saved with to_dict."""
+        return cls(data['features'], data['mean'], data['scale'], data['weights'])
+
+class BaselineModel:
+    """
+    The local win probability and goals model.
+
+    Args:
+        win (LinearModel): The logistic regression giving the home team's chance of winning.
+        home_goals (LinearModel): The Poisson regression of the home team's goals.
+        away_goals (LinearModel): The Poisson regression of the away team's goals.
+        metadata (dict, optional): Training details saved alongside the model.
+    """
+
+    def __init__(self, win, home_goals, away_goals, metadata=None):
+        self.win = win
+        self.home_goals = home_goals
+        self.away_goals = away_goals
+        self.metadata = metadata or {}
+
+    @classmethod
+    def train(cls, games):
+        """
+        Train the model on replayed games.
+
+        Args:
+            games (iterable): Games as yielded by season_replay.replay_seasons.
+
+        Returns:
+            BaselineModel: The trained model.
+
+        Raises:
+            ValueError: If there are no games to train on.
+        """
+        win_rows, home_rows, away_rows = [], [], []
+        outcomes, home_goals, away_goals = [], [], []
+        seasons = set()
+        for game in games:
+            home = standings.add_derived_fields(game['home_standing'])
+            away = standings.add_derived_fields(game['away_standing'])
+            if min(home['gamesPlayed'], away['gamesPlayed']) < MIN_GAMES_PLAYED:
+                continue
+            win_rows.append(win_features(home, away))
+            home_rows.append(goal_features(home, away, 'home'))
+            away_rows.append(goal_features(away, home, 'road'))
+            outcomes.append(1.0 if game['home_goals'] > game['away_goals'] else 0.0)
+            home_goals.append(game['home_goals'])
+            away_goals.append(game['away_goals'])
+            seasons.add(game['season'])
+        if not win_rows:
+            raise ValueError('No games to train the local model on')
+
+        outcomes = np.array(outcomes)
+        model = cls(
+            LinearModel.fit(win_rows, outcomes, fit_logistic),
+            LinearModel.fit(home_rows, np.array(home_goals, dtype=np.float64), fit_poisson),
+            LinearModel.fit(away_rows, np.array(away_goals, dtype=np.float64), fit_poisson),
+        )
+        probabilities = model.win_probabilities(win_rows)
+        clipped = np.clip(probabilities, 1e-9, 1 - 1e-9)
+        model.metadata = {
+            'trained_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'games': len(win_rows),
+            'seasons': sorted(seasons),
+            'training_accuracy': round(float(np.mean((probabilities > 0.5) == (outcomes == 1))), 4),
+            'training_log_loss': round(float(-np.mean(outcomes * np.log(clipped) +
+                                                      (1 - outcomes) * np.log(1 - clipped))), 4),
+        }
+        return model
+
+    def win_probabilities(self, win_rows):
+        """The home teams' chances of winning, between 0 and 1, for win_features rows."""
+        return 1.0 / (1.0 + np.exp(-self.win.linear(win_rows)))
+
+    def predict(self, games, teams):
+        """
+        Predict a slate of games at once.
+
+        Args:
+            games (list): The games, as formatted by nhl_api.format_games_today_response.
+            teams (list): The (home, away) standings entries of each game.
+
+        Returns:
+            list: A prediction record per game, in the prediction schema.
+        """
+        if not games:
+            return []
+        teams = [(standings.add_derived_fields(home), standings.add_derived_fields(away)) for home, away in teams]
+        win_rows = [win_features(home, away) for home, away in teams]
+        home_chances = np.round(self.win_probabilities(win_rows) * 100, 1)
+        away_chances = np.round(100 - home_chances, 1)
+        expected_home = np.exp(self.home_goals.linear([goal_features(home, away, 'home') for home, away in teams]))
+        expected_away = np.exp(self.away_goals.linear([goal_features(away, home, 'road') for home, away in teams]))
+        confidences = synthetic_chance.confidence_ratings(home_chances, away_chances)
+
+        records = []
+        for index, game in enumerate(games):
+            home_goals, away_goals = predicted_score(expected_home[index], expected_away[index],
+                                                     home_chances[index] >= 50)
+            records.append({
+                'venue': game.get('venue', ''),
+                'home team name': game['home_team'],
+                'home team percentage chance of winning': f"{home_chances[index]}%",
+                'predicted home team goals': home_goals,
+                'away team name': game['away_team'],
+                'away team percentage chance of winning': f"{away_chances[index]}%",
+                'predicted away team goals': away_goals,
+                'confidence rating': str(confidences[index]),
+                'key factors': describe_factors(win_rows[index]),
+                'explanation': (f"Local baseline model: expected goals {expected_home[index]:.2f} to "
+                                f"{expected_away[index]:.2f} from both teams' standings form."),
+                'predictor': 'local',
+            })
+        return records
+
+    def save(self, file_path=MODEL_PATH):
+        """
+        Write the model to a JSON file.
+
+        Args:
+            file_path (str, optional): The file to write.
+        """
+        payload = {
+            'version': MODEL_VERSION,
+            'metadata': self.metadata,
+            'win': self.win.to_dict(),
+            'home_goals': self.home_goals.to_dict(),
+            'away_goals': self.away_goals.to_dict(),
+        }
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(payload, file, indent=2)
+
+    @classmethod
+    def load(cls, file_path=MODEL_PATH):
+        """
+        Load a model saved with save.
+
+        Args:
+            file_path (str, optional): The model file.
+
+        Returns:
+            BaselineModel: The model.
+
+        Raises:
+            ValueError: If the file was written by an incompatible version.
+        """
+        with open(file_path, 'r', encoding='utf-8') as file:
+            payload = json.load(file)
+        if payload.get('version') != MODEL_VERSION:
+            raise ValueError(f"{file_path} is model version {payload.get('version')}, expected {MODEL_VERSION}")
+        return cls(LinearModel.from_dict(payload['win']), LinearModel.from_dict(payload['home_goals']),
+                   LinearModel.from_dict(payload['away_goals']), payload.get('metadata'))
+
+def predicted_score(expected_home, expected_away, home_favoured):
+    """
+    Round the expected goals to a final score that agrees with the favourite.
+
+    Args:
+        expected_home (float): The home team's expected goals.
+        expected_away (float): The away team's expected goals.
+        home_favoured (bool): Whether the home team is the more likely winner.
+
+    Returns:
+        tuple: (home goals, away goals) as ints, never a tie.
+    """
+    home_goals = int(round(expected_home))
+    away_goals = int(round(expected_away))
+    if home_favoured and home_goals <= away_goals:
+        home_goals = away_goals + 1
+    elif not home_favoured and away_goals <= home_goals:
+        away_goals = home_goals + 1
+    return home_goals, away_goals
+
+def describe_factors(features):
+    """Describe the standings gaps that favour each team, largest first."""
+    described = {
+        'point_pctg_diff': 'points percentage',
+        'goals_for_diff': 'goals for per game',
+        'l10_win_pctg_diff': 'wins in the last 10',
+        'l10_goals_for_diff': 'goals for in the last 10',
+    }
+    factors = sorted(((abs(features[name]), name) for name in described if features[name]), reverse=True)
+    return ', '.join(
+        f"{'home' if features[name] > 0 else 'away'} team ahead on {described[name]}" for _, name in factors
+    ) or 'teams level on standings form'
+
+def train_model(directory=TRAINING_DIRECTORY, seasons=None):
+    """
+    Train the model on the historical game results.
+
+    Args:
+        directory (str, optional): The game results directory to replay.
+        seasons (list, optional): The seasons to train on. Defaults to every season.
+
+    Returns:
+        BaselineModel: The trained model.
+    """
+    return BaselineModel.train(season_replay.replay_seasons(directory, seasons))
+
+_default_model = None
+_default_model_lock = threading.Lock()
+
+def get_model():
+    """
+    Return the process-wide model, loading it from MODEL_PATH on first use.
+
+    Returns:
+        BaselineModel: The shared model.
+
+    Raises:
+        FileNotFoundError: If no model has been trained (see scripts/train_baseline_model.py).
+    """
+    global _default_model
+    with _default_model_lock:
+        if _default_model is None:
+            _default_model = BaselineModel.load(MODEL_PATH)
+        return _default_model
+
+def generate_game_predictions(games_today, current_standings, on_prediction=None, model=None,
+                              trials=simulation.TRIALS):
+    """
+    Predict a slate of games with the local model.
+
+    Each record's 'simulation results' are filled in from a Monte Carlo simulation of
+    the slate (see NHL.simulation) on the standings.
+
+    Args:
+        games_today (list): A list of dictionaries containing information
+        about the games to predict.
+        current_standings (list or StandingsSnapshot): The current team standings.
+        on_prediction (callable, optional): Called with (game, prediction) for each prediction.
+        model (BaselineModel, optional): The model to use. Defaults to get_model().
+        trials (int, optional): The simulated trials per game; 0 leaves the simulation out.
+
+    Returns:
+        list: A prediction per game that could be predicted, in schedule order, each
+        a JSON array holding one prediction record like the assistant's answers.
+    """
+    model = model or get_model()
+    current_standings = standings.as_snapshot(current_standings)
+
+    games = []
+    teams = []
+    for game in games_today:
+        try:
+            teams.append(current_standings.teams_for_game(game))
+            games.append(game)
+        except standings.TeamNotFoundError as ex:
+            print(f"Local model cannot predict {game.get('away_team')} @ {game.get('home_team')}: {ex}")
+
+    with telemetry.span('local.predict', [telemetry.game_label(game) for game in games]):
+        records = model.predict(games, teams)
+    if trials > 0 and games:
+        with telemetry.span('slate.simulate'):
+            simulated = simulation.simulate_games(
+                teams, trials=trials, league_average=simulation.league_goals_per_game(current_standings.teams),
+                keys=[telemetry.game_label(game) for game in games]
+            )
+        for record, result in zip(records, simulated):
+            record['simulation results'] = simulation.describe_simulation(result)
+    predictions = []
+    for game, record in zip(games, records):
+        prediction = json.dumps([record])
+        predictions.append(prediction)
+        if on_prediction is not None:
+            on_prediction(game, prediction)
+    return predictions
@@ -0,0 +1,243 @@
+"""
+Module: mock_nhl_api.py
+
+This module provides MockNHLServer, a local stand-in for the NHL web API
+(api-web.nhle.com/v1) and the NHL stats API (api.nhle.com/stats/rest) for benchmarks
+and offline runs.
+
+Payloads recorded in the NHL API response cache (data/cache/nhl_api) are replayed for
+the URLs they were recorded from. Everything else is synthesized from the historical
+game results in data/raw:
+
+- schedule/{date}: a slate of games_per_day games between the latest season's teams.
+- standings/now: the latest season's final standings, rebuilt by season_replay.
+- club-stats/{team}/{season}/{type}: an empty skaters and goalies list.
+- club-schedule-season/{team}/{season}: the team's games of a historical season.
+- gamecenter/{id}/boxscore: the boxscore of a historical game, with the stats in
+  its game results row.
+- stats/rest/en/team: the latest season's teams.
+
+Point the code at it with NHL_API_BASE_URL (and NHL_API_TEAM_BASE_URL for the stats API),
+set to base_url and team_base_url.
+"""
+
+import json
+import os
+import random
+import re
+import threading
+from urllib.parse import urlsplit
+from general.mock_server import MockServer
+from historical import feature_store, season_replay
+from NHL import response_cache
+
+RAW_DIRECTORY = 'data/raw'
+GAMES_PER_DAY = 8
+# Boxscore fields copied from a game results row, by the row's column for the home team
+BOXSCORE_COLUMNS = ('hits', 'blocks', 'pim', 'powerPlayConversion', 'faceoffWinningPctg')
+
+class MockNHLServer(MockServer):
+    """
+    Serves recorded or synthetic NHL API payloads.
+
+    Args:
+        directory (str, optional): The game results to synthesize payloads from.
+        recordings (str, optional): A response cache directory whose payloads are replayed.
+        None to synthesize everything.
+        games_per_day (int, optional): Games on each synthetic schedule day.
+        **options: MockServer options (latency, failure_rate, rate_limit, ...).
+    """
+
+    def __init__(self, directory=RAW_DIRECTORY, recordings=response_cache.CACHE_DIRECTORY,
+                 games_per_day=GAMES_PER_DAY, **options):
+        super().__init__(**options)
+        self.directory = directory
+        self.games_per_day = games_per_day
+        self.recorded = load_recordings(recordings) if recordings else {}
+        self.seasons = season_replay.list_seasons(directory)
+        self._season_games = {}
+        self._season_lock = threading.Lock()
+        self._teams = None
+        self._standings = None
+
+    @property
+    def base_url(self):
+        """str: The URL standing in for https://api-web.nhle.com/v1/."""
+        return f"{self.url}/v1/"
+
+    @property
+    def team_base_url(self):
+        """str: The URL standing in for https://api.nhle.com/stats/rest/."""
+        return f"{self.url}/stats/rest/"
+
+    def route(self, method, path, query, body):
+        if method != 'GET':
+            return None
+        if path in self.recorded:
+            return 200, self.recorded[path]
+
+        routes = (
+            (r'/v1/schedule/(\d{4}-\d{2}-\d{2})', self.schedule),
+            (r'/v1/standings/now', self.standings),
+            (r'/v1/club-stats/(\w+)/(\d{8})/(\d+)', self.club_stats),
+            (r'/v1/club-schedule-season/(\w+)/(\d{8})', self.club_schedule),
+            (r'/v1/gamecenter/(\d+)/boxscore', self.boxscore),
+            (r'/stats/rest/en/team', self.teams),
+        )
+        for pattern, handler in routes:
+            match = re.fullmatch(pattern, path)
+            if match:
+                payload = handler(*match.groups())
+                return None if payload is None else (200, payload)
+        return None
+
+    def schedule(self, date):
+        """A day of games between randomly paired teams, the same for every call with the date."""
+        teams_info = self._latest_teams()
+        teams = sorted(teams_info)
+        random.Random(date).shuffle(teams)
+        count = min(self.games_per_day, len(teams) // 2)
+        games = []
+        for number in range(count):
+            home, away = teams[2 * number], teams[2 * number + 1]
+            games.append({
+                'id': int(f"{date.replace('-', '')}{number:02d}"),
+                'gameType': 2,
+                'gameDate': date,
+                'venue': {'default': f"{teams_info[home]['fullName']} Arena"},
+                'startTimeUTC': f"{date}T23:00:00Z",
+                'gameState': 'FUT',
+                'homeTeam': {'abbrev': home},
+                'awayTeam': {'abbrev': away},
+            })
+        return {'gameWeek': [{'date': date, 'numberOfGames': len(games), 'games': games}]}
+
+    def standings(self):
+        """The latest season's standings after its last game."""
+        self._latest_teams()
+        return {'wildCardIndicator': True, 'standings': self._standings}
+
+    def club_stats(self, team, season, game_type):
+        """An empty club stats payload."""
+        return {'season': season, 'gameType': int(game_type), 'skaters': [], 'goalies': []}
+
+    def club_schedule(self, team, season):
+        """The games of a team's historical season."""
+        games = self._games(season)
+        if games is None:
+            return None
+        return {'games': [
+            {'id': game_id, 'gameType': 2, 'homeTeam': {'abbrev': row['abbrev']},
+             'awayTeam': {'abbrev': row['away_abbrev']}}
+            for game_id, row in games.items() if team in (row['abbrev'], row['away_abbrev'])
+        ]}
+
+    def boxscore(self, game_id):
+        """The boxscore of a historical game."""
+        games = self._games(season_for_game_id(game_id))
+        row = games.get(int(game_id)) if games else None
+        if row is None:
+            return None
+
+        def team(prefix, goals_column):
+            stats = {
+                'id': int(feature_store.to_number(row.get(f'{prefix}id'))),
+                'name': {'default': row.get(f'{prefix}name', '')},
+                'abbrev': row.get(f'{prefix}abbrev', ''),
+                'score': int(feature_store.to_number(row.get(goals_column))),
+            }
+            for column in BOXSCORE_COLUMNS:
+                if f'{prefix}{column}' in row:
+                    stats[column] = number_or_text(row[f'{prefix}{column}'])
+            return stats
+
+        return {
+            'id': int(game_id),
+            'gameType': 2,
+            'gameDate': row.get('gameDate') or None,
+            'gameState': 'OFF',
+            'homeTeam': team('', 'home_goals'),
+            'awayTeam': team('away_', 'away_away_goals'),
+        }
+
+    def teams(self):
+        """The latest season's teams."""
+        teams = self._latest_teams()
+        return {'data': list(teams.values()), 'total': len(teams)}
+
+    def _games(self, season):
+        # A season's games in order, keyed by their made-up game IDs
+        if season not in self.seasons:
+            return None
+        with self._season_lock:
+            if season not in self._season_games:
+                rows = season_replay.order_games(season_replay.load_season_files(self.directory, season))
+                self._season_games[season] = {
+                    make_game_id(season, number): row for number, row in enumerate(rows, 1)
+                }
+            return self._season_games[season]
+
+    def _latest_teams(self):
+        with self._season_lock:
+            if self._teams is None:
+                self._teams = {}
+                self._standings = []
+                if self.seasons:
+                    self._build_latest_season()
+            return self._teams
+
+    def _build_latest_season(self):
+        files = season_replay.load_season_files(self.directory, self.seasons[-1])
+        tracker = season_replay.StandingsTracker()
+        for team, (team_name, rows) in files.items():
+            tracker.entry(team, team_name)
+            home_rows = [row for row in rows if row.get('abbrev') == team]
+            team_id = int(feature_store.to_number(home_rows[0].get('id'))) if home_rows else 0
+            self._teams[team] = {'id': team_id, 'fullName': team_name, 'triCode': team}
+        for row in season_replay.order_games(files):
+            tracker.record(row['abbrev'], row['away_abbrev'],
+                           int(feature_store.to_number(row.get('home_goals'))),
+                           int(feature_store.to_number(row.get('away_away_goals'))))
+        self._standings = sorted(tracker.standings(), key=lambda entry: entry['points'], reverse=True)
+
+def make_game_id(season, number):
+    """The made-up ID of a season's nth game, in the NHL's YYYY02NNNN regular-season form."""
+    return int(f"{season[:4]}02{number:04d}")
+
+def season_for_game_id(game_id_text):
+    """The season a made-up game ID belongs to."""
+    year = int(str(game_id_text)[:4])
+    return f"{year}{year + 1}"
+
+def number_or_text(value):
+    """A game results value as a number where it is one, e.g. '23' -> 23, '1/3' -> '1/3'."""
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return int(number) if number.is_integer() and '.' not in value else number
+
+def load_recordings(directory):
+    """
+    Read the payloads in a response cache directory.
+
+    Args:
+        directory (str): The response cache directory.
+
+    Returns:
+        dict: Each payload keyed by the path of the URL it was recorded from.
+    """
+    recorded = {}
+    try:
+        names = [name for name in os.listdir(directory) if name.endswith('.json')]
+    except OSError:
+        return recorded
+    for name in names:
+        try:
+            with open(os.path.join(directory, name), 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            continue
+        if 'url' in entry and 'body' in entry:
+            recorded[urlsplit(entry['url']).path] = entry['body']
+    return recorded
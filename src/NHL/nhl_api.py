@@ -4,41 +4,227 @@ Module: nhl_data_fetch.py
 This module provides functions for fetching NHL game data and standings from the NHL API.
 """
 
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import urlsplit
 import pytz
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from NHL import response_cache
+from general import telemetry
 
-NHL_API_BASE_URL = "https://api-web.nhle.com/v1/"
+# Point NHL_API_BASE_URL at a stand-in such as NHL/mock_nhl_api.py to run without the real API
+NHL_API_BASE_URL = os.getenv('NHL_API_BASE_URL', "https://api-web.nhle.com/v1/")
 SEASON="20232024"
 
-def safe_request(url, max_retries=3, backoff_factor=0.5, timeout=10):
+# Connection pool and retry policy shared by every NHL API request
+POOL_SIZE = int(os.getenv('NHL_API_POOL_SIZE', '10'))
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+REQUEST_TIMEOUT = 10
+# Number of club-stats requests sent at the same time
+MAX_STATS_WORKERS = 8
+
+_session = None
+_session_lock = threading.RLock()
+_stats_lock = threading.Lock()
+_request_stats = {
+    'requests': 0,
+    'failures': 0,
+    'retries': 0,
+    'bytes': 0,
+}
+# Connection counts carried over from sessions that were replaced by configure_session
+_closed_pool_stats = {'attempts': 0, 'connections': 0}
+
+def configure_session(pool_size=POOL_SIZE, max_retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR):
+    """
+    Build the shared NHL API session with the given pool size and retry policy.
+
+    Any previously configured session is closed. Requests already made are kept
+    in the counters reported by get_request_stats.
+
+    Args:
+        pool_size (int, optional): The number of keep-alive connections kept per host.
+        max_retries (int, optional): The maximum number of retries for failed requests.
+        backoff_factor (float, optional): The factor by which the retry delay
+        increases between retries.
+
+    Returns:
+        requests.Session: The new shared session.
+    """
+    global _session
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        status_forcelist=RETRY_STATUSES,
+        backoff_factor=backoff_factor,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    with _session_lock:
+        if _session is not None:
+            pool_stats = _pool_stats(_session)
+            _closed_pool_stats['attempts'] += pool_stats['attempts']
+            _closed_pool_stats['connections'] += pool_stats['connections']
+            _session.close()
+        _session = session
+    return session
+
+def get_session():
+    """
+    Return the shared NHL API session, building it on first use.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    with _session_lock:
+        if _session is None:
+            configure_session()
+        return _session
+
+def pooled_get(url, timeout=REQUEST_TIMEOUT, headers=None):
+    """
+    Send a GET request through the shared session and record it in the request counters.
+
+    Args:
+        url (str): The URL to send the request to.
+        timeout (int, optional): The timeout for the request in seconds.
+        headers (dict, optional): Extra request headers.
+
+    Returns:
+        requests.Response: The response, after raise_for_status has been called.
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails.
+    """
+    try:
+        response = get_session().get(url, timeout=timeout, headers=headers)
+    except requests.exceptions.RequestException:
+        _record_request(failed=True)
+        raise
+
+    retries = getattr(response.raw, 'retries', None)
+    _record_request(
+        failed=not response.ok,
+        retries=len(retries.history) if retries is not None else 0,
+        size=len(response.content)
+    )
+    response.raise_for_status()
+    return response
+
+def fetch_json(url, timeout=REQUEST_TIMEOUT):
+    """
+    Fetch a JSON payload, serving it from the on-disk response cache when possible.
+
+    Args:
+        url (str): The URL to fetch.
+        timeout (int, optional): The timeout for the request in seconds.
+
+    Returns:
+        dict: The decoded JSON payload.
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails, or if offline
+        mode is on and the URL is not cached.
+    """
+    with telemetry.span(f'nhl.{endpoint_name(url)}'):
+        return response_cache.get_cache().get(
+            url,
+            lambda request_url, headers: pooled_get(request_url, timeout=timeout, headers=headers)
+        )
+
+def get_request_stats():
+    """
+    Report the counters for requests sent through the shared session.
+
+    'connections' is the number of TCP connections opened, and
+    'reused_connections' the number of HTTP attempts that went out on an
+    already open keep-alive connection.
+
+    Returns:
+        dict: The request, failure, retry, byte, connection and response cache counters.
+    """
+    with _stats_lock:
+        stats = dict(_request_stats)
+    with _session_lock:
+        pool_stats = _pool_stats(_session) if _session is not None else {'attempts': 0, 'connections': 0}
+    attempts = pool_stats['attempts'] + _closed_pool_stats['attempts']
+    connections = pool_stats['connections'] + _closed_pool_stats['connections']
+    stats['connections'] = connections
+    stats['reused_connections'] = max(0, attempts - connections)
+    stats['cache'] = dict(response_cache.get_cache().stats)
+    return stats
+
+def endpoint_name(url):
+    """
+    Name the endpoint of an NHL API URL for telemetry.
+
+    Args:
+        url (str): The URL.
+
+    Returns:
+        str: e.g. 'schedule', 'standings', 'club-stats' or 'gamecenter.boxscore'.
+    """
+    segments = [segment for segment in urlsplit(url).path.split('/')
+                if segment and segment not in ('v1', 'stats', 'rest', 'en')]
+    if not segments:
+        return 'unknown'
+    if segments[0] == 'gamecenter' and len(segments) > 2:
+        return f'gamecenter.{segments[2]}'
+    return segments[0]
+
+def _record_request(failed=False, retries=0, size=0):
+    telemetry.count('nhl.http_requests')
+    telemetry.count('nhl.retries', retries)
+    telemetry.count('nhl.failures', int(failed))
+    with _stats_lock:
+        _request_stats['requests'] += 1
+        _request_stats['failures'] += int(failed)
+        _request_stats['retries'] += retries
+        _request_stats['bytes'] += size
+
+def _pool_stats(session):
+    attempts = 0
+    connections = 0
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            attempts += pool.num_requests
+            connections += pool.num_connections
+    return {'attempts': attempts, 'connections': connections}
+
+def safe_request(url, timeout=REQUEST_TIMEOUT):
     """
     Send a request to the specified URL and handle any potential errors.
+
+    Responses are served from the on-disk response cache while they are fresh.
+    Otherwise the request goes out on the shared, pooled session so connections
+    are kept alive across calls. Retries follow the policy set by configure_session.
     
     Args:
         url (str): The URL to send the request to.
-        max_retries (int, optional): The maximum number of retries for failed 
-        requests (default is 3).
-        backoff_factor (float, optional): The factor by which 
-        the retry delay increases between retries (default is 0.5).
         timeout (int, optional): The timeout for the request in seconds (default is 10).
 
     Returns:
         dict: The JSON response from the successful request or an 
         empty dictionary if the request fails.
     """
-    session = requests.Session()
-    retry = Retry(connect=max_retries, backoff_factor=backoff_factor)
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount('http://', adapter)
-    session.mount('https://', adapter)
-
     try:
-        response = session.get(url, timeout=timeout)
-        response.raise_for_status()
-        return response.json()
+        return fetch_json(url, timeout=timeout)
     except requests.exceptions.RequestException as e:
         print(f"Request failed: {e}")
         return {}
@@ -69,6 +255,9 @@ def get_games_today():
 def format_games_today_response(games_today):
     """
     Formats the response for today's games.
+
+    The club stats for every team playing are fetched once per team, concurrently,
+    and attached to each formatted game as 'home_team_stats' and 'away_team_stats'.
     
     Args:
         games_today (list): A list of game data for today's games.
@@ -76,6 +265,14 @@ def format_games_today_response(games_today):
     Returns:
         list: A list of dictionaries containing formatted information about today's games.
     """
+    team_keys = []
+    for game in games_today:
+        for side in ('homeTeam', 'awayTeam'):
+            team = game.get(side, {}).get('abbrev')
+            if team:
+                team_keys.append((team, game['gameType']))
+    team_stats = get_teams_stats(team_keys)
+
     game_responses = []
     for game in games_today:
         game_id = game.get('id')
@@ -85,20 +282,39 @@ def format_games_today_response(games_today):
         away_team = game.get('awayTeam', {}).get('abbrev', 'Unknown Team')
         game_type = game['gameType']
 
-        home_team_stats = get_current_team_stats(home_team, game_type)
-        away_team_stats = get_current_team_stats(away_team, game_type)
-
-
         formatted_game = {
             'game_id': game_id,
             'venue': venue,
             'start_time_utc': start_time_utc,
             'away_team': away_team,
-            'home_team': home_team
+            'home_team': home_team,
+            'home_team_stats': team_stats.get((home_team, game_type), {}),
+            'away_team_stats': team_stats.get((away_team, game_type), {})
         }
         game_responses.append(formatted_game)
     return game_responses
 
+def get_teams_stats(team_keys, max_workers=MAX_STATS_WORKERS):
+    """
+    Fetch club stats for several teams concurrently.
+
+    Duplicate (team, game_type) pairs are only fetched once.
+
+    Args:
+        team_keys (iterable): (team abbreviation, game type) pairs to fetch stats for.
+        max_workers (int, optional): The maximum number of requests in flight.
+
+    Returns:
+        dict: The stats payload for each (team, game_type) pair.
+    """
+    unique_keys = list(dict.fromkeys(team_keys))
+    if not unique_keys:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_keys)))) as executor:
+        payloads = executor.map(lambda key: get_current_team_stats(*key), unique_keys)
+        return dict(zip(unique_keys, payloads))
+
 def get_current_standings():
     """
     Fetch the current NHL standings.
@@ -112,7 +328,14 @@ def get_current_standings():
 
 def get_current_team_stats(team, game_type):
     """
-    todo
+    Fetch the current season's club stats for a team.
+
+    Args:
+        team (str): The team's abbreviation (e.g. 'NYR').
+        game_type (int): The NHL game type (2 for regular season, 3 for playoffs).
+
+    Returns:
+        dict: The club stats payload, or an empty dictionary if the request fails.
     """
     stats_payload = safe_request(f"{NHL_API_BASE_URL}club-stats/{team}/{SEASON}/{game_type}")
     return stats_payload
@@ -0,0 +1,163 @@
+"""
+Module: prediction_cache.py
+
+This module provides a persistent cache of assistant predictions, so rerunning the
+predictions on the same day does not send unchanged games back through the assistant.
+
+Predictions are keyed by a fingerprint of the assistant ID, the rendered prompt and
+the model. Each entry also records the fingerprint of the standings it was made with,
+and entries made with different standings are dropped when the cache is opened.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+PREDICTION_CACHE_PATH = os.getenv('NHL_PREDICTION_CACHE_PATH', 'data/cache/predictions.json')
+# Seconds a cached prediction is served for; 0 turns the cache off
+PREDICTION_CACHE_TTL = int(os.getenv('NHL_PREDICTION_CACHE_TTL', str(12 * 60 * 60)))
+PREDICTION_MODEL = os.getenv('NHL_ENGINE_NAME', '')
+
+def prediction_key(assistant_id, prompt, model=PREDICTION_MODEL):
+    """
+    Fingerprint a prediction request.
+
+    Args:
+        assistant_id (str): The ID of the assistant the prompt is sent to.
+        prompt (str): The rendered prediction prompt.
+        model (str, optional): The model or engine name behind the assistant.
+
+    Returns:
+        str: A hex digest identifying the request.
+    """
+    payload = json.dumps([assistant_id, prompt, model], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class PredictionCache:
+    """
+    Predictions stored in a single JSON file, keyed by prediction_key.
+
+    Args:
+        file_path (str, optional): The path of the cache file.
+        ttl (int, optional): Seconds a prediction is served for. 0 disables the cache.
+    """
+
+    def __init__(self, file_path=PREDICTION_CACHE_PATH, ttl=PREDICTION_CACHE_TTL):
+        self.file_path = file_path
+        self.ttl = ttl
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'invalidated': 0}
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    @property
+    def enabled(self):
+        """bool: Whether predictions are served from and stored in the cache."""
+        return self.ttl > 0
+
+    def invalidate(self, standings_fingerprint):
+        """
+        Drop every prediction made with standings other than the given ones.
+
+        Args:
+            standings_fingerprint (str): The fingerprint of the current standings.
+        """
+        with self._lock:
+            stale = [key for key, entry in self._entries.items()
+                     if entry.get('standings') != standings_fingerprint]
+            for key in stale:
+                del self._entries[key]
+            self.stats['invalidated'] += len(stale)
+            if stale:
+                self._save()
+
+    def get(self, key):
+        """
+        Look up a cached prediction.
+
+        Args:
+            key (str): The prediction_key of the request.
+
+        Returns:
+            str or None: The cached prediction, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if not self.enabled or entry is None or time.time() - entry['stored_at'] >= self.ttl:
+                self.stats['misses'] += 1
+                return None
+            self.stats['hits'] += 1
+            return entry['prediction']
+
+    def put(self, key, prediction, standings_fingerprint):
+        """
+        Store a prediction and write the cache file.
+
+        Args:
+            key (str): The prediction_key of the request.
+            prediction (str): The assistant's prediction.
+            standings_fingerprint (str): The fingerprint of the standings used for the prompt.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = {
+                'prediction': prediction,
+                'standings': standings_fingerprint,
+                'stored_at': time.time(),
+            }
+            self.stats['stores'] += 1
+            self._save()
+
+    def _load(self):
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+        if not isinstance(entries, dict):
+            return {}
+        now = time.time()
+        # Entries that are malformed, e.g. edited by hand, are dropped rather than failing every run
+        return {key: entry for key, entry in entries.items()
+                if is_valid_entry(entry) and now - entry['stored_at'] < self.ttl}
+
+    def _save(self):
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f'{self.file_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(self._entries, file, ensure_ascii=False)
+        os.replace(temp_path, self.file_path)
+
+def is_valid_entry(entry):
+    """
+    Check that a cache file entry has the fields the cache reads.
+
+    Args:
+        entry: A value from the cache file.
+
+    Returns:
+        bool: Whether it is a dictionary with a prediction and a numeric stored_at time.
+    """
+    return (isinstance(entry, dict) and 'prediction' in entry
+            and isinstance(entry.get('stored_at'), (int, float)) and not isinstance(entry['stored_at'], bool))
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_cache():
+    """
+    Return the process-wide prediction cache, loading it on first use.
+
+    Returns:
+        PredictionCache: The shared cache.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PredictionCache()
+        return _default_cache
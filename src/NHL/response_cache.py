@@ -0,0 +1,267 @@
+"""
+Module: response_cache.py
+
+This module provides an on-disk cache for NHL API responses, keyed by URL.
+
+Each endpoint has its own time-to-live: boxscores of finished games never expire,
+standings are kept for a few minutes, schedules and club stats for longer. Stale
+entries that carry an ETag or Last-Modified header are revalidated with a conditional
+request instead of being downloaded again. The cache is bounded in size and evicts
+the least recently used entries first.
+
+In offline mode (NHL_API_OFFLINE=1) responses are served only from the cache,
+and a miss is reported as a failed request.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import requests
+
+CACHE_DIRECTORY = os.getenv('NHL_API_CACHE_DIR', 'data/cache/nhl_api')
+CACHE_MAX_BYTES = int(os.getenv('NHL_API_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+# Evict down to this share of CACHE_MAX_BYTES so eviction does not run on every store
+EVICTION_TARGET = 0.9
+
+DEFAULT_TTL = 10 * 60
+LIVE_BOXSCORE_TTL = 60
+FINISHED_GAME_STATES = {'OFF', 'FINAL'}
+BOXSCORE_PATTERN = re.compile(r'/gamecenter/\d+/boxscore$')
+
+# Time-to-live in seconds for each endpoint, checked in order. None never expires.
+ENDPOINT_TTLS = [
+    (re.compile(r'/standings/'), 5 * 60),
+    (re.compile(r'/schedule/'), 30 * 60),
+    (re.compile(r'/club-stats/'), 60 * 60),
+    (re.compile(r'/club-schedule-season/'), 6 * 60 * 60),
+    (re.compile(r'/stats/rest/en/team$'), 7 * 24 * 60 * 60),
+]
+
+class OfflineCacheMiss(requests.exceptions.RequestException):
+    """Raised in offline mode when a URL has no cached response."""
+
+def ttl_for(url, payload):
+    """
+    Work out how long a response may be served from the cache.
+
+    Args:
+        url (str): The URL the response was fetched from.
+        payload (dict): The decoded JSON response.
+
+    Returns:
+        int or None: The time-to-live in seconds, or None if the response never expires.
+    """
+    path = url.split('?', 1)[0]
+    if BOXSCORE_PATTERN.search(path):
+        if isinstance(payload, dict) and payload.get('gameState') in FINISHED_GAME_STATES:
+            return None
+        return LIVE_BOXSCORE_TTL
+
+    for pattern, ttl in ENDPOINT_TTLS:
+        if pattern.search(path):
+            return ttl
+    return DEFAULT_TTL
+
+class ResponseCache:
+    """
+    A size-bounded, least-recently-used cache of JSON responses stored one file per URL.
+
+    Args:
+        directory (str, optional): The directory the cache files are written to.
+        max_bytes (int, optional): The maximum total size of the cache files.
+        offline (bool, optional): Serve only from the cache and never hit the network.
+    """
+
+    def __init__(self, directory=CACHE_DIRECTORY, max_bytes=CACHE_MAX_BYTES, offline=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.offline = os.getenv('NHL_API_OFFLINE') == '1' if offline is None else offline
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stores': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        self._size = None
+
+    def lookup(self, url):
+        """
+        Read the cached entry for a URL.
+
+        Args:
+            url (str): The URL to look up.
+
+        Returns:
+            dict or None: The entry, with a 'fresh' flag added, or None if nothing is cached.
+        """
+        path = self._path(url)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        ttl = entry.get('ttl')
+        entry['fresh'] = ttl is None or time.time() - entry['stored_at'] < ttl
+        self._touch(path)
+        return entry
+
+    def get(self, url, fetch):
+        """
+        Return the JSON payload for a URL, using the cache where possible.
+
+        Args:
+            url (str): The URL to fetch.
+            fetch (callable): Function taking (url, headers) and returning a requests.Response.
+            It is only called on a miss or to revalidate a stale entry.
+
+        Returns:
+            dict: The decoded JSON payload.
+
+        Raises:
+            OfflineCacheMiss: If offline mode is on and the URL is not cached.
+            requests.exceptions.RequestException: If the request fails.
+        """
+        entry = self.lookup(url)
+        if entry is not None and (entry['fresh'] or self.offline):
+            self._count('hits')
+            return entry['body']
+        if self.offline:
+            self._count('misses')
+            raise OfflineCacheMiss(f"No cached response for {url} (offline mode)")
+
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = fetch(url, headers)
+        if response.status_code == 304 and entry is not None:
+            self._count('revalidated')
+            self._write(url, entry['body'], entry.get('etag'), entry.get('last_modified'))
+            return entry['body']
+
+        self._count('misses')
+        payload = response.json()
+        self._write(url, payload, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return payload
+
+    def clear(self):
+        """Delete every cached response."""
+        with self._lock:
+            for name in self._entry_names():
+                os.remove(os.path.join(self.directory, name))
+            self._size = 0
+
+    def _write(self, url, payload, etag, last_modified):
+        entry = {
+            'url': url,
+            'stored_at': time.time(),
+            'ttl': ttl_for(url, payload),
+            'etag': etag,
+            'last_modified': last_modified,
+            'body': payload,
+        }
+        data = json.dumps(entry).encode('utf-8')
+        path = self._path(url)
+
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            if self._size is None:
+                self._size = self._scan_size()
+            try:
+                self._size -= os.path.getsize(path)
+            except OSError:
+                pass
+
+            temp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, path)
+            self._size += len(data)
+            self.stats['stores'] += 1
+
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in self._entry_names():
+            path = os.path.join(self.directory, name)
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+
+        target = self.max_bytes * EVICTION_TARGET
+        for _, size, path in sorted(entries):
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+            self.stats['evictions'] += 1
+
+    def _scan_size(self):
+        size = 0
+        for name in self._entry_names():
+            try:
+                size += os.path.getsize(os.path.join(self.directory, name))
+            except OSError:
+                pass
+        return size
+
+    def _entry_names(self):
+        try:
+            return [name for name in os.listdir(self.directory) if name.endswith('.json')]
+        except OSError:
+            return []
+
+    def _touch(self, path):
+        # The modification time doubles as the last-used time for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _count(self, counter):
+        with self._lock:
+            self.stats[counter] += 1
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def configure_cache(**options):
+    """
+    Replace the process-wide response cache.
+
+    Args:
+        **options: Keyword arguments passed through to ResponseCache.
+
+    Returns:
+        ResponseCache: The new shared cache.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = ResponseCache(**options)
+        return _default_cache
+
+def get_cache():
+    """
+    Return the process-wide response cache, creating it on first use.
+
+    Returns:
+        ResponseCache: The shared cache.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
@@ -0,0 +1,327 @@
+"""
+Module: simulation.py
+
+This module provides a Monte Carlo simulation of NHL games. Each game draws from its own
+generator, seeded by the game, and is vectorized with NumPy across all of its trials.
+
+Each team's goals in regulation are drawn from a Poisson distribution, or a negative
+binomial one when DISPERSION is set, around a scoring rate built from the standings and
+the processed game results. A team's attack is a blend of its season, home or road, and
+last-10 goals for per game, plus its last-10 form from the feature store when there is
+one. It is shrunk towards the league average early in the season. Its opponent's defence
+is built the same way from goals against. The expected goals are the attack times the
+opponent's defence over the league average.
+
+Games tied after regulation go to a 5-minute 3-on-3 overtime. The first goal wins it,
+and it comes at the teams' combined rate scaled up by OT_SCORING_FACTOR. Games still
+tied go to a shootout. As in the official score, the overtime or shootout winner is
+credited one extra goal.
+
+Every game draws from its own generator, seeded from SEED and the game's key (its game
+ID, or its rates when no key is given). A game's results therefore depend only on the
+game, not on which other games are simulated with it, so the prompts they are added to,
+and so the prediction cache, are the same whichever predictor mode simulated the game.
+
+    results = simulation.simulate_games(teams)
+    print(simulation.describe_simulation(results[0]))
+"""
+
+import hashlib
+import os
+from collections import namedtuple
+import numpy as np
+from historical import synthetic_chance
+
+# Trials per game; 0 leaves the simulation out of the prediction prompt
+TRIALS = int(os.getenv('NHL_SIMULATION_TRIALS', '100000'))
+
+# Negative binomial size of the goal counts; 0 draws them from a Poisson distribution
+DISPERSION = float(os.getenv('NHL_SIMULATION_DISPERSION', '0'))
+
+SEED = 0
+# Trials drawn at once for each game, which bounds the memory used
+CHUNK_TRIALS = 50000
+
+# Weights of the goals per game blended into a team's attack and defence
+SEASON_WEIGHT = 0.5
+SIDE_WEIGHT = 0.25
+RECENT_WEIGHT = 0.25
+# Games of league-average scoring added to each team's record before blending
+PRIOR_GAMES = 10
+LEAGUE_GOALS_PER_GAME = 3.0
+
+OT_MINUTES = 5
+# How much faster goals come at 3-on-3 than in regulation
+OT_SCORING_FACTOR = 1.7
+SHOOTOUT_HOME_SHARE = 0.5
+# Scores above this are grouped with it when finding the most likely final score
+MAX_SCORE = 15
+
+SimulationResult = namedtuple('SimulationResult', [
+    'trials', 'home_win_pctg', 'away_win_pctg', 'home_expected_goals', 'away_expected_goals',
+    'overtime_pctg', 'shootout_pctg', 'likely_score', 'home_rate', 'away_rate',
+])
+
+def league_goals_per_game(teams):
+    """
+    The league's average goals per team per game.
+
+    Args:
+        teams (list): Standings entries, with the standings.DERIVED_RATES fields.
+
+    Returns:
+        float: The average, or LEAGUE_GOALS_PER_GAME before any games are played.
+    """
+    goals = sum(team.get('goalFor', 0) for team in teams)
+    games = sum(team.get('gamesPlayed', 0) for team in teams)
+    return goals / games if goals and games else LEAGUE_GOALS_PER_GAME
+
+def team_strength(team, side, kind, league_average, features=None):
+    """
+    A team's goals for (attack) or against (defence) per game, blended and shrunk.
+
+    Args:
+        team (dict): The team's standings entry, with the standings.DERIVED_RATES fields.
+        side (str): 'home' or 'road', the side the team plays on.
+        kind (str): 'For' for the attack, 'Against' for the defence.
+        league_average (float): The league's goals per team per game.
+        features (dict, optional): The team's recent form from the feature store.
+
+    Returns:
+        float: The blended goals per game.
+    """
+    parts = [(SEASON_WEIGHT, team[f'goals{kind}PerGame'], team.get('gamesPlayed') or 0),
+             (SIDE_WEIGHT, team[f'{side}Goals{kind}PerGame'], team.get(f'{side}GamesPlayed') or 0),
+             (RECENT_WEIGHT, team[f'l10Goals{kind}PerGame'], team.get('l10GamesPlayed') or 0)]
+    if features is not None and features['last_10']['games']:
+        # The game results' form shares the recent weight with the standings' last 10
+        recent = features['last_10']
+        parts[2:] = [(RECENT_WEIGHT / 2, parts[2][1], parts[2][2]),
+                     (RECENT_WEIGHT / 2, recent[f'goals_{kind.lower()}'], recent['games'])]
+    return sum(
+        weight * (rate * games + league_average * PRIOR_GAMES) / (games + PRIOR_GAMES)
+        for weight, rate, games in parts
+    ) / sum(weight for weight, _, _ in parts)
+
+def scoring_rates(home, away, league_average, teams_features=None):
+    """
+    The expected regulation goals of both teams in a game.
+
+    Args:
+        home (dict): The home team's standings entry, with the derived rates.
+        away (dict): The away team's standings entry, with the derived rates.
+        league_average (float): The league's goals per team per game.
+        teams_features (tuple, optional): The home and away teams' recent form from the
+        feature store. Either may be None.
+
+    Returns:
+        tuple: (home goals, away goals) per game.
+    """
+    home_features, away_features = teams_features or (None, None)
+    home_rate = (team_strength(home, 'home', 'For', league_average, home_features)
+                 * team_strength(away, 'road', 'Against', league_average, away_features) / league_average)
+    away_rate = (team_strength(away, 'road', 'For', league_average, away_features)
+                 * team_strength(home, 'home', 'Against', league_average, home_features) / league_average)
+    return home_rate, away_rate
+
+def draw_goals(rng, rate, trials, dispersion):
+    """Draw one team's regulation goals in every trial."""
+    if dispersion > 0:
+        return rng.negative_binomial(dispersion, dispersion / (dispersion + rate), trials)
+    return rng.poisson(rate, trials)
+
+def game_generator(seed, key):
+    """
+    The random generator of one game.
+
+    Args:
+        seed (int): The simulation's seed.
+        key (str): What identifies the game, e.g. its game ID.
+
+    Returns:
+        numpy.random.Generator: A generator that depends only on the seed and the key.
+    """
+    digest = hashlib.sha256(str(key).encode('utf-8')).digest()
+    return np.random.default_rng([seed, int.from_bytes(digest[:8], 'little')])
+
+def simulate_rates(home_rates, away_rates, trials=TRIALS, dispersion=DISPERSION, seed=SEED, keys=None):
+    """
+    Simulate games from the teams' expected regulation goals.
+
+    Args:
+        home_rates (array-like): The home teams' expected goals, one per game.
+        away_rates (array-like): The away teams' expected goals, one per game.
+        trials (int, optional): The trials per game.
+        dispersion (float, optional): The negative binomial size; 0 for Poisson goals.
+        seed (int, optional): The random seed.
+        keys (list, optional): What identifies each game, e.g. its game ID, to seed its
+        draws from. Defaults to the game's rates.
+
+    Returns:
+        list: A SimulationResult per game.
+    """
+    home_rates = np.asarray(home_rates, dtype=np.float64)
+    away_rates = np.asarray(away_rates, dtype=np.float64)
+    game_count = len(home_rates)
+    if not game_count or trials <= 0:
+        return []
+    if keys is None:
+        keys = [f'{home!r}-{away!r}' for home, away in zip(home_rates.tolist(), away_rates.tolist())]
+    generators = [game_generator(seed, key) for key in keys]
+    total_rates = home_rates + away_rates
+    overtime_goal = 1 - np.exp(-total_rates * OT_SCORING_FACTOR * OT_MINUTES / 60)
+    overtime_home_share = (home_rates / np.where(total_rates > 0, total_rates, 1.0))[:, None]
+    overtime_goal = overtime_goal[:, None]
+
+    home_wins = np.zeros(game_count)
+    overtimes = np.zeros(game_count)
+    shootouts = np.zeros(game_count)
+    home_goals = np.zeros(game_count)
+    away_goals = np.zeros(game_count)
+    scores = np.zeros(game_count * (MAX_SCORE + 1) ** 2)
+    offsets = (np.arange(game_count) * (MAX_SCORE + 1) ** 2)[:, None]
+
+    for start in range(0, trials, CHUNK_TRIALS):
+        size = min(CHUNK_TRIALS, trials - start)
+        home = np.empty((game_count, size), dtype=np.int64)
+        away = np.empty((game_count, size), dtype=np.int64)
+        # overtime decides whether overtime has a goal, side who wins overtime or the shootout
+        overtime = np.empty((game_count, size))
+        side = np.empty((game_count, size))
+        for index, rng in enumerate(generators):
+            home[index] = draw_goals(rng, home_rates[index], size, dispersion)
+            away[index] = draw_goals(rng, away_rates[index], size, dispersion)
+            overtime[index] = rng.random(size)
+            side[index] = rng.random(size)
+        tied = home == away
+        decided_in_overtime = tied & (overtime < overtime_goal)
+        shootout = tied & ~decided_in_overtime
+        home_won = (home > away) | (decided_in_overtime & (side < overtime_home_share)) \
+            | (shootout & (side < SHOOTOUT_HOME_SHARE))
+        home += tied & home_won
+        away += tied & ~home_won
+
+        home_wins += home_won.sum(axis=1)
+        overtimes += tied.sum(axis=1)
+        shootouts += shootout.sum(axis=1)
+        home_goals += home.sum(axis=1)
+        away_goals += away.sum(axis=1)
+        codes = np.minimum(home, MAX_SCORE) * (MAX_SCORE + 1) + np.minimum(away, MAX_SCORE) + offsets
+        scores += np.bincount(codes.ravel(), minlength=len(scores))
+
+    # The most likely final score among the trials the favourite won
+    grid = np.arange(MAX_SCORE + 1)
+    home_won_scores = (grid[:, None] > grid[None, :]).ravel()
+    scores = scores.reshape(game_count, -1)
+    home_favoured = (home_wins / trials >= 0.5)[:, None]
+    likely = np.where(home_favoured == home_won_scores, scores, -1).argmax(axis=1)
+    return [
+        SimulationResult(
+            trials=trials,
+            home_win_pctg=float(home_wins[index] / trials),
+            away_win_pctg=float(1 - home_wins[index] / trials),
+            home_expected_goals=float(home_goals[index] / trials),
+            away_expected_goals=float(away_goals[index] / trials),
+            overtime_pctg=float(overtimes[index] / trials),
+            shootout_pctg=float(shootouts[index] / trials),
+            likely_score=(int(likely[index] // (MAX_SCORE + 1)), int(likely[index] % (MAX_SCORE + 1))),
+            home_rate=float(home_rates[index]),
+            away_rate=float(away_rates[index]),
+        )
+        for index in range(game_count)
+    ]
+
+def simulate_games(teams, teams_features=None, trials=TRIALS, dispersion=DISPERSION, seed=SEED, league_average=None,
+                   keys=None):
+    """
+    Simulate a slate of games from the teams' standings and recent form.
+
+    Args:
+        teams (list): The (home, away) standings entries of each game, with the derived rates.
+        teams_features (list, optional): The (home, away) feature store form of each game.
+        Either team, or a whole game, may be None.
+        trials (int, optional): The trials per game.
+        dispersion (float, optional): The negative binomial size; 0 for Poisson goals.
+        seed (int, optional): The random seed.
+        league_average (float, optional): The league's goals per team per game. Defaults to
+        the average over the teams on the slate; pass the whole league's so a game's rates
+        do not depend on the slate.
+        keys (list, optional): What identifies each game, e.g. its game ID, to seed its
+        draws from. Defaults to the game's rates.
+
+    Returns:
+        list: A SimulationResult per game, in the same order as teams.
+    """
+    if not teams:
+        return []
+    if league_average is None:
+        league_average = league_goals_per_game({id(team): team for pair in teams for team in pair}.values())
+    teams_features = teams_features or [None] * len(teams)
+    rates = [scoring_rates(home, away, league_average, features)
+             for (home, away), features in zip(teams, teams_features)]
+    return simulate_rates([home for home, _ in rates], [away for _, away in rates], trials, dispersion, seed, keys)
+
+def describe_simulation(result):
+    """
+    Describe a game's simulation in the form of the prediction's 'simulation results' field.
+
+    Args:
+        result (SimulationResult): The game's simulation.
+
+    Returns:
+        str: The home and away wins out of the trials, then the overtime and shootout shares.
+    """
+    home_wins = round(result.home_win_pctg * result.trials)
+    return (f"Home: {home_wins:,} wins | Away: {result.trials - home_wins:,} wins "
+            f"({result.trials:,} simulations total), {result.overtime_pctg:.1%} to overtime, "
+            f"{result.shootout_pctg:.1%} to a shootout")
+
+def describe_for_prompt(result):
+    """
+    Describe a game's simulation for the prediction prompt.
+
+    Args:
+        result (SimulationResult): The game's simulation.
+
+    Returns:
+        str: The win chances, expected goals, overtime and shootout shares and the
+        favourite's most likely winning score.
+    """
+    return (f"Monte Carlo simulation of {result.trials:,} games from the standings and game results: "
+            f"home team wins {result.home_win_pctg:.1%}, away team wins {result.away_win_pctg:.1%}\n"
+            f"Expected goals: home {result.home_expected_goals:.2f}, away {result.away_expected_goals:.2f}\n"
+            f"Went to overtime: {result.overtime_pctg:.1%}, to a shootout: {result.shootout_pctg:.1%}\n"
+            f"Most likely final score: home {result.likely_score[0]}, away {result.likely_score[1]}\n"
+            f"Simulation results: {describe_simulation(result)}")
+
+def prediction_records(games, results):
+    """
+    Turn simulations into prediction records, as the simulation predictor's answers.
+
+    Args:
+        games (list): The games, as formatted by nhl_api.format_games_today_response.
+        results (list): The SimulationResult of each game.
+
+    Returns:
+        list: A prediction record per game, in the prediction schema.
+    """
+    home_chances = np.round([result.home_win_pctg * 100 for result in results], 1)
+    away_chances = np.round(100 - home_chances, 1)
+    confidences = synthetic_chance.confidence_ratings(home_chances, away_chances)
+    return [
+        {
+            'venue': game.get('venue', ''),
+            'home team name': game['home_team'],
+            'home team percentage chance of winning': f"{home_chances[index]}%",
+            'predicted home team goals': result.likely_score[0],
+            'away team name': game['away_team'],
+            'away team percentage chance of winning': f"{away_chances[index]}%",
+            'predicted away team goals': result.likely_score[1],
+            'confidence rating': str(confidences[index]),
+            'simulation results': describe_simulation(result),
+            'explanation': (f"Monte Carlo simulation: expected goals {result.home_expected_goals:.2f} to "
+                            f"{result.away_expected_goals:.2f}."),
+            'predictor': 'simulation',
+        }
+        for index, (game, result) in enumerate(zip(games, results))
+    ]
@@ -0,0 +1,160 @@
+"""
+Module: standings.py
+
+This module provides the StandingsSnapshot, an index over the current NHL standings
+built once per run. Teams can be looked up by abbreviation, ID or name in constant time,
+and the per-game rates used in the prediction prompt are computed up front.
+"""
+
+import hashlib
+import json
+
+class TeamNotFoundError(KeyError):
+    """Raised when a team is not present in the standings."""
+
+# Derived per-game rates added to each team's standings entry: name -> (numerator, denominator)
+DERIVED_RATES = {
+    'goalsForPerGame': ('goalFor', 'gamesPlayed'),
+    'goalsAgainstPerGame': ('goalAgainst', 'gamesPlayed'),
+    'l10GoalsForPerGame': ('l10GoalsFor', 'l10GamesPlayed'),
+    'l10GoalsAgainstPerGame': ('l10GoalsAgainst', 'l10GamesPlayed'),
+    'homeWinPctg': ('homeWins', 'homeGamesPlayed'),
+    'homeGoalsForPerGame': ('homeGoalsFor', 'homeGamesPlayed'),
+    'homeGoalsAgainstPerGame': ('homeGoalsAgainst', 'homeGamesPlayed'),
+    'roadWinPctg': ('roadWins', 'roadGamesPlayed'),
+    'roadGoalsForPerGame': ('roadGoalsFor', 'roadGamesPlayed'),
+    'roadGoalsAgainstPerGame': ('roadGoalsAgainst', 'roadGamesPlayed'),
+}
+
+class StandingsSnapshot:
+    """
+    The current standings indexed by team abbreviation, ID and name.
+
+    Args:
+        current_standings (list): A list of dictionaries containing current team standings,
+        as returned by nhl_api.get_current_standings.
+    """
+
+    def __init__(self, current_standings):
+        self.fingerprint = standings_fingerprint(current_standings or [])
+        self.teams = [add_derived_fields(team) for team in current_standings or []]
+        self._index = {}
+        for team in self.teams:
+            for key in index_keys(team):
+                self._index.setdefault(key, team)
+
+    def __len__(self):
+        return len(self.teams)
+
+    def __contains__(self, team_key):
+        return normalize_key(team_key) in self._index
+
+    def team(self, team_key):
+        """
+        Look up a team's standings entry.
+
+        Args:
+            team_key (str or int): The team's abbreviation, ID, full name or common name.
+
+        Returns:
+            dict: The team's standings entry, including the derived rates.
+
+        Raises:
+            TeamNotFoundError: If the team is not in the standings.
+        """
+        try:
+            return self._index[normalize_key(team_key)]
+        except KeyError:
+            raise TeamNotFoundError(f"No standings found for team '{team_key}'") from None
+
+    def teams_for_game(self, game):
+        """
+        Look up the home and away teams of a game.
+
+        Args:
+            game (dict): A dictionary containing information about the game.
+
+        Returns:
+            tuple: The standings entries for the home and away teams.
+
+        Raises:
+            TeamNotFoundError: If either team is not in the standings.
+        """
+        return self.team(game['home_team']), self.team(game['away_team'])
+
+def as_snapshot(current_standings):
+    """
+    Wrap a standings list in a StandingsSnapshot, passing existing snapshots through.
+
+    Args:
+        current_standings (list or StandingsSnapshot): The current standings.
+
+    Returns:
+        StandingsSnapshot: The indexed standings.
+    """
+    if isinstance(current_standings, StandingsSnapshot):
+        return current_standings
+    return StandingsSnapshot(current_standings)
+
+def standings_fingerprint(current_standings):
+    """
+    Hash the standings so a change in any team's record can be detected.
+
+    Args:
+        current_standings (list): A list of dictionaries containing current team standings.
+
+    Returns:
+        str: A hex digest of the standings.
+    """
+    payload = json.dumps(current_standings, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def add_derived_fields(team):
+    """
+    Copy a team's standings entry and add the derived per-game rates.
+
+    Args:
+        team (dict): A team's standings entry.
+
+    Returns:
+        dict: The entry with the DERIVED_RATES fields added, rounded to three decimals.
+    """
+    derived = dict(team)
+    for field, (numerator, denominator) in DERIVED_RATES.items():
+        games = team.get(denominator) or 0
+        derived[field] = round(team.get(numerator, 0) / games, 3) if games else 0.0
+    return derived
+
+def index_keys(team):
+    """
+    List the normalized keys a team can be looked up by.
+
+    Args:
+        team (dict): A team's standings entry.
+
+    Returns:
+        list: The abbreviation, ID and names of the team.
+    """
+    keys = []
+    for field in ('teamAbbrev', 'teamName', 'teamCommonName'):
+        value = team.get(field)
+        if isinstance(value, dict):
+            value = value.get('default')
+        if value:
+            keys.append(normalize_key(value))
+    for field in ('teamId', 'id'):
+        if team.get(field) is not None:
+            keys.append(normalize_key(team[field]))
+    return keys
+
+def normalize_key(team_key):
+    """
+    Normalize a team abbreviation, ID or name for lookups.
+
+    Args:
+        team_key (str or int): The key to normalize.
+
+    Returns:
+        str: The key as a stripped, upper-case string.
+    """
+    return str(team_key).strip().upper()
@@ -0,0 +1,206 @@
+"""
+Module: mock_server.py
+
+This module provides MockServer, the base of the local stand-ins for the NHL API
+(NHL/mock_nhl_api.py) and the OpenAI Assistants API (openai_actions/mock_openai_api.py).
+
+A MockServer is a small JSON-over-HTTP server run on a background thread. It adds the
+behaviour of a remote API that benchmarks care about in front of the subclass's routes:
+a response latency (with jitter), a share of requests that fail with a 500 and a
+requests-per-second rate limit answered with 429 and a Retry-After header. Keep-alive
+connections are supported, so pooled clients behave as they would against the real API.
+
+Use it as a context manager:
+
+    with MockNHLServer(latency=0.05) as server:
+        nhl_api.NHL_API_BASE_URL = server.url + '/v1/'
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+class MockServer:
+    """
+    A local JSON API server with configurable latency, failures and rate limit.
+
+    Subclasses implement route(method, path, query, body).
+
+    Args:
+        latency (float, optional): Seconds added before every response.
+        jitter (float, optional): Fraction of the latency randomly added or removed.
+        failure_rate (float, optional): Share of requests answered with a 500.
+        rate_limit (float, optional): Requests allowed per second, with bursts of up to
+        one second's worth. 0 for no limit.
+        seed (int, optional): Seed for the jitter and failure draws.
+        host (str, optional): The interface to listen on.
+        port (int, optional): The port to listen on. 0 picks a free port.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, rate_limit=0.0, seed=0,
+                 host='127.0.0.1', port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.rate_limit = rate_limit
+        self.host = host
+        self.port = port
+        self.stats = {'requests': 0, 'failures': 0, 'rate_limited': 0, 'not_found': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = rate_limit
+        self._refilled = time.monotonic()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def url(self):
+        """str: The server's base URL, without a trailing slash."""
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """Start serving on a background thread."""
+        self._server = ThreadingHTTPServer((self.host, self.port), _handler_class(self))
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving and close the listening socket."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+
+    def serve_forever(self):
+        """Block until interrupted, starting the server first if it is not running."""
+        if self._server is None:
+            self.start()
+        try:
+            while self._thread.is_alive():
+                self._thread.join(0.5)
+        except KeyboardInterrupt:
+            self.stop()
+
+    def respond(self, method, target, body):
+        """
+        Answer a request, applying the latency, rate limit and failures before the route.
+
+        Args:
+            method (str): The HTTP method.
+            target (str): The request path with its query string.
+            body (dict or None): The decoded JSON request body.
+
+        Returns:
+            tuple: (status, payload, extra headers).
+        """
+        with self._lock:
+            self.stats['requests'] += 1
+            delay = self.latency * (1 + self._random.uniform(-self.jitter, self.jitter))
+            failed = self._random.random() < self.failure_rate
+            limited = not self._take_token()
+            if limited:
+                self.stats['rate_limited'] += 1
+            elif failed:
+                self.stats['failures'] += 1
+        if delay > 0:
+            time.sleep(delay)
+        if limited:
+            return 429, error_payload('Rate limit reached', 'rate_limit_exceeded'), {'Retry-After': '1'}
+        if failed:
+            return 500, error_payload('Mock server failure', 'server_error'), {}
+
+        parts = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        result = self.route(method, parts.path, query, body)
+        if result is None:
+            with self._lock:
+                self.stats['not_found'] += 1
+            return 404, error_payload(f'No route for {method} {parts.path}', 'not_found'), {}
+        status, payload = result
+        return status, payload, {}
+
+    def route(self, method, path, query, body):
+        """
+        Answer a request that got past the latency, rate limit and failures.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The request path.
+            query (dict): The query string parameters.
+            body (dict or None): The decoded JSON request body.
+
+        Returns:
+            tuple or None: (status, payload), or None if nothing is served at the path.
+        """
+        raise NotImplementedError
+
+    def _take_token(self):
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+def error_payload(message, code):
+    """The JSON error body returned for failed requests, in the OpenAI API's shape."""
+    return {'error': {'message': message, 'type': code, 'code': code}}
+
+def _handler_class(server):
+    class Handler(BaseHTTPRequestHandler):
+        """Passes every request to the MockServer."""
+
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes, which Nagle's algorithm would hold back
+        disable_nagle_algorithm = True
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            """Handle a GET request."""
+            self._handle()
+
+        def do_POST(self):  # pylint: disable=invalid-name
+            """Handle a POST request."""
+            self._handle()
+
+        def do_DELETE(self):  # pylint: disable=invalid-name
+            """Handle a DELETE request."""
+            self._handle()
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            pass
+
+        def _handle(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            try:
+                body = json.loads(raw) if raw else None
+            except ValueError:
+                body = None
+            status, payload, headers = server.respond(self.command, self.path, body)
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
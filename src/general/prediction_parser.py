@@ -0,0 +1,236 @@
+"""
+This module turns the assistant's prediction text into validated prediction records.
+
+Assistant output is often not clean JSON: it can be wrapped in code fences, surrounded by
+prose or written with Python literals. The JSON payload is pulled out of the text and parsed
+with the json module (falling back to ast.literal_eval only for Python-style literals), and
+each record is checked against PREDICTION_SCHEMA. Fields are normalized on the way: "30%"
+becomes 30.0, "2" goals becomes 2, "High" confidence becomes "high".
+
+Records that cannot be parsed or fail validation are written to a quarantine file with the
+reason, instead of aborting the rest of the batch.
+"""
+
+import ast
+import json
+import os
+import re
+import threading
+import time
+
+QUARANTINE_PATH = 'data/predictions/quarantine.jsonl'
+CONFIDENCE_RATINGS = ('high', 'medium', 'low')
+# How far the two win percentages may add up away from 100
+PERCENTAGE_SUM_TOLERANCE = 5
+
+_CODE_FENCE = re.compile(r'```[a-zA-Z]*')
+_DECODER = json.JSONDecoder()
+_quarantine_lock = threading.Lock()
+
+class PredictionParseError(ValueError):
+    """Raised when prediction text holds no parseable JSON payload."""
+
+class PredictionValidationError(ValueError):
+    """Raised when a prediction record does not match PREDICTION_SCHEMA."""
+
+def to_text(value):
+    """Normalize a free-text field to a stripped string."""
+    if not isinstance(value, (str, int, float)):
+        raise ValueError(f"expected text, got {type(value).__name__}")
+    return str(value).strip()
+
+def to_percentage(value):
+    """
+    Normalize a win percentage to a number between 0 and 100.
+
+    Accepts numbers and strings such as "30%", "30" or "0.3". Values of 1 or less
+    without a percent sign are read as fractions.
+    """
+    text = str(value).strip()
+    has_sign = text.endswith('%')
+    number = float(text.rstrip('%').strip())
+    if not has_sign and 0 < number <= 1:
+        number *= 100
+    if not 0 <= number <= 100:
+        raise ValueError(f"percentage {value!r} is outside 0-100")
+    return round(number, 2)
+
+def to_goals(value):
+    """Normalize a predicted goal count to a non-negative whole number."""
+    number = float(str(value).strip())
+    if number < 0 or number != int(number):
+        raise ValueError(f"goal count {value!r} is not a whole number")
+    return int(number)
+
+def to_confidence(value):
+    """Normalize a confidence rating to 'high', 'medium' or 'low'."""
+    rating = str(value).strip().lower()
+    if rating not in CONFIDENCE_RATINGS:
+        raise ValueError(f"confidence rating {value!r} is not one of {', '.join(CONFIDENCE_RATINGS)}")
+    return rating
+
+# Field name -> (normalizer, required). Fields not listed are kept as they are.
+PREDICTION_SCHEMA = {
+    'venue': (to_text, False),
+    'home team name': (to_text, True),
+    'home team percentage chance of winning': (to_percentage, True),
+    'predicted home team goals': (to_goals, True),
+    'away team name': (to_text, True),
+    'away team percentage chance of winning': (to_percentage, True),
+    'predicted away team goals': (to_goals, True),
+    'confidence rating': (to_confidence, True),
+    'key factors': (to_text, False),
+    'confidence reason': (to_text, False),
+    'opposition': (to_text, False),
+    'simulation results': (to_text, False),
+    'other factors': (to_text, False),
+    'explanation': (to_text, False),
+}
+
+def extract_json_payload(text):
+    """
+    Pull the JSON array or object out of assistant text.
+
+    Args:
+        text (str): The assistant's answer.
+
+    Returns:
+        list or dict: The decoded payload.
+
+    Raises:
+        PredictionParseError: If no JSON array or object can be decoded from the text.
+    """
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    cleaned = _CODE_FENCE.sub('', text)
+    for match in re.finditer(r'[\[{]', cleaned):
+        try:
+            payload, _ = _DECODER.raw_decode(cleaned, match.start())
+            return payload
+        except ValueError:
+            pass
+        # Python-style literals (single quotes, True/False/None) from older answers
+        closing = ']' if match.group() == '[' else '}'
+        end = cleaned.rfind(closing)
+        if end > match.start():
+            try:
+                payload = ast.literal_eval(cleaned[match.start():end + 1])
+            except (ValueError, SyntaxError, MemoryError, RecursionError):
+                continue
+            if isinstance(payload, (list, dict)):
+                return payload
+    raise PredictionParseError('no JSON array or object found in prediction text')
+
+def validate_prediction(record):
+    """
+    Check a prediction record against PREDICTION_SCHEMA and normalize its fields.
+
+    Args:
+        record (dict): A decoded prediction object.
+
+    Returns:
+        dict: A copy of the record with every schema field normalized.
+
+    Raises:
+        PredictionValidationError: Listing every problem found with the record.
+    """
+    if not isinstance(record, dict):
+        raise PredictionValidationError(f"expected an object, got {type(record).__name__}")
+
+    normalized = dict(record)
+    problems = []
+    for field, (normalize, required) in PREDICTION_SCHEMA.items():
+        if record.get(field) in (None, ''):
+            if required:
+                problems.append(f"missing '{field}'")
+            continue
+        try:
+            normalized[field] = normalize(record[field])
+        except (TypeError, ValueError) as e:
+            problems.append(f"'{field}': {e}")
+
+    if not problems:
+        total = (normalized['home team percentage chance of winning'] +
+                 normalized['away team percentage chance of winning'])
+        if abs(total - 100) > PERCENTAGE_SUM_TOLERANCE:
+            problems.append(f"win percentages add up to {total}, not 100")
+
+    if problems:
+        raise PredictionValidationError('; '.join(problems))
+    return normalized
+
+def parse_prediction_text(text):
+    """
+    Parse and validate every prediction record in a piece of assistant text.
+
+    Args:
+        text (str, dict or list): The assistant's answer, or an already decoded payload.
+
+    Returns:
+        tuple: (records, rejected) where records is the list of valid, normalized
+        prediction records and rejected is a list of (record, reason) pairs.
+
+    Raises:
+        PredictionParseError: If the text holds no parseable payload at all.
+    """
+    payload = extract_json_payload(text) if isinstance(text, str) else text
+    if isinstance(payload, dict):
+        payload = [payload]
+    if not isinstance(payload, list):
+        raise PredictionParseError(f"expected a JSON array or object, got {type(payload).__name__}")
+
+    records = []
+    rejected = []
+    for item in payload:
+        try:
+            records.append(validate_prediction(item))
+        except PredictionValidationError as e:
+            rejected.append((item, str(e)))
+    return records, rejected
+
+def parse_predictions(texts, quarantine_path=QUARANTINE_PATH):
+    """
+    Parse many predictions in bulk, quarantining whatever cannot be used.
+
+    Args:
+        texts (iterable): Assistant answers or decoded payloads.
+        quarantine_path (str, optional): Where rejected input is recorded. None skips recording.
+
+    Returns:
+        list: Every valid, normalized prediction record, in input order.
+    """
+    records = []
+    for text in texts:
+        try:
+            parsed, rejected = parse_prediction_text(text)
+        except PredictionParseError as e:
+            quarantine(text, str(e), quarantine_path)
+            continue
+        records.extend(parsed)
+        for item, reason in rejected:
+            quarantine(item, reason, quarantine_path)
+    return records
+
+def quarantine(raw, reason, quarantine_path=QUARANTINE_PATH):
+    """
+    Record input that could not be turned into a prediction.
+
+    Args:
+        raw (str, dict or list): The rejected text or record.
+        reason (str): Why it was rejected.
+        quarantine_path (str, optional): The JSON Lines file to append to. None only prints.
+    """
+    print(f"Quarantined prediction: {reason}")
+    if quarantine_path is None:
+        return
+
+    entry = {'quarantined_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'reason': reason, 'raw': raw}
+    with _quarantine_lock:
+        directory = os.path.dirname(quarantine_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(quarantine_path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
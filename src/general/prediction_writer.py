@@ -0,0 +1,142 @@
+"""
+This module provides the PredictionWriter, which stores predictions the moment they arrive.
+
+Every prediction is appended to a per-day JSON Lines journal and the JSON snapshot read by
+src/js/prediction_upload.js is republished right away, so a crash part way through a slate
+keeps every prediction made before it. Records are deduplicated on a stable key (game ID
+plus date) using an in-memory index that is rebuilt from the journal on startup, so a rerun
+on the same day replaces earlier predictions for a game instead of duplicating them.
+
+The snapshot is written to a temporary file and swapped into place, so the page never
+reads a half-written file.
+"""
+
+import datetime
+import json
+import os
+import threading
+from general import prediction_parser
+from general import telemetry
+
+JOURNAL_DIRECTORY = 'data/predictions'
+SNAPSHOT_PATH = 'src/predictions.json'
+
+def prediction_key(record):
+    """
+    Build the deduplication key of a prediction record.
+
+    Args:
+        record (dict): A prediction record with 'game id' and 'game date' fields where known.
+
+    Returns:
+        str: 'game date:game id', falling back to the home and away team names
+        when the game ID is unknown.
+    """
+    game_id = record.get('game id')
+    if game_id is None:
+        game_id = f"{record.get('home team name')}-{record.get('away team name')}"
+    return f"{record.get('game date')}:{game_id}"
+
+class PredictionWriter:
+    """
+    Appends predictions to a per-day journal and republishes the snapshot after each one.
+
+    Args:
+        journal_directory (str, optional): The directory holding the daily journal files.
+        snapshot_path (str, optional): The JSON file read by the predictions page.
+        date (str, optional): The prediction date as YYYY-MM-DD. Defaults to today.
+    """
+
+    def __init__(self, journal_directory=JOURNAL_DIRECTORY, snapshot_path=SNAPSHOT_PATH, date=None):
+        self.date = date or datetime.date.today().strftime("%Y-%m-%d")
+        self.journal_path = os.path.join(journal_directory, f'{self.date}.jsonl')
+        self.snapshot_path = snapshot_path
+        self._lock = threading.Lock()
+        self._journal_needs_newline = False
+        self._records = self._load_journal()
+
+    @property
+    def records(self):
+        """list: The current prediction records, one per game, in arrival order."""
+        with self._lock:
+            return list(self._records.values())
+
+    def write(self, game, prediction):
+        """
+        Store a game's prediction and republish the snapshot.
+
+        The prediction is parsed and validated by prediction_parser. Text that cannot
+        be parsed, and records that fail validation, are quarantined and skipped.
+
+        Args:
+            game (dict or None): The game the prediction is for, used for its game ID.
+            prediction (str, dict or list): The assistant's prediction.
+
+        Returns:
+            list: The records that were stored.
+        """
+        with telemetry.span('predictions.write', None if game is None else telemetry.game_label(game)):
+            try:
+                records, rejected = prediction_parser.parse_prediction_text(prediction)
+            except prediction_parser.PredictionParseError as e:
+                prediction_parser.quarantine(prediction, str(e))
+                return []
+            for item, reason in rejected:
+                prediction_parser.quarantine(item, reason)
+
+            stored = []
+            with self._lock:
+                for record in records:
+                    if game is not None and game.get('game_id') is not None:
+                        record['game id'] = game['game_id']
+                    record.setdefault('game date', self.date)
+                    key = prediction_key(record)
+                    if self._records.get(key) == record:
+                        continue
+                    self._records[key] = record
+                    stored.append(record)
+
+                if stored:
+                    self._append_journal(stored)
+                    self._publish_snapshot()
+            return stored
+
+    def publish(self):
+        """Write the snapshot from the records stored so far."""
+        with self._lock:
+            self._publish_snapshot()
+
+    def _load_journal(self):
+        records = {}
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as journal:
+                for line in journal:
+                    # A line cut short by a crash is skipped, and the next append starts a new line
+                    self._journal_needs_newline = not line.endswith('\n')
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    records[prediction_key(record)] = record
+        except FileNotFoundError:
+            pass
+        return records
+
+    def _append_journal(self, records):
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.journal_path, 'a', encoding='utf-8') as journal:
+            if self._journal_needs_newline:
+                journal.write('\n')
+                self._journal_needs_newline = False
+            for record in records:
+                journal.write(json.dumps(record, ensure_ascii=False) + '\n')
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def _publish_snapshot(self):
+        temp_path = f'{self.snapshot_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(list(self._records.values()), file, ensure_ascii=False, indent=4)
+        os.replace(temp_path, self.snapshot_path)
@@ -0,0 +1,246 @@
+"""
+Module: telemetry.py
+
+This module provides lightweight timing and counting for a prediction run.
+
+Code wraps the work it wants measured in a span (a named, timed block) and bumps counters
+for events such as retries and status polls. Spans and counters can be attributed to a game,
+so the run report shows both how the night split between stages (NHL fetches, prompt
+rendering, run queueing, model time, file writes) and where each game's time went.
+
+Every call goes to one process-wide Telemetry (get_telemetry), which keeps running
+aggregates only, so it is cheap enough to leave on. Set NHL_TELEMETRY=0 to turn it off.
+
+    with telemetry.span('nhl.standings'):
+        ...
+    telemetry.count('run.polls', result.polls, game=game_id)
+    telemetry.get_telemetry().write_report()
+"""
+
+import datetime
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+ENABLED = os.getenv('NHL_TELEMETRY', '1') != '0'
+REPORT_DIRECTORY = os.getenv('NHL_TELEMETRY_DIRECTORY', 'data/telemetry')
+
+class Telemetry:
+    """
+    Aggregates span durations and counters, overall and per game.
+
+    Args:
+        enabled (bool, optional): Whether anything is recorded. Defaults to ENABLED.
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = ENABLED if enabled is None else enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded and restart the run clock."""
+        with self._lock:
+            self.started_at = datetime.datetime.now().isoformat(timespec='seconds')
+            self._started = time.perf_counter()
+            self._stages = {}
+            self._counters = {}
+            self._games = {}
+
+    @contextmanager
+    def span(self, name, game=None):
+        """
+        Time a block of code as one occurrence of a stage.
+
+        A block that raises is still timed and is counted as an error of the stage.
+
+        Args:
+            name (str): The stage, e.g. 'nhl.standings'.
+            game (str or list, optional): The game the work is for, or the games of a batch.
+        """
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(name, time.perf_counter() - started, game, error)
+
+    def record(self, name, seconds, game=None, error=False):
+        """
+        Record an occurrence of a stage timed elsewhere.
+
+        Args:
+            name (str): The stage.
+            seconds (float): How long it took.
+            game (str or list, optional): The game the work was for, or the games of a
+            batch, each of which is charged the full time.
+            error (bool, optional): Whether it failed.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = {'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0}
+            stage['count'] += 1
+            stage['errors'] += int(error)
+            stage['total'] += seconds
+            stage['max'] = max(stage['max'], seconds)
+            for label in as_games(game):
+                stages = self._game(label)['stages']
+                stages[name] = stages.get(name, 0.0) + seconds
+
+    def count(self, name, value=1, game=None):
+        """
+        Add to a counter.
+
+        Args:
+            name (str): The counter, e.g. 'nhl.retries'.
+            value (int, optional): The amount to add.
+            game (str or list, optional): The game the events were for, or the games of a batch.
+        """
+        if not self.enabled or not value:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+            for label in as_games(game):
+                counters = self._game(label)['counters']
+                counters[name] = counters.get(name, 0) + value
+
+    def report(self):
+        """
+        Summarize the run so far.
+
+        Returns:
+            dict: The run's start time and duration, each stage's count, errors and total,
+            mean and max seconds, the counters, and each game's seconds per stage and counters.
+        """
+        with self._lock:
+            stages = {
+                name: {
+                    'count': stage['count'],
+                    'errors': stage['errors'],
+                    'total_seconds': round(stage['total'], 4),
+                    'mean_seconds': round(stage['total'] / stage['count'], 4),
+                    'max_seconds': round(stage['max'], 4),
+                }
+                for name, stage in sorted(self._stages.items())
+            }
+            games = {
+                game: {
+                    'stages': {name: round(seconds, 4) for name, seconds in sorted(entry['stages'].items())},
+                    'counters': dict(sorted(entry['counters'].items())),
+                }
+                for game, entry in self._games.items()
+            }
+            return {
+                'started_at': self.started_at,
+                'duration_seconds': round(time.perf_counter() - self._started, 4),
+                'stages': stages,
+                'counters': dict(sorted(self._counters.items())),
+                'games': games,
+            }
+
+    def write_report(self, path=None):
+        """
+        Write the run report as JSON.
+
+        Args:
+            path (str, optional): The file to write. Defaults to a file named after the
+            run's start time in REPORT_DIRECTORY.
+
+        Returns:
+            str: The path written.
+        """
+        path = path or os.path.join(REPORT_DIRECTORY, f"run-{self.started_at.replace(':', '')}.json")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.report(), file, indent=2)
+        os.replace(temp_path, path)
+        return path
+
+    def _game(self, game):
+        entry = self._games.get(str(game))
+        if entry is None:
+            entry = self._games[str(game)] = {'stages': {}, 'counters': {}}
+        return entry
+
+_default_telemetry = None
+_default_telemetry_lock = threading.Lock()
+
+def get_telemetry():
+    """
+    Return the process-wide Telemetry, creating it on first use.
+
+    Returns:
+        Telemetry: The shared instance.
+    """
+    global _default_telemetry
+    with _default_telemetry_lock:
+        if _default_telemetry is None:
+            _default_telemetry = Telemetry()
+        return _default_telemetry
+
+def span(name, game=None):
+    """Time a block of code on the shared Telemetry, see Telemetry.span."""
+    return get_telemetry().span(name, game)
+
+def record(name, seconds, game=None, error=False):
+    """Record a stage timed elsewhere on the shared Telemetry, see Telemetry.record."""
+    get_telemetry().record(name, seconds, game, error)
+
+def count(name, value=1, game=None):
+    """Add to a counter on the shared Telemetry, see Telemetry.count."""
+    get_telemetry().count(name, value, game)
+
+def timed(name):
+    """
+    Decorate a function so every call is timed as a span.
+
+    Args:
+        name (str): The stage the calls are recorded under.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def as_games(game):
+    """The game labels a span or counter is attributed to: none, one, or a batch's list."""
+    if game is None:
+        return ()
+    if isinstance(game, (list, tuple)):
+        return game
+    return (game,)
+
+def game_label(game):
+    """
+    The key a game's spans and counters are reported under.
+
+    Args:
+        game (dict): A dictionary containing information about the game.
+
+    Returns:
+        str: The game ID, or 'AWAY@HOME' when the game has none.
+    """
+    if game.get('game_id') is not None:
+        return str(game['game_id'])
+    return f"{game.get('away_team')}@{game.get('home_team')}"
@@ -0,0 +1,90 @@
+"""
+This module provides loading and rendering of the text templates used to build prompts.
+
+Templates are read from disk once and cached. Each template is parsed when it is loaded,
+so its placeholders are known up front: a template can be checked against the fields a
+caller is able to supply, and rendering fails fast with a TemplateError naming every
+missing value instead of a bare KeyError on the first one.
+"""
+
+import functools
+import string
+
+class TemplateError(ValueError):
+    """Raised when a template and the values supplied for it do not match."""
+
+class PromptTemplate:
+    """
+    A str.format template whose placeholders have been parsed ahead of rendering.
+
+    Args:
+        text (str): The template text.
+        name (str, optional): A name for the template used in error messages.
+    """
+
+    def __init__(self, text, name='template'):
+        self.text = text
+        self.name = name
+        self.fields = frozenset(
+            field_name for _, field_name, _, _ in string.Formatter().parse(text)
+            if field_name
+        )
+
+    def validate(self, available_fields):
+        """
+        Check that every placeholder in the template can be supplied.
+
+        Args:
+            available_fields (iterable): The names of the fields the caller can supply.
+
+        Raises:
+            TemplateError: If the template has placeholders outside available_fields.
+        """
+        missing = self.fields - set(available_fields)
+        if missing:
+            raise TemplateError(f"{self.name} has placeholders with no source: {', '.join(sorted(missing))}")
+
+    def render(self, values):
+        """
+        Fill in the template.
+
+        Args:
+            values (dict): The value for each placeholder.
+
+        Returns:
+            str: The rendered text.
+
+        Raises:
+            TemplateError: If a placeholder has no value.
+        """
+        missing = self.fields - values.keys()
+        if missing:
+            raise TemplateError(f"{self.name} is missing values for: {', '.join(sorted(missing))}")
+        return self.text.format_map(values)
+
+@functools.lru_cache(maxsize=None)
+def read_text(file_path):
+    """
+    Read a text file once and cache its contents.
+
+    Args:
+        file_path (str): The path of the file to read.
+
+    Returns:
+        str: The file contents.
+    """
+    with open(file_path, 'r', encoding="utf-8") as file:
+        return file.read()
+
+@functools.lru_cache(maxsize=None)
+def load_template(file_path):
+    """
+    Load and parse a template file once and cache the result.
+
+    Args:
+        file_path (str): The path of the template file.
+
+    Returns:
+        PromptTemplate: The parsed template.
+    """
+    return PromptTemplate(read_text(file_path), name=file_path)
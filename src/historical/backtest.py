@@ -0,0 +1,327 @@
+"""
+Module: backtest.py
+
+This module replays historical seasons through a predictor and scores its predictions.
+
+Seasons are rebuilt game by game with historical.season_replay, so every prediction is
+made from the standings as they stood before the game. Games are grouped into game days
+(by date where the game results have dates, otherwise into runs of games in which no team
+plays twice) and each game day is sent to the predictor as one slate, the way main.py
+sends today's games. Game days are predicted in parallel.
+
+A predictor is any callable taking (games, current_standings, game_date, on_prediction)
+and calling on_prediction(game, prediction) for each game it predicts, with the
+prediction in the assistant's answer format. local_predictor, simulation_predictor,
+assistant_predictor and CachedPredictor build the usual ones.
+
+The report covers accuracy, Brier score, log loss and a calibration table of the home
+team's predicted chance of winning, along with the games per second.
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from general import prediction_parser
+from historical import season_replay
+
+CACHE_PATH = 'data/cache/backtest_predictions.jsonl'
+CALIBRATION_BINS = 10
+MAX_WORKERS = 8
+
+def game_days(games):
+    """
+    Group replayed games into the slates predicted together.
+
+    Args:
+        games (iterable): Games as yielded by season_replay.replay_season, in order.
+
+    Yields:
+        list: The games of one game day.
+    """
+    slate = []
+    teams = set()
+    for game in games:
+        playing = {game['home_team'], game['away_team']}
+        new_day = (game['date'] != slate[0]['date']) if slate and game['date'] else bool(teams & playing)
+        if slate and new_day:
+            yield slate
+            slate = []
+            teams = set()
+        slate.append(game)
+        teams |= playing
+    if slate:
+        yield slate
+
+def slate_inputs(slate, day_number):
+    """
+    Build the predictor's inputs for a game day.
+
+    Args:
+        slate (list): The game day's replayed games.
+        day_number (int): The game day's position in its season, from 1.
+
+    Returns:
+        tuple: (games, current_standings, game_date) in the shapes main.py passes along.
+    """
+    games = []
+    current_standings = {}
+    for game in slate:
+        games.append({
+            'game_id': f"{game['season']}-{day_number}-{game['home_team']}-{game['away_team']}",
+            'venue': f"{game['home_team']} home arena",
+            'home_team': game['home_team'],
+            'away_team': game['away_team'],
+        })
+        current_standings[game['home_team']] = game['home_standing']
+        current_standings[game['away_team']] = game['away_standing']
+    game_date = slate[0]['date'] or f"day {day_number} of the {slate[0]['season']} season"
+    return games, list(current_standings.values()), game_date
+
+def home_win_probability(prediction):
+    """
+    Read the home team's chance of winning from a prediction.
+
+    Args:
+        prediction (str, dict or list): A prediction in the assistant's answer format.
+
+    Returns:
+        float: The probability between 0 and 1, or None if the prediction cannot be read.
+    """
+    try:
+        records, _ = prediction_parser.parse_prediction_text(prediction)
+    except prediction_parser.PredictionParseError:
+        return None
+    if not records:
+        return None
+    home = records[0]['home team percentage chance of winning']
+    away = records[0]['away team percentage chance of winning']
+    return home / (home + away) if home + away else None
+
+def run_backtest(directory, seasons, predictor, max_workers=MAX_WORKERS):
+    """
+    Replay seasons through a predictor.
+
+    Args:
+        directory (str): The game results directory, e.g. data/raw.
+        seasons (list): The seasons to replay.
+        predictor (callable): The predictor, as described in the module docstring.
+        max_workers (int, optional): Game days predicted at once.
+
+    Returns:
+        dict: The results, with the report from score_results under 'report' and each
+        game's 'probability' and 'home_won' under 'games'.
+    """
+    slates = []
+    for season in seasons:
+        for day_number, slate in enumerate(game_days(season_replay.replay_season(directory, season)), 1):
+            slates.append((slate, slate_inputs(slate, day_number)))
+
+    def predict(item):
+        slate, (games, current_standings, game_date) = item
+        answers = {}
+        predictor(games, current_standings, game_date,
+                  lambda game, prediction: answers.setdefault(game['game_id'], prediction))
+        results = []
+        for replayed, game in zip(slate, games):
+            prediction = answers.get(game['game_id'])
+            results.append({
+                'game_id': game['game_id'],
+                'probability': home_win_probability(prediction) if prediction is not None else None,
+                'home_won': replayed['home_goals'] > replayed['away_goals'],
+            })
+        return results
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        results = [result for slate_results in executor.map(predict, slates) for result in slate_results]
+    elapsed = time.perf_counter() - started
+
+    report = score_results(results)
+    report['game_days'] = len(slates)
+    report['seconds'] = round(elapsed, 3)
+    report['games_per_second'] = round(len(results) / elapsed, 1) if elapsed else None
+    return {'report': report, 'games': results}
+
+def score_results(results):
+    """
+    Score predicted home-win probabilities against the outcomes.
+
+    Args:
+        results (list): Dictionaries with 'probability' (None if not predicted) and 'home_won'.
+
+    Returns:
+        dict: Games, predicted games, accuracy, Brier score, log loss, the home-win base rate
+        and the calibration table: per bin of predicted probability, the game count, mean
+        prediction and observed home-win rate.
+    """
+    scored = [(result['probability'], 1.0 if result['home_won'] else 0.0)
+              for result in results if result['probability'] is not None]
+    report = {'games': len(results), 'predicted': len(scored)}
+    if not scored:
+        return report
+
+    count = len(scored)
+    report['accuracy'] = round(sum((probability > 0.5) == (outcome == 1) for probability, outcome in scored) / count, 4)
+    report['brier_score'] = round(sum((probability - outcome) ** 2 for probability, outcome in scored) / count, 4)
+    report['log_loss'] = round(-sum(
+        math.log(min(max(probability if outcome else 1 - probability, 1e-9), 1.0)) for probability, outcome in scored
+    ) / count, 4)
+    report['home_win_rate'] = round(sum(outcome for _, outcome in scored) / count, 4)
+
+    bins = [[] for _ in range(CALIBRATION_BINS)]
+    for probability, outcome in scored:
+        bins[min(int(probability * CALIBRATION_BINS), CALIBRATION_BINS - 1)].append((probability, outcome))
+    report['calibration'] = [
+        {
+            'bin': f"{index / CALIBRATION_BINS:.1f}-{(index + 1) / CALIBRATION_BINS:.1f}",
+            'games': len(entries),
+            'mean_prediction': round(sum(probability for probability, _ in entries) / len(entries), 4),
+            'observed_rate': round(sum(outcome for _, outcome in entries) / len(entries), 4),
+        }
+        for index, entries in enumerate(bins) if entries
+    ]
+    return report
+
+def local_predictor(model):
+    """
+    Build a predictor for the local baseline model.
+
+    Args:
+        model (local_predictor.BaselineModel): The model to predict with.
+
+    Returns:
+        callable: The predictor.
+    """
+    from NHL import local_predictor as local  # pylint: disable=import-outside-toplevel
+
+    def predict(games, current_standings, game_date, on_prediction):
+        # The simulation is scored on its own, see simulation_predictor
+        local.generate_game_predictions(games, current_standings, on_prediction, model=model, trials=0)
+    return predict
+
+def simulation_predictor(trials=None, dispersion=None):
+    """
+    Build a predictor that answers with the Monte Carlo simulation's win chances.
+
+    Args:
+        trials (int, optional): The trials per game. Defaults to simulation.TRIALS.
+        dispersion (float, optional): The negative binomial size. Defaults to simulation.DISPERSION.
+
+    Returns:
+        callable: The predictor.
+    """
+    from NHL import simulation, standings  # pylint: disable=import-outside-toplevel
+    trials = simulation.TRIALS if trials is None else trials
+    dispersion = simulation.DISPERSION if dispersion is None else dispersion
+
+    def predict(games, current_standings, game_date, on_prediction):
+        snapshot = standings.as_snapshot(current_standings)
+        results = simulation.simulate_games([snapshot.teams_for_game(game) for game in games],
+                                            trials=trials, dispersion=dispersion,
+                                            keys=[game['game_id'] for game in games])
+        for game, record in zip(games, simulation.prediction_records(games, results)):
+            on_prediction(game, json.dumps([record]))
+    return predict
+
+def assistant_predictor(max_concurrent_runs=None, batch_size=None):
+    """
+    Build a predictor that goes through the assistant, as main.py does.
+
+    The shared prediction cache is left alone: it only keeps predictions made with the
+    current standings, which every game day of a backtest would replace. Wrap the
+    predictor in a CachedPredictor to reuse answers across backtests.
+
+    Args:
+        max_concurrent_runs (int, optional): Runs in flight per game day.
+        batch_size (int, optional): Games per run.
+
+    Returns:
+        callable: The predictor.
+    """
+    from NHL import game_processing, prediction_cache  # pylint: disable=import-outside-toplevel
+    options = {}
+    if max_concurrent_runs is not None:
+        options['max_concurrent_runs'] = max_concurrent_runs
+    if batch_size is not None:
+        options['batch_size'] = batch_size
+
+    def predict(games, current_standings, game_date, on_prediction):
+        game_processing.generate_game_predictions(
+            games, current_standings, on_prediction=on_prediction, game_date=game_date,
+            cache=prediction_cache.PredictionCache(ttl=0), **options
+        )
+    return predict
+
+class CachedPredictor:
+    """
+    Serves repeated backtest predictions from an append-only JSON Lines file.
+
+    Predictions are keyed by the predictor's name and the game's teams, date and both
+    teams' standings, so rerunning a backtest reuses every prediction already made.
+
+    Args:
+        predictor (callable): The predictor to call on a miss.
+        name (str): Identifies the predictor in the cache keys.
+        file_path (str, optional): The cache file.
+    """
+
+    def __init__(self, predictor, name, file_path=CACHE_PATH):
+        self.predictor = predictor
+        self.name = name
+        self.file_path = file_path
+        self.stats = {'hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+        self._entries = {}
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._entries[entry['key']] = entry['prediction']
+        except FileNotFoundError:
+            pass
+
+    def key(self, game, current_standings, game_date):
+        """Fingerprint a game's prediction request."""
+        teams = {game['home_team'], game['away_team']}
+        entries = sorted(
+            (entry for entry in current_standings if entry.get('teamAbbrev', {}).get('default') in teams),
+            key=lambda entry: entry['teamAbbrev']['default']
+        )
+        payload = json.dumps([self.name, game['home_team'], game['away_team'], game_date, entries],
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def __call__(self, games, current_standings, game_date, on_prediction):
+        keys = {game['game_id']: self.key(game, current_standings, game_date) for game in games}
+        missing = []
+        with self._lock:
+            for game in games:
+                prediction = self._entries.get(keys[game['game_id']])
+                if prediction is None:
+                    missing.append(game)
+                else:
+                    self.stats['hits'] += 1
+                    on_prediction(game, prediction)
+            self.stats['misses'] += len(missing)
+        if not missing:
+            return
+
+        def store(game, prediction):
+            key = keys[game['game_id']]
+            with self._lock:
+                self._entries[key] = prediction
+                directory = os.path.dirname(self.file_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.file_path, 'a', encoding='utf-8') as file:
+                    file.write(json.dumps({'key': key, 'prediction': prediction}, ensure_ascii=False) + '\n')
+            on_prediction(game, prediction)
+
+        self.predictor(missing, current_standings, game_date, store)
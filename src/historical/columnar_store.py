@@ -0,0 +1,245 @@
+"""
+Module: columnar_store.py
+
+This module provides a columnar store for the historical game data under data/.
+
+The per-team, per-season CSV files are consolidated into one NumPy .npy file per column,
+with rows grouped by season and team. An index.json file records each column's type and
+the row range of every (season, team) partition. Columns are loaded memory-mapped, so a
+full multi-season scan or a single team-season slice is read straight from disk without
+parsing any text.
+
+Power-play conversion columns ('2/8') are also split into numeric goal and opportunity
+columns, e.g. powerPlayGoals and powerPlayOpportunities.
+"""
+
+import csv
+import json
+import os
+import re
+import numpy as np
+
+STORE_DIRECTORY = 'data/columnar'
+INDEX_FILE = 'index.json'
+SOURCE_FILE_PATTERN = re.compile(r'^(?P<season>\d{8})_(?P<team>.+?)_game_results(?:_Processed)?\.csv$')
+# Columns added to every row to identify its partition, always stored as strings
+PARTITION_COLUMNS = ('season', 'team')
+CONVERSION_COLUMNS = {
+    'powerPlayConversion': ('powerPlayGoals', 'powerPlayOpportunities'),
+    'away_powerPlayConversion': ('away_powerPlayGoals', 'away_powerPlayOpportunities'),
+}
+
+def parse_source_name(file_name):
+    """
+    Read the season and team from a game results file name.
+
+    Args:
+        file_name (str): e.g. '20182019_Boston_Bruins_game_results_Processed.csv'.
+
+    Returns:
+        tuple: (season, team) such as ('20182019', 'Boston Bruins'), or None if the name
+        does not match.
+    """
+    match = SOURCE_FILE_PATTERN.match(file_name)
+    if not match:
+        return None
+    return match.group('season'), match.group('team').replace('_', ' ')
+
+def split_conversion(value):
+    """
+    Split a power-play conversion such as '2/8' into goals and opportunities.
+
+    A bare '0', which the cleansing step writes for games without power-play stats,
+    is read as '0/0'.
+
+    Args:
+        value (str): The conversion string.
+
+    Returns:
+        tuple: (goals, opportunities) as floats, NaN for both if the value is malformed.
+    """
+    parts = str(value).split('/')
+    if parts in (['0'], ['0.0']):
+        return 0.0, 0.0
+    if len(parts) != 2:
+        return np.nan, np.nan
+    try:
+        return float(parts[0]), float(parts[1])
+    except ValueError:
+        return np.nan, np.nan
+
+def build_store(csv_directory, store_directory):
+    """
+    Consolidate a directory of game results CSV files into a columnar store.
+
+    Args:
+        csv_directory (str): The directory holding the per-team, per-season CSV files.
+        store_directory (str): The directory the .npy columns and index are written to.
+
+    Returns:
+        dict: The store index that was written.
+    """
+    sources = []
+    for file_name in sorted(os.listdir(csv_directory)):
+        parsed = parse_source_name(file_name)
+        if parsed:
+            sources.append((parsed[0], parsed[1], file_name))
+
+    columns = {}
+    partitions = []
+    row_count = 0
+    for season, team, file_name in sources:
+        with open(os.path.join(csv_directory, file_name), 'r', encoding='utf-8') as csv_file:
+            rows = list(csv.DictReader(csv_file))
+
+        for row in rows:
+            for source_column, (goals_column, attempts_column) in CONVERSION_COLUMNS.items():
+                if source_column in row:
+                    row[goals_column], row[attempts_column] = split_conversion(row[source_column])
+            row['season'] = season
+            row['team'] = team
+
+        for name in {key for row in rows for key in row}:
+            # Columns first seen in a later file are back-filled for the earlier rows
+            values = columns.setdefault(name, [''] * row_count)
+            values.extend(row.get(name, '') for row in rows)
+        for name, values in columns.items():
+            if len(values) < row_count + len(rows):
+                values.extend([''] * (row_count + len(rows) - len(values)))
+
+        partitions.append({
+            'season': season,
+            'team': team,
+            'file': file_name,
+            'start': row_count,
+            'stop': row_count + len(rows),
+        })
+        row_count += len(rows)
+
+    os.makedirs(store_directory, exist_ok=True)
+    column_types = {}
+    for name, values in sorted(columns.items()):
+        array = np.array(values, dtype=np.str_) if name in PARTITION_COLUMNS else to_array(values)
+        np.save(os.path.join(store_directory, f'{name}.npy'), array, allow_pickle=False)
+        column_types[name] = array.dtype.str
+
+    index = {'rows': row_count, 'columns': column_types, 'partitions': partitions}
+    with open(os.path.join(store_directory, INDEX_FILE), 'w', encoding='utf-8') as index_file:
+        json.dump(index, index_file, indent=2)
+    return index
+
+def to_array(values):
+    """
+    Convert a column of CSV values to the narrowest fitting NumPy array.
+
+    Columns where every value is numeric become int64 (if whole and never empty) or
+    float64 (empty values become NaN). Anything else becomes a fixed-width string column.
+
+    Args:
+        values (list): The column's values.
+
+    Returns:
+        numpy.ndarray: The column array.
+    """
+    try:
+        numbers = np.array([np.nan if value == '' else float(value) for value in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([str(value) for value in values], dtype=np.str_)
+
+    if not np.isnan(numbers).any() and np.array_equal(numbers, np.floor(numbers)):
+        return numbers.astype(np.int64)
+    return numbers
+
+class ColumnarStore:
+    """
+    Read access to a columnar store written by build_store.
+
+    Args:
+        store_directory (str, optional): The directory holding the .npy columns and index.
+    """
+
+    def __init__(self, store_directory=STORE_DIRECTORY):
+        self.store_directory = store_directory
+        with open(os.path.join(store_directory, INDEX_FILE), 'r', encoding='utf-8') as index_file:
+            self.index = json.load(index_file)
+        self._columns = {}
+        self._partitions = {
+            (partition['season'], partition['team']): slice(partition['start'], partition['stop'])
+            for partition in self.index['partitions']
+        }
+
+    def __len__(self):
+        return self.index['rows']
+
+    @property
+    def column_names(self):
+        """list: The names of every column in the store."""
+        return sorted(self.index['columns'])
+
+    @property
+    def partitions(self):
+        """list: The (season, team) pairs in the store, in row order."""
+        return list(self._partitions)
+
+    def column(self, name):
+        """
+        Memory-map a whole column.
+
+        Args:
+            name (str): The column name.
+
+        Returns:
+            numpy.ndarray: A read-only, memory-mapped array.
+
+        Raises:
+            KeyError: If the column is not in the store.
+        """
+        if name not in self.index['columns']:
+            raise KeyError(f"No column named '{name}' in {self.store_directory}")
+        if name not in self._columns:
+            self._columns[name] = np.load(
+                os.path.join(self.store_directory, f'{name}.npy'), mmap_mode='r', allow_pickle=False
+            )
+        return self._columns[name]
+
+    def rows_for(self, season=None, team=None):
+        """
+        Find the rows of a season, a team, or a single team-season.
+
+        Args:
+            season (str, optional): The season, e.g. '20182019'.
+            team (str, optional): The team's full name, e.g. 'Boston Bruins'.
+
+        Returns:
+            slice or numpy.ndarray: A slice for one team-season or the whole store,
+            otherwise an array of row numbers.
+        """
+        if season is not None and team is not None:
+            return self._partitions.get((season, team), slice(0, 0))
+        if season is None and team is None:
+            return slice(0, len(self))
+
+        ranges = [
+            np.arange(rows.start, rows.stop)
+            for (partition_season, partition_team), rows in self._partitions.items()
+            if season in (None, partition_season) and team in (None, partition_team)
+        ]
+        return np.concatenate(ranges) if ranges else np.array([], dtype=np.int64)
+
+    def load(self, columns=None, season=None, team=None):
+        """
+        Load columns for the whole store or a season/team selection.
+
+        A single team-season, or the whole store, is returned as views on the memory map;
+        other selections are copied.
+
+        Args:
+            columns (list, optional): The columns to load. Defaults to every column.
+            season (str, optional): Limit the rows to one season.
+            team (str, optional): Limit the rows to one team.
+
+        Returns:
+            dict: An array per column name.
+        """
+        rows = self.rows_for(season, team)
+        return {name: self.column(name)[rows] for name in (columns or self.column_names)}
@@ -0,0 +1,451 @@
+"""
+Module: feature_store.py
+
+This module provides the FeatureStore, which precomputes each team's recent form from
+the processed game results under data/processed.
+
+For every game a team played, the store records the features going into that game:
+averages of goals, hits, blocks, penalty minutes, faceoff and power-play rates over the
+team's last 5, 10 and 20 games, season-to-date home and road splits, and the rest days
+since the previous game. Windows reset at the start of each season. The features are
+indexed by (team abbreviation, game date), so looking them up is a dictionary access;
+a date after the team's last recorded game gets the team's current form.
+
+Game results files without a gameDate column (written before the backfill recorded
+dates) are indexed by season and game number instead, and have no rest days. Their games
+cannot be looked up by date, so they add nothing to the prediction prompts: the
+processed files committed under data/processed have no dates, and until they are
+regenerated from a dated backfill (scripts/historical_game_data_fetching.py) and the
+store is built from them, get_feature_store returns None and the prompts go without.
+
+The store only keeps the per-game stats it was built from. update() re-reads a directory
+and replays only what changed: games appended to a team-season file are added on top
+of the existing rolling state, and a file whose earlier games changed has just that
+team-season rebuilt.
+"""
+
+import bisect
+import csv
+import datetime
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import deque
+
+FEATURE_STORE_PATH = os.getenv('NHL_FEATURE_STORE_PATH', 'data/features/feature_store.json')
+PROCESSED_DIRECTORY = 'data/processed'
+WINDOWS = (5, 10, 20)
+SOURCE_FILE_PATTERN = re.compile(r'^(?P<season>\d{8})_.+_game_results_Processed\.csv$')
+# Per-game stats from the team's point of view: name -> (home column, away column)
+GAME_STATS = {
+    'goals_for': ('home_goals', 'away_away_goals'),
+    'goals_against': ('away_away_goals', 'home_goals'),
+    'hits': ('hits', 'away_hits'),
+    'blocks': ('blocks', 'away_blocks'),
+    'pim': ('pim', 'away_pim'),
+    'faceoff_pct': ('faceoffWinningPctg', 'away_faceoffWinningPctg'),
+}
+POWER_PLAY_COLUMNS = ('powerPlayConversion', 'away_powerPlayConversion')
+
+def to_number(value):
+    """Read a CSV value as a float, treating empty and malformed values as 0."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+def split_conversion(value):
+    """Split a power-play conversion such as '2/8' into (goals, opportunities)."""
+    parts = str(value).split('/')
+    if len(parts) != 2:
+        return 0.0, 0.0
+    return to_number(parts[0]), to_number(parts[1])
+
+def file_team(rows):
+    """
+    Work out whose game results file a list of rows came from.
+
+    Args:
+        rows (list): The file's rows.
+
+    Returns:
+        str: The abbreviation of the team playing in every game, or None if there is none.
+    """
+    teams = None
+    for row in rows:
+        playing = {row.get('abbrev'), row.get('away_abbrev')}
+        teams = playing if teams is None else teams & playing
+    teams = {team for team in teams or () if team}
+    return teams.pop() if len(teams) == 1 else None
+
+def team_game(row, team):
+    """
+    Read one game of a team's game results file from the team's point of view.
+
+    Args:
+        row (dict): The processed CSV row.
+        team (str): The team's abbreviation.
+
+    Returns:
+        dict: The game's date, home flag, opponent, win flag and GAME_STATS.
+    """
+    is_home = row.get('abbrev') == team
+    side = 0 if is_home else 1
+    game = {
+        'date': row.get('gameDate') or None,
+        'home': is_home,
+        'opponent': row.get('away_abbrev') if is_home else row.get('abbrev'),
+    }
+    for name, columns in GAME_STATS.items():
+        game[name] = to_number(row.get(columns[side]))
+    game['power_play_goals'], game['power_play_opportunities'] = split_conversion(row.get(POWER_PLAY_COLUMNS[side]))
+    game['won'] = game['goals_for'] > game['goals_against']
+    return game
+
+class RollingWindow:
+    """
+    Running totals over a team's last few games.
+
+    Args:
+        size (int, optional): The number of games kept. None keeps every game.
+    """
+
+    TOTALS = tuple(GAME_STATS) + ('power_play_goals', 'power_play_opportunities', 'won')
+
+    def __init__(self, size=None):
+        self.games = deque()
+        self.size = size
+        self.totals = dict.fromkeys(self.TOTALS, 0.0)
+
+    def add(self, game):
+        """Add a game, dropping the oldest one once the window is full."""
+        self.games.append(game)
+        for name in self.TOTALS:
+            self.totals[name] += game[name]
+        if self.size is not None and len(self.games) > self.size:
+            dropped = self.games.popleft()
+            for name in self.TOTALS:
+                self.totals[name] -= dropped[name]
+
+    def summary(self):
+        """
+        Summarize the games in the window.
+
+        Returns:
+            dict: The game count, wins, per-game averages of GAME_STATS and the
+            power-play percentage.
+        """
+        count = len(self.games)
+        summary = {'games': count, 'wins': int(round(self.totals['won']))}
+        for name in GAME_STATS:
+            summary[name] = round(self.totals[name] / count, 3) if count else 0.0
+        opportunities = self.totals['power_play_opportunities']
+        summary['power_play_pct'] = (round(self.totals['power_play_goals'] / opportunities * 100, 1)
+                                     if opportunities else 0.0)
+        return summary
+
+class TeamSeason:
+    """
+    The rolling state of one team's season, advanced a game at a time.
+
+    Args:
+        team (str): The team's abbreviation.
+        season (str): The season, e.g. '20182019'.
+    """
+
+    def __init__(self, team, season):
+        self.team = team
+        self.season = season
+        self.games = []
+        self.windows = {size: RollingWindow(size) for size in WINDOWS}
+        self.splits = {'home': RollingWindow(), 'road': RollingWindow()}
+
+    def features(self, date=None):
+        """
+        The team's features going into its next game.
+
+        Args:
+            date (str, optional): The date of the next game as YYYY-MM-DD, for the rest days.
+
+        Returns:
+            dict: The feature set.
+        """
+        last_date = self.games[-1]['date'] if self.games else None
+        features = {
+            'team': self.team,
+            'season': self.season,
+            'games_played': len(self.games),
+            'last_game_date': last_date,
+            'rest_days': rest_days(last_date, date),
+        }
+        for size, window in self.windows.items():
+            features[f'last_{size}'] = window.summary()
+        for split, window in self.splits.items():
+            features[split] = window.summary()
+        return features
+
+    def add(self, game):
+        """
+        Record a game.
+
+        Args:
+            game (dict): The game, as returned by team_game.
+
+        Returns:
+            dict: The features going into the game, before it is added.
+        """
+        features = self.features(game['date'])
+        self.games.append(game)
+        for window in self.windows.values():
+            window.add(game)
+        self.splits['home' if game['home'] else 'road'].add(game)
+        return features
+
+def rest_days(last_date, date):
+    """Days between two YYYY-MM-DD dates, or None if either is unknown."""
+    if not last_date or not date:
+        return None
+    try:
+        delta = datetime.date.fromisoformat(date[:10]) - datetime.date.fromisoformat(last_date[:10])
+    except ValueError:
+        return None
+    return delta.days
+
+def game_key(season, game, number):
+    """The index key of a game: its date, or season#number when the date is unknown."""
+    return game['date'][:10] if game['date'] else f'{season}#{number}'
+
+class FeatureStore:
+    """
+    Rolling-window team features indexed by team and game date.
+
+    Args:
+        directory (str, optional): A processed game results directory to build from.
+    """
+
+    def __init__(self, directory=None):
+        self._sources = {}
+        self._seasons = {}
+        self._features = {}
+        self._dates = {}
+        self._lock = threading.RLock()
+        if directory:
+            self.update(directory)
+
+    def __len__(self):
+        return len(self._features)
+
+    @property
+    def dated_games(self):
+        """int: The number of games with a date, which are the ones features() can find."""
+        with self._lock:
+            return sum(len(dates) for dates in self._dates.values())
+
+    def update(self, directory=PROCESSED_DIRECTORY):
+        """
+        Bring the store up to date with a processed game results directory.
+
+        Args:
+            directory (str, optional): The directory holding the *_Processed.csv files.
+
+        Returns:
+            int: The number of games added.
+        """
+        added = 0
+        with self._lock:
+            for file_name in sorted(os.listdir(directory)):
+                match = SOURCE_FILE_PATTERN.match(file_name)
+                if not match:
+                    continue
+                with open(os.path.join(directory, file_name), 'rb') as file:
+                    content = file.read()
+                digest = hashlib.sha256(content).hexdigest()
+                if self._sources.get(file_name, {}).get('sha256') == digest:
+                    continue
+
+                rows = list(csv.DictReader(content.decode('utf-8').splitlines()))
+                team = file_team(rows)
+                if team is None:
+                    continue
+                added += self.add_games(team, match.group('season'), [team_game(row, team) for row in rows])
+                self._sources[file_name] = {'sha256': digest, 'team': team, 'season': match.group('season')}
+        return added
+
+    def add_games(self, team, season, games):
+        """
+        Record a team-season's games, in order.
+
+        Games already recorded for the team-season are skipped when they are unchanged,
+        so only new games are added. If an earlier game differs, the team-season is rebuilt.
+
+        Args:
+            team (str): The team's abbreviation.
+            season (str): The season, e.g. '20182019'.
+            games (list): Every game of the team-season so far, as returned by team_game.
+
+        Returns:
+            int: The number of games added.
+        """
+        with self._lock:
+            state = self._seasons.get((team, season))
+            if state is not None and state.games != games[:len(state.games)]:
+                self._drop_season(state)
+                state = None
+            if state is None:
+                state = self._seasons[(team, season)] = TeamSeason(team, season)
+
+            new_games = games[len(state.games):]
+            for game in new_games:
+                key = game_key(season, game, len(state.games) + 1)
+                self._features[(team, key)] = state.add(game)
+                if game['date']:
+                    bisect.insort(self._dates.setdefault(team, []), (key, season))
+            return len(new_games)
+
+    def features(self, team, date):
+        """
+        Look up a team's features going into a game on a date.
+
+        Args:
+            team (str): The team's abbreviation.
+            date (str): The game date as YYYY-MM-DD.
+
+        Returns:
+            dict: The feature set, or None if the store has nothing for the team before the date.
+        """
+        date = date[:10]
+        with self._lock:
+            features = self._features.get((team, date))
+            if features is not None:
+                return features
+
+            dates = self._dates.get(team)
+            if not dates or date <= dates[0][0]:
+                return None
+            # The team's latest game before the date, normally its last recorded game
+            last_date, season = dates[-1] if date > dates[-1][0] else dates[bisect.bisect_left(dates, (date,)) - 1]
+            state = self._seasons[(team, season)]
+            # Undated games after it are left out, as they may come after the date too
+            number = max(index for index, game in enumerate(state.games, 1) if (game['date'] or '')[:10] == last_date)
+            if number == len(state.games):
+                return state.features(date)
+            features = dict(self._features[(team, game_key(season, state.games[number], number + 1))])
+            features['rest_days'] = rest_days(features['last_game_date'], date) if features['games_played'] else None
+            return features
+
+    def features_for_game(self, team, season, game_number):
+        """
+        Look up a team's features going into its nth game of a season.
+
+        Args:
+            team (str): The team's abbreviation.
+            season (str): The season, e.g. '20182019'.
+            game_number (int): The game's number in the team's season, from 1.
+
+        Returns:
+            dict: The feature set, or None if the game is not in the store.
+        """
+        with self._lock:
+            state = self._seasons.get((team, season))
+            if state is None or not 1 <= game_number <= len(state.games):
+                return None
+            return self._features[(team, game_key(season, state.games[game_number - 1], game_number))]
+
+    def save(self, file_path=FEATURE_STORE_PATH):
+        """
+        Write the store's games and source hashes to a JSON file.
+
+        Args:
+            file_path (str, optional): The file to write.
+        """
+        with self._lock:
+            payload = {
+                'sources': self._sources,
+                'seasons': [{'team': state.team, 'season': state.season, 'games': state.games}
+                            for state in self._seasons.values()],
+            }
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f'{file_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(payload, file)
+        os.replace(temp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path=FEATURE_STORE_PATH):
+        """
+        Load a store written by save, replaying its games to rebuild the features.
+
+        Args:
+            file_path (str, optional): The file to read.
+
+        Returns:
+            FeatureStore: The loaded store.
+        """
+        store = cls()
+        with open(file_path, 'r', encoding='utf-8') as file:
+            payload = json.load(file)
+        for season in payload.get('seasons', []):
+            store.add_games(season['team'], season['season'], season['games'])
+        store._sources = payload.get('sources', {})
+        return store
+
+    def _drop_season(self, state):
+        for number, game in enumerate(state.games, 1):
+            self._features.pop((state.team, game_key(state.season, game, number)), None)
+        dates = self._dates.get(state.team, [])
+        dates[:] = [entry for entry in dates if entry[1] != state.season]
+        del self._seasons[(state.team, state.season)]
+
+def describe_features(label, features):
+    """
+    Describe a team's recent form for the prediction prompt.
+
+    Args:
+        label (str): How the team is referred to, e.g. 'Home team'.
+        features (dict): The team's features, as returned by FeatureStore.features.
+
+    Returns:
+        str: One line per window and split.
+    """
+    lines = []
+    if features['rest_days'] is not None:
+        lines.append(f"{label} days of rest: {features['rest_days']}")
+    shown_windows = set()
+    for name in [f'last_{size}' for size in WINDOWS] + ['home', 'road']:
+        summary = features[name]
+        if not summary['games']:
+            continue
+        if name.startswith('last_'):
+            # Early in the season the longer windows hold the same games as the shorter ones
+            if summary['games'] in shown_windows:
+                continue
+            shown_windows.add(summary['games'])
+        games = f"last {summary['games']} games" if name.startswith('last_') else f"{name} games this season"
+        lines.append(
+            f"{label} {games}: {summary['wins']} wins, "
+            f"{summary['goals_for']} goals for and {summary['goals_against']} goals against per game, "
+            f"{summary['hits']} hits, {summary['blocks']} blocks, {summary['pim']} penalty minutes per game, "
+            f"{round(summary['faceoff_pct'] * 100, 1)}% faceoffs won, {summary['power_play_pct']}% power play"
+        )
+    return '\n'.join(lines)
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_feature_store():
+    """
+    Return the process-wide feature store, loading it from FEATURE_STORE_PATH on first use.
+
+    Returns:
+        FeatureStore: The shared store, or None if no store has been built or none of its
+        games have dates, as then no game can be looked up by date.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None and os.path.exists(FEATURE_STORE_PATH):
+            _default_store = FeatureStore.load(FEATURE_STORE_PATH)
+        return _default_store if _default_store is not None and _default_store.dated_games else None
@@ -0,0 +1,257 @@
+"""
+Module: season_replay.py
+
+This module replays historical seasons game by game, rebuilding each team's standings as
+they stood before every game.
+
+Each game appears in both teams' game results files, so the files are matched up on the
+game's stats and merged into one sequence that respects every team's game order (and the
+game dates, where the files have them). The StandingsTracker keeps a standings entry per
+team in the same shape as the NHL standings endpoint, so code written against
+nhl_api.get_current_standings, such as the prompt and the local predictor, can be run
+against any point of a past season.
+
+Final scores do not say whether a game went to overtime, so every loss counts as a
+regulation loss and otLosses stays 0.
+"""
+
+import csv
+import os
+from collections import defaultdict, deque
+from historical import columnar_store
+from historical import feature_store
+
+# Columns identifying a game in both teams' files, compared as numbers where possible
+GAME_KEY_COLUMNS = (
+    'abbrev', 'away_abbrev', 'home_goals', 'away_away_goals', 'hits', 'away_hits',
+    'blocks', 'away_blocks', 'pim', 'away_pim', 'powerPlayConversion', 'away_powerPlayConversion',
+)
+LAST_GAMES = 10
+
+def game_key(row):
+    """The key matching a game's row in the home and away teams' files."""
+    key = []
+    for column in GAME_KEY_COLUMNS:
+        value = row.get(column, '')
+        try:
+            key.append(round(float(value), 3))
+        except ValueError:
+            key.append(value)
+    return tuple(key)
+
+class StandingsTracker:
+    """
+    Team standings entries, updated one game result at a time.
+
+    Entries use the NHL standings field names (wins, goalFor, l10Wins, homeWins,
+    streakCode, ...) so they can stand in for nhl_api.get_current_standings.
+    """
+
+    def __init__(self):
+        self._teams = {}
+
+    def entry(self, team, team_name=None):
+        """
+        A team's standings entry as it stands now.
+
+        Args:
+            team (str): The team's abbreviation.
+            team_name (str, optional): The team's full name, recorded on first use.
+
+        Returns:
+            dict: A copy of the entry.
+        """
+        state = self._state(team, team_name)
+        entry = {key: value for key, value in state.items() if key != 'last_games'}
+        last_games = state['last_games']
+        entry['l10GamesPlayed'] = len(last_games)
+        entry['l10Wins'] = sum(1 for won, _, _ in last_games if won)
+        entry['l10Losses'] = len(last_games) - entry['l10Wins']
+        entry['l10GoalsFor'] = sum(goals_for for _, goals_for, _ in last_games)
+        entry['l10GoalsAgainst'] = sum(goals_against for _, _, goals_against in last_games)
+        games = entry['gamesPlayed']
+        entry['points'] = 2 * entry['wins'] + entry['otLosses']
+        entry['pointPctg'] = round(entry['points'] / (2 * games), 3) if games else 0.0
+        entry['winPctg'] = round(entry['wins'] / games, 3) if games else 0.0
+        entry['goalDifferential'] = entry['goalFor'] - entry['goalAgainst']
+        entry['goalDifferentialPctg'] = round(entry['goalDifferential'] / games, 3) if games else 0.0
+        return entry
+
+    def standings(self):
+        """list: Every team's current standings entry."""
+        return [self.entry(team) for team in self._teams]
+
+    def record(self, home, away, home_goals, away_goals):
+        """
+        Record a game result.
+
+        Args:
+            home (str): The home team's abbreviation.
+            away (str): The away team's abbreviation.
+            home_goals (int): The home team's final score.
+            away_goals (int): The away team's final score.
+        """
+        for team, side, goals_for, goals_against in ((home, 'home', home_goals, away_goals),
+                                                     (away, 'road', away_goals, home_goals)):
+            state = self._state(team)
+            won = goals_for > goals_against
+            result = 'Wins' if won else 'Losses'
+            state['gamesPlayed'] += 1
+            state['wins' if won else 'losses'] += 1
+            state['goalFor'] += goals_for
+            state['goalAgainst'] += goals_against
+            state[f'{side}GamesPlayed'] += 1
+            state[f'{side}{result}'] += 1
+            state[f'{side}GoalsFor'] += goals_for
+            state[f'{side}GoalsAgainst'] += goals_against
+            code = 'W' if won else 'L'
+            state['streakCount'] = state['streakCount'] + 1 if state['streakCode'] == code else 1
+            state['streakCode'] = code
+            state['last_games'].append((won, goals_for, goals_against))
+
+    def _state(self, team, team_name=None):
+        state = self._teams.get(team)
+        if state is None:
+            state = self._teams[team] = {
+                'teamAbbrev': {'default': team},
+                'teamName': {'default': team_name or team},
+                'gamesPlayed': 0, 'wins': 0, 'losses': 0, 'otLosses': 0,
+                'goalFor': 0, 'goalAgainst': 0,
+                'homeGamesPlayed': 0, 'homeWins': 0, 'homeLosses': 0, 'homeOtLosses': 0,
+                'homeGoalsFor': 0, 'homeGoalsAgainst': 0,
+                'roadGamesPlayed': 0, 'roadWins': 0, 'roadLosses': 0, 'roadOtLosses': 0,
+                'roadGoalsFor': 0, 'roadGoalsAgainst': 0,
+                'streakCode': '', 'streakCount': 0,
+                'last_games': deque(maxlen=LAST_GAMES),
+            }
+        elif team_name and state['teamName']['default'] == team:
+            state['teamName']['default'] = team_name
+        return state
+
+def load_season_files(directory, season):
+    """
+    Read every team's game results file for a season.
+
+    Args:
+        directory (str): A raw or processed game results directory.
+        season (str): The season, e.g. '20182019'.
+
+    Returns:
+        dict: Team abbreviation -> (team name, list of rows in file order).
+    """
+    teams = {}
+    for file_name in sorted(os.listdir(directory)):
+        parsed = columnar_store.parse_source_name(file_name)
+        if not parsed or parsed[0] != season:
+            continue
+        with open(os.path.join(directory, file_name), 'r', encoding='utf-8') as csv_file:
+            rows = list(csv.DictReader(csv_file))
+        team = feature_store.file_team(rows)
+        if team is not None:
+            teams[team] = (parsed[1], rows)
+    return teams
+
+def list_seasons(directory):
+    """list: The seasons with game results files in a directory, oldest first."""
+    seasons = set()
+    for file_name in os.listdir(directory):
+        parsed = columnar_store.parse_source_name(file_name)
+        if parsed:
+            seasons.add(parsed[0])
+    return sorted(seasons)
+
+def order_games(teams):
+    """
+    Merge the teams' files into one game sequence.
+
+    Every game is taken once, as soon as it is the next unplayed game in both teams' files.
+    Games found in only one file are skipped, as their opponent's record at the time is unknown.
+
+    Args:
+        teams (dict): Team abbreviation -> (team name, rows), as returned by load_season_files.
+
+    Returns:
+        list: The games' rows, in an order consistent with every team's file.
+    """
+    occurrences = defaultdict(list)
+    queues = {}
+    for team, (_, rows) in teams.items():
+        queue = deque()
+        seen = defaultdict(int)
+        for row in rows:
+            key = game_key(row)
+            occurrence = (key, seen[key])
+            seen[key] += 1
+            occurrences[occurrence].append(team)
+            queue.append((occurrence, row))
+        queues[team] = queue
+
+    # Drop the games that are not in both teams' files
+    for queue in queues.values():
+        for item in [item for item in queue if len(occurrences[item[0]]) != 2]:
+            queue.remove(item)
+
+    ordered = []
+    while True:
+        heads = {}
+        for team, queue in queues.items():
+            if queue:
+                heads.setdefault(queue[0][0], []).append(team)
+        ready = [(occurrence, playing) for occurrence, playing in heads.items() if len(playing) == 2]
+        if not ready:
+            break
+        # Among the games ready now, play the earliest dated one first
+        ready.sort(key=lambda item: queues[item[1][0]][0][1].get('gameDate') or '')
+        for occurrence, playing in ready:
+            ordered.append(queues[playing[0]].popleft()[1])
+            queues[playing[1]].popleft()
+    return ordered
+
+def replay_season(directory, season):
+    """
+    Replay a season, yielding every game with both teams' standings before it.
+
+    Args:
+        directory (str): A raw or processed game results directory.
+        season (str): The season, e.g. '20182019'.
+
+    Yields:
+        dict: The game's 'season', 'date', 'home_team', 'away_team', 'home_goals',
+        'away_goals', 'row' (its game results row) and the teams' 'home_standing'
+        and 'away_standing' entries before the game.
+    """
+    teams = load_season_files(directory, season)
+    tracker = StandingsTracker()
+    for team, (team_name, _) in teams.items():
+        tracker.entry(team, team_name)
+
+    for row in order_games(teams):
+        home, away = row['abbrev'], row['away_abbrev']
+        home_goals = int(feature_store.to_number(row.get('home_goals')))
+        away_goals = int(feature_store.to_number(row.get('away_away_goals')))
+        yield {
+            'season': season,
+            'date': row.get('gameDate') or None,
+            'home_team': home,
+            'away_team': away,
+            'home_goals': home_goals,
+            'away_goals': away_goals,
+            'row': row,
+            'home_standing': tracker.entry(home),
+            'away_standing': tracker.entry(away),
+        }
+        tracker.record(home, away, home_goals, away_goals)
+
+def replay_seasons(directory, seasons=None):
+    """
+    Replay several seasons in order.
+
+    Args:
+        directory (str): A raw or processed game results directory.
+        seasons (list, optional): The seasons to replay. Defaults to every season in the directory.
+
+    Yields:
+        dict: Each game, as yielded by replay_season.
+    """
+    for season in seasons or list_seasons(directory):
+        yield from replay_season(directory, season)
@@ -0,0 +1,162 @@
+"""
+Module: synthetic_chance.py
+
+This module computes the synthetic win chances used to label the fine-tuning data.
+
+It is the vectorized form of calculate_synthetic_chance in
+scripts/format_consolidated_data.py: a team's score is a weighted sum of its power-play
+success rate, faceoff percentage, blocks, hits and penalty minutes, and each team's
+chance of winning is its share of the two scores. Whole seasons are scored at once
+as NumPy arrays, and the weights can be changed per call.
+"""
+
+import numpy as np
+
+DEFAULT_WEIGHTS = {
+    'power_play': 0.35,
+    'faceoff': 0.25,
+    'blocks': 0.15,
+    'away_hits': 0.10,
+    'away_pim': 0.10,
+    'home_pim': 0.05,
+}
+
+# Confidence buckets by the gap between the two chances: (exclusive lower bound, rating)
+CONFIDENCE_BUCKETS = ((30, 'high'), (10, 'medium'))
+
+# The stat columns the engine reads, keyed as in the processed data
+STAT_COLUMNS = (
+    'powerPlayConversion', 'faceoffWinningPctg', 'blocks', 'pim',
+    'away_powerPlayConversion', 'away_faceoffWinningPctg', 'away_blocks', 'away_hits', 'away_pim',
+)
+
+def conversion_rates(conversions):
+    """
+    Vectorized power-play success rate of 'goals/attempts' strings.
+
+    Args:
+        conversions (array-like): Strings such as '2/8'.
+
+    Returns:
+        numpy.ndarray: goals / attempts, 0 where there were no attempts or the value is malformed.
+    """
+    parts = np.char.partition(np.asarray(conversions, dtype=np.str_), '/')
+    goals = np.char.strip(parts[..., 0])
+    attempts = np.char.strip(parts[..., 2])
+    valid = (parts[..., 1] == '/') & np.char.isdigit(goals) & np.char.isdigit(attempts)
+
+    goals = np.where(valid, goals, '0').astype(np.float64)
+    attempts = np.where(valid, attempts, '0').astype(np.float64)
+    return success_rates(goals, attempts)
+
+def success_rates(goals, attempts):
+    """
+    Vectorized power-play success rate from separate goal and attempt arrays.
+
+    Args:
+        goals (array-like): Power-play goals.
+        attempts (array-like): Power-play opportunities.
+
+    Returns:
+        numpy.ndarray: goals / attempts, 0 where there were no attempts.
+    """
+    goals = np.asarray(goals, dtype=np.float64)
+    attempts = np.asarray(attempts, dtype=np.float64)
+    rates = np.zeros_like(goals)
+    np.divide(goals, attempts, out=rates, where=attempts != 0)
+    return rates
+
+def stats_from_records(records):
+    """
+    Gather the engine's input columns from a list of game stat dictionaries.
+
+    Args:
+        records (list): Dictionaries with the STAT_COLUMNS keys, e.g. the 'prompt'
+        of each line in the training data JSONL files.
+
+    Returns:
+        dict: An array per column.
+    """
+    stats = {}
+    for name in STAT_COLUMNS:
+        if name.endswith('powerPlayConversion'):
+            stats[name] = np.array([str(record[name]) for record in records], dtype=np.str_)
+        else:
+            stats[name] = np.fromiter((float(record[name]) for record in records),
+                                      dtype=np.float64, count=len(records))
+    return stats
+
+def calculate_synthetic_scores(stats, weights=None):
+    """
+    Calculate the weighted home and away team scores of many games.
+
+    Args:
+        stats (dict): Arrays of equal length for the STAT_COLUMNS. Power-play columns may be
+        'goals/attempts' strings, or powerPlayGoals/powerPlayOpportunities arrays (and their
+        away_ counterparts) may be given instead, as stored by the columnar store.
+        weights (dict, optional): Overrides for DEFAULT_WEIGHTS.
+
+    Returns:
+        tuple: Arrays of the home and away scores.
+    """
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+
+    def power_play(prefix):
+        if f'{prefix}powerPlayGoals' in stats:
+            return success_rates(stats[f'{prefix}powerPlayGoals'], stats[f'{prefix}powerPlayOpportunities'])
+        return conversion_rates(stats[f'{prefix}powerPlayConversion'])
+
+    def whole(name):
+        return np.trunc(np.asarray(stats[name], dtype=np.float64))
+
+    home_score = (power_play('') * weights['power_play'] +
+                  np.asarray(stats['faceoffWinningPctg'], dtype=np.float64) * weights['faceoff'] +
+                  whole('blocks') * weights['blocks'] -
+                  whole('pim') * weights['home_pim'])
+
+    away_score = (power_play('away_') * weights['power_play'] +
+                  np.asarray(stats['away_faceoffWinningPctg'], dtype=np.float64) * weights['faceoff'] +
+                  whole('away_blocks') * weights['blocks'] +
+                  whole('away_hits') * weights['away_hits'] -
+                  whole('away_pim') * weights['away_pim'])
+    return home_score, away_score
+
+def calculate_synthetic_chances(stats, weights=None, decimals=2):
+    """
+    Calculate the synthetic chance of winning for the home and away teams of many games.
+
+    Args:
+        stats (dict): The input columns, as described in calculate_synthetic_scores.
+        weights (dict, optional): Overrides for DEFAULT_WEIGHTS.
+        decimals (int, optional): Decimals to round the chances to; None leaves them unrounded.
+
+    Returns:
+        tuple: Arrays of the home and away percentage chances.
+        Games where both scores are 0 get 50 for each team.
+    """
+    home_score, away_score = calculate_synthetic_scores(stats, weights)
+    total_score = home_score + away_score
+    has_score = total_score != 0
+    safe_total = np.where(has_score, total_score, 1.0)
+    home_chance = np.where(has_score, home_score / safe_total * 100, 50.0)
+    away_chance = np.where(has_score, away_score / safe_total * 100, 50.0)
+    if decimals is not None:
+        home_chance = np.round(home_chance, decimals)
+        away_chance = np.round(away_chance, decimals)
+    return home_chance, away_chance
+
+def confidence_ratings(home_chance, away_chance, buckets=CONFIDENCE_BUCKETS):
+    """
+    Bucket games into confidence ratings by the gap between the two chances.
+
+    Args:
+        home_chance (numpy.ndarray): The home teams' percentage chances.
+        away_chance (numpy.ndarray): The away teams' percentage chances.
+        buckets (tuple, optional): (exclusive lower bound, rating) pairs, highest first.
+
+    Returns:
+        numpy.ndarray: 'high', 'medium' or 'low' for each game.
+    """
+    chance_diff = np.abs(np.asarray(home_chance) - np.asarray(away_chance))
+    return np.select([chance_diff > bound for bound, _ in buckets],
+                     [rating for _, rating in buckets], default='low')
@@ -33,8 +33,8 @@ function removeDuplicates(data) {
 function displayPredictions(predictions) {
     const container = document.getElementById('predictions');
     predictions.forEach(prediction => {
-        const homeTeamChance = prediction['home team percentage chance of winning'] || 'N/A';
-        const awayTeamChance = prediction['away team percentage chance of winning'] || 'N/A';
+        const homeTeamChance = formatPercentage(prediction['home team percentage chance of winning']);
+        const awayTeamChance = formatPercentage(prediction['away team percentage chance of winning']);
         const predictedHomeGoals = prediction['predicted home team goals'] !== undefined 
             ? prediction['predicted home team goals']
             : 'N/A';
@@ -70,6 +70,13 @@ function displayPredictions(predictions) {
     });
 }
 
+function formatPercentage(value) {
+    if (value === undefined || value === null || value === '') {
+        return 'N/A';
+    }
+    return typeof value === 'number' ? `${value}%` : value;
+}
+
 function getConfidenceClass(confidenceRating) {
     switch (confidenceRating.toLowerCase()) {
         case 'high':
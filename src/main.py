@@ -3,22 +3,77 @@ The Main script for generating NHL game predictions.
 
 This script fetches today's NHL games and current team standings, and then generates predictions
 for the games using the OpenAI API and other NHL data processing modules.
+
+Set NHL_PREDICTOR to 'local', 'fallback' or 'prefilter' to use the local baseline model
+instead of, or alongside, the assistant (see game_processing.generate_predictions).
+
+Every run writes a JSON report of its per-stage and per-game timings, retries and status
+polls (see general.telemetry) to data/telemetry, or to the file given with --report.
+With --profile the run is also profiled with cProfile.
+
+Usage:
+python src/main.py [--report PATH] [--profile [PATH]]
 """
 
+import argparse
+import cProfile
+import datetime
+import os
+import pstats
 from NHL import nhl_api as NHL
 from NHL import game_processing
-from general import general_functions
+from NHL import prediction_cache
+from general import prediction_writer
+from general import telemetry
 
 def main():
     """
     Main function to generate NHL game predictions.
+
+    Each prediction is written to the journal and the predictions file as soon as it arrives,
+    and the predictions file is republished once the slate is done. A run that fails
+    before its first prediction leaves the predictions file as it was.
     """
-    predictions = game_processing.generate_game_predictions(
+    writer = prediction_writer.PredictionWriter()
+    game_processing.generate_predictions(
         NHL.get_games_today(),
-        NHL.get_current_standings()
+        NHL.get_current_standings(),
+        on_prediction=writer.write
     )
-    general_functions.write_predictions_to_file(predictions)
+    writer.publish()
     print('Predictions completed!')
+    print(f"NHL API requests: {NHL.get_request_stats()}")
+    print(f"Prediction cache: {prediction_cache.get_cache().stats}")
+
+def run():
+    """
+    Parse the command line and run main, writing the run report and the optional profile.
+    """
+    parser = argparse.ArgumentParser(description="Predict today's NHL games.")
+    parser.add_argument('--report', default=None,
+                        help='Write the run report to this file instead of data/telemetry')
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='PATH',
+                        help='Profile the run with cProfile and save the stats, '
+                             'by default to data/telemetry/profile-<time>.prof')
+    args = parser.parse_args()
+
+    profiler = cProfile.Profile() if args.profile is not None else None
+    try:
+        if profiler is None:
+            main()
+        else:
+            profiler.runcall(main)
+    finally:
+        if telemetry.get_telemetry().enabled:
+            print(f"Run report written to {telemetry.get_telemetry().write_report(args.report)}")
+        if profiler is not None:
+            profile_path = args.profile or os.path.join(
+                telemetry.REPORT_DIRECTORY, f"profile-{datetime.datetime.now():%Y-%m-%dT%H%M%S}.prof"
+            )
+            os.makedirs(os.path.dirname(profile_path) or '.', exist_ok=True)
+            profiler.dump_stats(profile_path)
+            print(f"Profile written to {profile_path}")
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(15)
 
 if __name__ == '__main__':
-    main()
+    run()
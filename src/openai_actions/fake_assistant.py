@@ -0,0 +1,235 @@
+"""
+Module: fake_assistant.py
+
+This module provides a FakeAssistant that stands in for the OpenAI Assistants API, so the
+whole prediction path (prompt rendering, runs, polling, parsing and batching) can be run
+offline, e.g. by the backtest.
+
+The fake answers each game from the records in its prompt: the home team's chance of
+winning follows the two teams' win shares, with a small home-ice edge. Runs take a
+configurable time to complete and can be made to fail at a given rate.
+
+Use it as a context manager, which swaps it in for the openai_calls functions:
+
+    with FakeAssistant(latency=0.05):
+        game_processing.generate_game_predictions(games, standings)
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from openai_actions import openai_calls
+from openai_actions import run_polling
+
+FAKE_ASSISTANT_ID = 'asst_fake'
+HOME_ICE_EDGE = 0.03
+# The openai_calls functions the fake replaces while installed
+PATCHED_FUNCTIONS = (
+    'get_assistant', 'create_thread', 'add_message_to_thread', 'run_assistant_on_thread',
+    'check_run_status', 'cancel_run', 'get_messages', 'get_latest_message', 'delete_thread',
+)
+
+_RECORD_PATTERN = r'{side} team record on the year: (\d+) wins, (\d+) losses'
+
+def parse_game_message(message):
+    """
+    Read the teams, venue and records from a rendered game message.
+
+    Args:
+        message (str): One game's prediction message.
+
+    Returns:
+        dict: 'home', 'away', 'venue' and each side's '(wins, losses)' record, where found.
+    """
+    game = {}
+    for field, pattern in (('home', r'Home team: (.+)'), ('away', r'Away team: (.+)'), ('venue', r'Venue: (.+)'),
+                           ('game_id', r'Game ID: (.+)')):
+        match = re.search(pattern, message)
+        if match:
+            game[field] = match.group(1).strip()
+    for side in ('Home', 'Away'):
+        match = re.search(_RECORD_PATTERN.format(side=side), message)
+        game[f'{side.lower()}_record'] = (int(match.group(1)), int(match.group(2))) if match else (0, 0)
+    return game
+
+def fake_prediction(game):
+    """
+    Make up a prediction record for a game parsed by parse_game_message.
+
+    Args:
+        game (dict): The parsed game.
+
+    Returns:
+        dict: A record in the prediction schema.
+    """
+    def win_share(record):
+        wins, losses = record
+        return (wins + 1) / (wins + losses + 2)
+
+    home_chance = 0.5 + (win_share(game['home_record']) - win_share(game['away_record'])) / 2 + HOME_ICE_EDGE
+    home_chance = round(min(max(home_chance, 0.05), 0.95) * 100, 1)
+    gap = abs(home_chance - (100 - home_chance))
+    record = {
+        'venue': game.get('venue', ''),
+        'home team name': game.get('home', ''),
+        'home team percentage chance of winning': f"{home_chance}%",
+        'predicted home team goals': 3 if home_chance >= 50 else 2,
+        'away team name': game.get('away', ''),
+        'away team percentage chance of winning': f"{round(100 - home_chance, 1)}%",
+        'predicted away team goals': 2 if home_chance >= 50 else 3,
+        'confidence rating': 'high' if gap > 30 else 'medium' if gap > 10 else 'low',
+        'explanation': 'Fake assistant answer from the teams\' records.',
+    }
+    if game.get('game_id'):
+        record['game id'] = game['game_id']
+    return record
+
+def answer_message(message):
+    """
+    Answer a game or batch message with a JSON array of predictions.
+
+    Args:
+        message (str): The user message.
+
+    Returns:
+        str: The answer.
+    """
+    sections = re.split(r'(?=Game ID: )', message)
+    games = [parse_game_message(section) for section in sections if 'Home team:' in section]
+    return json.dumps([fake_prediction(game) for game in games])
+
+class FakeAssistant:
+    """
+    An offline stand-in for the assistant runs made through openai_calls.
+
+    Args:
+        latency (float, optional): Seconds a run takes to complete.
+        failure_rate (float, optional): Share of runs that end as 'failed'.
+        seed (int, optional): Seed for the failure draws, for repeatable runs.
+        poll_interval (float, optional): The RunPoller's first-check interval while installed.
+    """
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=0, poll_interval=0.01):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.poll_interval = poll_interval
+        self.stats = {'runs': 0, 'failed_runs': 0, 'status_checks': 0, 'threads': 0, 'deleted_threads': 0}
+        self._random = random.Random(seed)
+        self._threads = {}
+        self._runs = {}
+        self._ids = iter(range(1, 1 << 62))
+        self._lock = threading.Lock()
+        self._saved = None
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
+
+    def install(self):
+        """Swap the fake in for the openai_calls functions and shorten the poll interval."""
+        self._saved = {name: getattr(openai_calls, name) for name in PATCHED_FUNCTIONS}
+        self._saved['poll_interval'] = run_polling.POLL_INITIAL_INTERVAL
+        for name in PATCHED_FUNCTIONS:
+            setattr(openai_calls, name, getattr(self, name))
+        run_polling.POLL_INITIAL_INTERVAL = self.poll_interval
+
+    def uninstall(self):
+        """Put the real openai_calls functions back."""
+        if self._saved is None:
+            return
+        run_polling.POLL_INITIAL_INTERVAL = self._saved.pop('poll_interval')
+        for name, function in self._saved.items():
+            setattr(openai_calls, name, function)
+        self._saved = None
+
+    def get_assistant(self):
+        """Return the fake assistant's ID."""
+        return FAKE_ASSISTANT_ID
+
+    def create_thread(self):
+        """Create an empty thread."""
+        with self._lock:
+            thread_id = f'thread_fake_{next(self._ids)}'
+            self._threads[thread_id] = []
+            self.stats['threads'] += 1
+        return SimpleNamespace(id=thread_id)
+
+    def add_message_to_thread(self, thread_id, content):
+        """Add a user message to a thread."""
+        with self._lock:
+            message = self._message('user', content)
+            self._threads[thread_id].append(message)
+        return message
+
+    def run_assistant_on_thread(self, thread_id, assistant_id, instructions=None):
+        """Start a run that completes after the configured latency."""
+        with self._lock:
+            run_id = f'run_fake_{next(self._ids)}'
+            failed = self._random.random() < self.failure_rate
+            self._runs[run_id] = {'thread_id': thread_id, 'done_at': time.monotonic() + self.latency,
+                                  'failed': failed, 'status': 'queued'}
+            self.stats['runs'] += 1
+            self.stats['failed_runs'] += int(failed)
+        return SimpleNamespace(id=run_id, thread_id=thread_id, assistant_id=assistant_id)
+
+    def check_run_status(self, thread_id, run_id):
+        """Report a run's status."""
+        with self._lock:
+            self.stats['status_checks'] += 1
+            run = self._runs[run_id]
+            if run['status'] in ('queued', 'in_progress'):
+                if time.monotonic() < run['done_at']:
+                    run['status'] = 'in_progress'
+                else:
+                    run['status'] = 'failed' if run['failed'] else 'completed'
+                    if not run['failed']:
+                        answer = self.answer(self._threads[thread_id][-1].content[0].text.value)
+                        self._threads[thread_id].append(self._message('assistant', answer, run_id))
+            return run['status']
+
+    def cancel_run(self, thread_id, run_id):
+        """Cancel a run that has not finished."""
+        with self._lock:
+            self._runs[run_id]['status'] = 'cancelled'
+        return SimpleNamespace(id=run_id, thread_id=thread_id, status='cancelled')
+
+    def get_messages(self, thread_id):
+        """List a thread's messages, newest first, like the Assistants API."""
+        with self._lock:
+            return SimpleNamespace(data=list(reversed(self._threads[thread_id])))
+
+    def get_latest_message(self, thread_id, run_id=None):
+        """Return the thread's newest message if it is the run's assistant reply."""
+        with self._lock:
+            messages = self._threads[thread_id]
+            message = messages[-1] if messages else None
+        if message is None or message.role != 'assistant' or run_id not in (None, message.run_id):
+            return None
+        return message
+
+    def delete_thread(self, thread_id):
+        """Delete a thread."""
+        with self._lock:
+            deleted = self._threads.pop(thread_id, None) is not None
+            self.stats['deleted_threads'] += int(deleted)
+        return deleted
+
+    @property
+    def open_threads(self):
+        """int: The number of threads not deleted."""
+        with self._lock:
+            return len(self._threads)
+
+    def _message(self, role, text, run_id=None):
+        return SimpleNamespace(id=f'msg_fake_{next(self._ids)}', role=role, run_id=run_id,
+                               content=[SimpleNamespace(type='text', text=SimpleNamespace(value=text))])
+
+    def answer(self, message):
+        """Answer a user message, see answer_message."""
+        return answer_message(message)
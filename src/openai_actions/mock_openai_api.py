@@ -0,0 +1,183 @@
+"""
+Module: mock_openai_api.py
+
+This module provides MockOpenAIServer, a local stand-in for the parts of the OpenAI
+Assistants API (v1, beta) used by openai_calls: listing and retrieving assistants,
+creating and deleting threads, adding and listing messages, and creating, retrieving
+and cancelling runs.
+
+Runs are queued, in progress for run_latency seconds and then completed with the
+fake assistant's answer (openai_actions.fake_assistant.answer_message) added to the
+thread, or failed for a run_failure_rate share of runs. On top of that the MockServer
+options add request latency, 500s and a 429 rate limit to every API call.
+
+Point the OpenAI client at it with OPENAI_BASE_URL, or openai_calls.configure_client,
+set to base_url. Any API key is accepted.
+"""
+
+import itertools
+import threading
+import time
+from general.mock_server import MockServer, error_payload
+from openai_actions import fake_assistant, openai_calls
+
+MOCK_ASSISTANT_ID = 'asst_mock'
+MOCK_MODEL = 'mock-model'
+
+class MockOpenAIServer(MockServer):
+    """
+    Emulates the Assistants API thread, message and run lifecycle.
+
+    Args:
+        run_latency (float, optional): Seconds from a run's creation to its completion.
+        run_failure_rate (float, optional): Share of runs that end as 'failed'.
+        **options: MockServer options (latency, failure_rate, rate_limit, ...).
+    """
+
+    def __init__(self, run_latency=1.0, run_failure_rate=0.0, **options):
+        super().__init__(**options)
+        self.run_latency = run_latency
+        self.run_failure_rate = run_failure_rate
+        self.stats.update({'runs': 0, 'failed_runs': 0, 'threads': 0, 'deleted_threads': 0})
+        self._ids = itertools.count(1)
+        self._threads = {}
+        self._runs = {}
+        self._state_lock = threading.Lock()
+        self.assistant = {
+            'id': MOCK_ASSISTANT_ID, 'object': 'assistant', 'created_at': int(time.time()),
+            'name': openai_calls.ASSISTANT_NAME, 'description': None, 'model': MOCK_MODEL,
+            'instructions': None, 'tools': [], 'file_ids': [], 'metadata': {},
+        }
+
+    @property
+    def base_url(self):
+        """str: The URL standing in for https://api.openai.com/v1."""
+        return f"{self.url}/v1"
+
+    @property
+    def open_threads(self):
+        """int: The number of threads not deleted."""
+        with self._state_lock:
+            return len(self._threads)
+
+    def route(self, method, path, query, body):
+        parts = path.strip('/').split('/')
+        if parts[:1] != ['v1']:
+            return None
+        parts = parts[1:]
+        body = body or {}
+        with self._state_lock:
+            if parts == ['assistants'] and method == 'GET':
+                return 200, page([self.assistant])
+            if len(parts) == 2 and parts[0] == 'assistants' and method == 'GET':
+                if parts[1] != MOCK_ASSISTANT_ID:
+                    return 404, error_payload(f"No assistant found with id '{parts[1]}'.", 'not_found')
+                return 200, self.assistant
+            if parts[:1] != ['threads']:
+                return None
+            if len(parts) == 1 and method == 'POST':
+                return 200, self._create_thread()
+            thread = self._threads.get(parts[1]) if len(parts) > 1 else None
+            if thread is None:
+                return 404, error_payload(f"No thread found with id '{parts[1]}'.", 'not_found')
+            return self._thread_route(method, thread, parts[2:], query, body)
+
+    def _thread_route(self, method, thread, parts, query, body):
+        if not parts and method == 'DELETE':
+            del self._threads[thread['id']]
+            self.stats['deleted_threads'] += 1
+            return 200, {'id': thread['id'], 'object': 'thread.deleted', 'deleted': True}
+        if parts == ['messages'] and method == 'POST':
+            return 200, self._add_message(thread, 'user', message_text(body.get('content')))
+        if parts == ['messages'] and method == 'GET':
+            self._advance_runs(thread)
+            messages = thread['messages'] if query.get('order') == 'asc' else thread['messages'][::-1]
+            return 200, page(messages[:int(query.get('limit', 20))])
+        if parts == ['runs'] and method == 'POST':
+            return 200, self._create_run(thread, body)
+        if len(parts) >= 2 and parts[0] == 'runs':
+            run = self._runs.get(parts[1])
+            if run is None or run['thread_id'] != thread['id']:
+                return 404, error_payload(f"No run found with id '{parts[1]}'.", 'not_found')
+            if len(parts) == 2 and method == 'GET':
+                self._advance_runs(thread)
+                return 200, public(run)
+            if parts[2:] == ['cancel'] and method == 'POST':
+                if run['status'] in ('queued', 'in_progress'):
+                    run.update(status='cancelled', cancelled_at=int(time.time()))
+                return 200, public(run)
+        return None
+
+    def _next_id(self, prefix):
+        return f"{prefix}_mock{next(self._ids)}"
+
+    def _create_thread(self):
+        thread = {'id': self._next_id('thread'), 'object': 'thread', 'created_at': int(time.time()),
+                  'metadata': {}, 'messages': [], 'runs': []}
+        self._threads[thread['id']] = thread
+        self.stats['threads'] += 1
+        return public(thread)
+
+    def _add_message(self, thread, role, text, run=None):
+        message = {
+            'id': self._next_id('msg'), 'object': 'thread.message', 'created_at': int(time.time()),
+            'thread_id': thread['id'], 'role': role,
+            'content': [{'type': 'text', 'text': {'value': text, 'annotations': []}}],
+            'file_ids': [], 'assistant_id': run['assistant_id'] if run else None,
+            'run_id': run['id'] if run else None, 'metadata': {},
+        }
+        thread['messages'].append(message)
+        return message
+
+    def _create_run(self, thread, body):
+        now = time.time()
+        run = {
+            'id': self._next_id('run'), 'object': 'thread.run', 'created_at': int(now),
+            'thread_id': thread['id'], 'assistant_id': body.get('assistant_id'), 'status': 'queued',
+            'required_action': None, 'last_error': None, 'expires_at': int(now) + 600,
+            'started_at': None, 'cancelled_at': None, 'failed_at': None, 'completed_at': None,
+            'model': MOCK_MODEL, 'instructions': body.get('instructions') or '', 'tools': [],
+            'file_ids': [], 'metadata': {},
+            '_done_at': now + self.run_latency,
+            '_fails': self._random.random() < self.run_failure_rate,
+        }
+        self._runs[run['id']] = run
+        thread['runs'].append(run)
+        self.stats['runs'] += 1
+        return public(run)
+
+    def _advance_runs(self, thread):
+        # Move the thread's runs along their lifecycle as of now
+        now = time.time()
+        for run in thread['runs']:
+            if run['status'] == 'queued':
+                run.update(status='in_progress', started_at=int(now))
+            if run['status'] != 'in_progress' or now < run['_done_at']:
+                continue
+            if run['_fails']:
+                run.update(status='failed', failed_at=int(now),
+                           last_error={'code': 'server_error', 'message': 'Mock run failure'})
+                self.stats['failed_runs'] += 1
+                continue
+            prompt = next((message for message in reversed(thread['messages']) if message['role'] == 'user'), None)
+            answer = fake_assistant.answer_message(prompt['content'][0]['text']['value'] if prompt else '')
+            self._add_message(thread, 'assistant', answer, run)
+            run.update(status='completed', completed_at=int(now))
+
+def message_text(content):
+    """The text of a message's content, given as a string or a list of content parts."""
+    if isinstance(content, list):
+        return ''.join(part.get('text', '') for part in content if isinstance(part, dict))
+    return content or ''
+
+def page(items):
+    """A list response in the API's cursor page shape."""
+    items = [public(item) for item in items]
+    return {
+        'object': 'list', 'data': items, 'has_more': False,
+        'first_id': items[0]['id'] if items else None, 'last_id': items[-1]['id'] if items else None,
+    }
+
+def public(item):
+    """An object as the API returns it, without the mock's own bookkeeping fields."""
+    return {key: value for key, value in item.items() if not key.startswith('_') and key not in ('messages', 'runs')}
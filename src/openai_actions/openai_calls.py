@@ -2,27 +2,129 @@
 The open ai api calls file handles the chat completion
 request to open ai. Also will handle any other api cals
 to open ai.
+
+The openai package is imported and the client built on first use (get_client), so
+importing this module costs nothing for commands that never call the API. The
+assistant's ID is looked up once and kept in ASSISTANT_CACHE_PATH; later processes
+only check that it still exists.
 '''
 
+import hashlib
+import json
 import os
-import openai
-openai.api_key = os.getenv('NHL_OPENAI_API_KEY')
+import threading
+from general import telemetry
+
+OPENAI_API_KEY = os.getenv('NHL_OPENAI_API_KEY')
 MAX_RETRIES = 2
+ASSISTANT_NAME = 'NHL Game Prediction Assistant'
+ASSISTANT_CACHE_PATH = os.getenv('NHL_ASSISTANT_CACHE_PATH', 'data/cache/assistant.json')
+
+_client = None
+_client_lock = threading.Lock()
+_assistant_id = None
+_assistant_lock = threading.Lock()
+
+def configure_client(api_key=None, **options):
+    """
+    Build the shared OpenAI client.
 
+    Args:
+        api_key (str, optional): The API key. Defaults to NHL_OPENAI_API_KEY, then
+        the SDK's own OPENAI_API_KEY.
+        **options: Keyword arguments passed through to openai.OpenAI, e.g. base_url.
+
+    Returns:
+        openai.OpenAI: The new shared client.
+    """
+    global _client
+    import openai  # pylint: disable=import-outside-toplevel
+    options.setdefault('max_retries', MAX_RETRIES)
+    client = openai.OpenAI(api_key=api_key or OPENAI_API_KEY, **options)
+    with _client_lock:
+        _client = client
+    return client
+
+def get_client():
+    """
+    Return the shared OpenAI client, importing openai and building it on first use.
+
+    Returns:
+        openai.OpenAI: The shared client.
+    """
+    with _client_lock:
+        client = _client
+    return client if client is not None else configure_client()
+
+@telemetry.timed('openai.get_assistant')
 def get_assistant():
     """
     Fetches the ID of the assistant named 'NHL Game Prediction Assistant'.
 
+    The ID is resolved once per process. A previously found ID is read from
+    ASSISTANT_CACHE_PATH and checked with a single retrieve call, and the assistants
+    are only listed when there is no cached ID or it no longer names the assistant.
+
     Returns:
         str: The ID of the 'NHL Game Prediction Assistant', or None if not found.
     """
-    current_assistants = openai.beta.assistants.list()
-    for assistant in current_assistants.data:
-        if assistant.name == 'NHL Game Prediction Assistant':
-            return assistant.id
+    global _assistant_id
+    with _assistant_lock:
+        if _assistant_id is None:
+            _assistant_id = _validated_assistant_id(_load_assistant_id()) or _find_assistant()
+            if _assistant_id is not None:
+                _save_assistant_id(_assistant_id)
+        return _assistant_id
 
+def _find_assistant():
+    for assistant in get_client().beta.assistants.list(limit=100):
+        if assistant.name == ASSISTANT_NAME:
+            return assistant.id
     return None
 
+def _validated_assistant_id(assistant_id):
+    if assistant_id is None:
+        return None
+    import openai  # pylint: disable=import-outside-toplevel
+    try:
+        assistant = get_client().beta.assistants.retrieve(assistant_id)
+    except openai.NotFoundError:
+        return None
+    except Exception as e:
+        # Listing would fail the same way, so keep the cached ID
+        print(f'Error checking assistant {assistant_id}! Error: {e}')
+        return assistant_id
+    return assistant.id if assistant.name == ASSISTANT_NAME else None
+
+def _cache_account():
+    # Cached IDs are only used with the account (API key and endpoint) they were found with
+    client = get_client()
+    return hashlib.sha256(f'{client.api_key}|{client.base_url}'.encode('utf-8')).hexdigest()[:16]
+
+def _load_assistant_id():
+    try:
+        with open(ASSISTANT_CACHE_PATH, 'r', encoding='utf-8') as file:
+            entry = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if entry.get('name') != ASSISTANT_NAME or entry.get('account') != _cache_account():
+        return None
+    return entry.get('id')
+
+def _save_assistant_id(assistant_id):
+    entry = {'name': ASSISTANT_NAME, 'account': _cache_account(), 'id': assistant_id}
+    try:
+        directory = os.path.dirname(ASSISTANT_CACHE_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f'{ASSISTANT_CACHE_PATH}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(entry, file)
+        os.replace(temp_path, ASSISTANT_CACHE_PATH)
+    except OSError as e:
+        print(f'Error saving the assistant ID! Error: {e}')
+
+@telemetry.timed('openai.create_thread')
 def create_thread():
     """
     Creates a new conversation thread using the OpenAI Assistants API.
@@ -33,9 +135,10 @@ def create_thread():
     Returns:
         openai.Thread: The created thread object.
     """
-    thread = openai.beta.threads.create()
+    thread = get_client().beta.threads.create()
     return thread
 
+@telemetry.timed('openai.add_message_to_thread')
 def add_message_to_thread(thread_id, content):
     """
     Adds a message to a specific thread using the OpenAI Assistants API.
@@ -49,13 +152,14 @@ def add_message_to_thread(thread_id, content):
     Returns:
         openai.ThreadMessage: The created message object.
     """
-    message = openai.beta.threads.messages.create(
+    message = get_client().beta.threads.messages.create(
         thread_id=thread_id,
         role="user",
         content=content
     )
     return message
 
+@telemetry.timed('openai.run_assistant_on_thread')
 def run_assistant_on_thread(thread_id, assistant_id, instructions=None):
     """
     Runs the assistant on a specific thread using the OpenAI Assistants API.
@@ -69,13 +173,14 @@ def run_assistant_on_thread(thread_id, assistant_id, instructions=None):
     Returns:
         openai.Run: The Run object created by executing the assistant.
     """
-    run = openai.beta.threads.runs.create(
+    run = get_client().beta.threads.runs.create(
         thread_id=thread_id,
         assistant_id=assistant_id,
         instructions=instructions
     )
     return run
 
+@telemetry.timed('openai.check_run_status')
 def check_run_status(thread_id, run_id):
     """
     Checks the status of a run on a specific thread using the OpenAI Assistants API.
@@ -88,12 +193,34 @@ def check_run_status(thread_id, run_id):
     Returns:
         str: The status of the run ('queued', 'running', 'succeeded', 'failed', etc.).
     """
-    run_status = openai.beta.threads.runs.retrieve(
+    run_status = get_client().beta.threads.runs.retrieve(
         thread_id=thread_id,
         run_id=run_id
     )
     return run_status.status
 
+@telemetry.timed('openai.cancel_run')
+def cancel_run(thread_id, run_id):
+    """
+    Cancels a run that is still queued or in progress.
+
+    Args:
+        thread_id (str): The ID of the thread.
+        run_id (str): The ID of the run to cancel.
+
+    Returns:
+        openai.Run or None: The cancelled run, or None if the cancellation failed.
+    """
+    try:
+        return get_client().beta.threads.runs.cancel(
+            thread_id=thread_id,
+            run_id=run_id
+        )
+    except Exception as e:
+        print(f'Error cancelling run {run_id}! Error: {e}')
+        return None
+
+@telemetry.timed('openai.get_messages')
 def get_messages(thread_id):
     """
     Retrieves a list of messages from a specified thread using the OpenAI API.
@@ -114,9 +241,56 @@ def get_messages(thread_id):
     Exception: Outputs an error message to the console if an exception occurs during the API call.
     """
     try:
-        return openai.beta.threads.messages.list(
+        return get_client().beta.threads.messages.list(
             thread_id=thread_id
         )
     except Exception as e:
         print(f'Error getting messages! Error: {e}')
         return None
+
+@telemetry.timed('openai.get_latest_message')
+def get_latest_message(thread_id, run_id=None):
+    """
+    Retrieves the newest message of a thread if it is an assistant reply.
+
+    Only the newest message is requested, so the call costs the same however long the
+    thread is. The Assistants API cannot filter messages by run, so run_id is checked here.
+
+    Args:
+        thread_id (str): The ID of the thread.
+        run_id (str, optional): The run the reply must come from.
+
+    Returns:
+        openai.ThreadMessage or None: The assistant's reply, or None if the newest message
+        is not one or the API call failed.
+    """
+    try:
+        response = get_client().beta.threads.messages.list(
+            thread_id=thread_id,
+            limit=1,
+            order='desc'
+        )
+    except Exception as e:
+        print(f'Error getting the latest message! Error: {e}')
+        return None
+    for message in response.data:
+        if message.role == 'assistant' and (run_id is None or message.run_id == run_id):
+            return message
+    return None
+
+@telemetry.timed('openai.delete_thread')
+def delete_thread(thread_id):
+    """
+    Deletes a thread and its messages.
+
+    Args:
+        thread_id (str): The ID of the thread to delete.
+
+    Returns:
+        bool: Whether the thread was deleted.
+    """
+    try:
+        return get_client().beta.threads.delete(thread_id).deleted
+    except Exception as e:
+        print(f'Error deleting thread {thread_id}! Error: {e}')
+        return False
@@ -6,6 +6,9 @@ Additional functionalities related to message formatting for OpenAI may be added
 """
 
 import os
+from general import templates
+
+INSTRUCTIONS_PATH = os.path.join("src", "settings", "gptInstructions.txt")
 
 def combine_contents_into_message(message):
     """
@@ -17,23 +20,15 @@ def combine_contents_into_message(message):
     Returns:
         list: A list containing a dictionary with the combined and formatted message.
 
-    This function reads the contents of a file located at a specific file path and combines 
+    This function reads the contents of the instructions file (once per process) and combines 
     it with the provided 'message'. The resulting message is formatted as a list containing 
     a dictionary with a 'role' and 'content' key-value pair, suitable for use in some structured 
     communication format.
     If any errors occur during the process, the function returns None.
     """
     try:
-        # Get the current working directory, which will be the project root in most cases
-        base_path = os.getcwd()
-
-        # Specify the path to your file
-        file_path = os.path.join(base_path, "src", "gptInstructions.txt")
-
-        # Open the file in read mode ('r')
-        with open(file_path, 'r', encoding="utf-8") as file:
-            # Read the entire file contents into a string
-            file_contents = file.read()
+        # Paths are relative to the current working directory, which will be the project root
+        file_contents = templates.read_text(INSTRUCTIONS_PATH)
 
         # Prepare the message
         full_message = f'{file_contents}{message}'
@@ -0,0 +1,167 @@
+"""
+Module: run_polling.py
+
+This module provides polling for assistant runs. Runs are checked with a short
+initial interval that backs off exponentially (with jitter) up to a ceiling,
+and every run has a deadline after which it is cancelled and reported as timed out.
+
+A single RunPoller can track many outstanding (thread_id, run_id) pairs at once,
+only checking the runs whose next poll is due.
+"""
+
+import random
+import time
+from collections import namedtuple
+from openai_actions import openai_calls
+
+POLL_INITIAL_INTERVAL = 1.0
+POLL_MAX_INTERVAL = 10.0
+POLL_BACKOFF = 1.5
+POLL_JITTER = 0.25
+RUN_TIMEOUT = 300
+
+# Maps every run status the Assistants API reports to the outcome we act on.
+# 'pending' runs are polled again; everything else is terminal.
+RUN_STATES = {
+    'queued': 'pending',
+    'in_progress': 'pending',
+    'cancelling': 'pending',
+    'completed': 'succeeded',
+    'requires_action': 'failed',
+    'failed': 'failed',
+    'cancelled': 'failed',
+    'expired': 'failed',
+}
+
+PollResult = namedtuple('PollResult', ['key', 'thread_id', 'run_id', 'status', 'outcome', 'elapsed', 'polls'])
+
+class RunPoller:
+    """
+    Tracks many outstanding assistant runs and polls each one on its own backoff schedule.
+
+    Intervals that are not given are read from the module's POLL_* and RUN_TIMEOUT
+    settings when the poller is created.
+
+    Args:
+        initial_interval (float, optional): Seconds before the first status check of a run.
+        max_interval (float, optional): Ceiling for the interval between checks of a run.
+        backoff (float, optional): Factor the interval grows by after each check.
+        jitter (float, optional): Fraction of the interval randomly added or removed.
+        timeout (float, optional): Seconds a run may take before it is cancelled.
+        status_fn (callable, optional): Function taking (thread_id, run_id) and returning
+        the run status. Defaults to openai_calls.check_run_status.
+    """
+
+    def __init__(self, initial_interval=None, max_interval=None, backoff=None, jitter=None, timeout=None,
+                 status_fn=None):
+        self.initial_interval = POLL_INITIAL_INTERVAL if initial_interval is None else initial_interval
+        self.max_interval = POLL_MAX_INTERVAL if max_interval is None else max_interval
+        self.backoff = POLL_BACKOFF if backoff is None else backoff
+        self.jitter = POLL_JITTER if jitter is None else jitter
+        self.timeout = RUN_TIMEOUT if timeout is None else timeout
+        self.status_fn = status_fn or openai_calls.check_run_status
+        self._runs = {}
+
+    @property
+    def pending(self):
+        """int: The number of runs that have not reached a terminal state."""
+        return len(self._runs)
+
+    def add(self, key, thread_id, run_id):
+        """
+        Start tracking a run.
+
+        Args:
+            key (hashable): Caller identifier returned with the run's result.
+            thread_id (str): The ID of the thread the run belongs to.
+            run_id (str): The ID of the run to poll.
+        """
+        now = time.monotonic()
+        self._runs[key] = {
+            'thread_id': thread_id,
+            'run_id': run_id,
+            'started': now,
+            'interval': self.initial_interval,
+            'next_poll': now + self._jittered(self.initial_interval),
+            'status': 'queued',
+            'polls': 0,
+        }
+
+    def wait_next(self):
+        """
+        Sleep until at least one run is due, poll every due run and return the finished ones.
+
+        Returns:
+            list: PollResult entries for runs that reached a terminal state or timed out.
+        """
+        if not self._runs:
+            return []
+
+        next_due = min(run['next_poll'] for run in self._runs.values())
+        delay = next_due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+        finished = []
+        now = time.monotonic()
+        for key, run in list(self._runs.items()):
+            if run['next_poll'] > now:
+                continue
+            result = self._poll(key, run)
+            if result is not None:
+                del self._runs[key]
+                finished.append(result)
+        return finished
+
+    def wait_all(self):
+        """
+        Poll until every tracked run is finished.
+
+        Returns:
+            dict: PollResult entries keyed by the caller's key.
+        """
+        results = {}
+        while self._runs:
+            for result in self.wait_next():
+                results[result.key] = result
+        return results
+
+    def _poll(self, key, run):
+        try:
+            run['status'] = self.status_fn(run['thread_id'], run['run_id'])
+        except Exception as e:
+            print(f"Error checking run {run['run_id']}: {e}")
+        run['polls'] += 1
+
+        outcome = RUN_STATES.get(run['status'], 'pending')
+        elapsed = time.monotonic() - run['started']
+        if outcome == 'pending' and elapsed >= self.timeout:
+            openai_calls.cancel_run(run['thread_id'], run['run_id'])
+            outcome = 'timed_out'
+
+        if outcome != 'pending':
+            return PollResult(key, run['thread_id'], run['run_id'], run['status'],
+                              outcome, elapsed, run['polls'])
+
+        run['interval'] = min(run['interval'] * self.backoff, self.max_interval)
+        run['next_poll'] = time.monotonic() + self._jittered(run['interval'])
+        return None
+
+    def _jittered(self, interval):
+        return max(0.0, interval * (1 + random.uniform(-self.jitter, self.jitter)))
+
+def wait_for_run(thread_id, run_id, **poller_options):
+    """
+    Block until a single run reaches a terminal state or times out.
+
+    Args:
+        thread_id (str): The ID of the thread the run belongs to.
+        run_id (str): The ID of the run to wait for.
+        **poller_options: Keyword arguments passed through to RunPoller.
+
+    Returns:
+        PollResult: The final state of the run.
+    """
+    poller = RunPoller(**poller_options)
+    poller.add(run_id, thread_id, run_id)
+    return poller.wait_all()[run_id]
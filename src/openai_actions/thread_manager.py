@@ -0,0 +1,112 @@
+"""
+Module: thread_manager.py
+
+This module manages the lifecycle of the threads assistant runs are made on.
+
+Every run gets a fresh thread holding only its own message, so a run never reprocesses
+the prompts and answers of earlier games and its latency does not depend on how many
+games came before it. The reply is read with a single-message request, and the thread
+is deleted once it has been read (or its run has failed), so threads do not pile up on
+the account. Any thread still open when the manager is closed is deleted then.
+"""
+
+import os
+import threading
+from openai_actions import openai_calls
+
+# Set NHL_DELETE_THREADS=0 to keep the threads, e.g. to inspect them in the playground
+DELETE_THREADS = os.getenv('NHL_DELETE_THREADS', '1') != '0'
+
+class ThreadManager:
+    """
+    Creates a short-lived thread per run and deletes it when the run is done with.
+
+    Use it as a context manager so leftover threads are deleted on the way out.
+
+    Args:
+        delete (bool, optional): Whether to delete threads. Defaults to DELETE_THREADS.
+    """
+
+    def __init__(self, delete=None):
+        self.delete = DELETE_THREADS if delete is None else delete
+        self.stats = {'created': 0, 'deleted': 0, 'delete_errors': 0}
+        self._open = set()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def open_threads(self):
+        """int: The number of threads created and not yet released."""
+        with self._lock:
+            return len(self._open)
+
+    def start_run(self, message, assistant_id):
+        """
+        Start a run on a new thread holding only the given message.
+
+        Args:
+            message (str): The user message to run the assistant on.
+            assistant_id (str): The ID of the assistant to run.
+
+        Returns:
+            tuple: The (thread_id, run_id) of the started run.
+
+        Raises:
+            Exception: Whatever the API raised. A thread created before the failure is released.
+        """
+        thread = openai_calls.create_thread()
+        with self._lock:
+            self._open.add(thread.id)
+            self.stats['created'] += 1
+        try:
+            openai_calls.add_message_to_thread(thread.id, message)
+            run = openai_calls.run_assistant_on_thread(thread.id, assistant_id)
+        except Exception:
+            self.release(thread.id)
+            raise
+        return thread.id, run.id
+
+    def read_reply(self, thread_id, run_id):
+        """
+        Read a completed run's reply and release its thread.
+
+        Args:
+            thread_id (str): The ID of the run's thread.
+            run_id (str): The ID of the completed run.
+
+        Returns:
+            openai.ThreadMessage or None: The reply, or None if it could not be read.
+        """
+        try:
+            return openai_calls.get_latest_message(thread_id, run_id)
+        finally:
+            self.release(thread_id)
+
+    def release(self, thread_id):
+        """
+        Finish with a thread, deleting it unless deletion is turned off.
+
+        Args:
+            thread_id (str): The ID of the thread.
+        """
+        with self._lock:
+            if thread_id not in self._open:
+                return
+            self._open.discard(thread_id)
+        if not self.delete:
+            return
+        deleted = openai_calls.delete_thread(thread_id)
+        with self._lock:
+            self.stats['deleted' if deleted else 'delete_errors'] += 1
+
+    def close(self):
+        """Release every thread that is still open."""
+        with self._lock:
+            remaining = list(self._open)
+        for thread_id in remaining:
+            self.release(thread_id)
@@ -0,0 +1,8 @@
+"""Puts src and scripts on the import path, the way the scripts themselves do."""
+
+import os
+import sys
+
+ROOT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT_DIRECTORY, 'src'))
+sys.path.append(os.path.join(ROOT_DIRECTORY, 'scripts'))
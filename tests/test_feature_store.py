@@ -0,0 +1,79 @@
+"""Tests for the date lookups of src/historical/feature_store.py."""
+
+import csv
+from historical import feature_store
+
+COLUMNS = ('gameDate', 'abbrev', 'away_abbrev', 'home_goals', 'away_away_goals', 'hits', 'away_hits',
+           'blocks', 'away_blocks', 'pim', 'away_pim', 'faceoffWinningPctg', 'away_faceoffWinningPctg',
+           'powerPlayConversion', 'away_powerPlayConversion')
+# Toronto's first three games: home win 4-2, road loss 1-3, home win 5-0
+GAMES = (
+    ('2023-10-11', 'TOR', 'MTL', 4, 2),
+    ('2023-10-14', 'OTT', 'TOR', 3, 1),
+    ('2023-10-16', 'TOR', 'BOS', 5, 0),
+)
+
+def write_games(directory, dated=len(GAMES)):
+    """Write GAMES as Toronto's processed game results file, with dates for the first dated games."""
+    file_path = directory / '20232024_Toronto_Maple_Leafs_game_results_Processed.csv'
+    with open(file_path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.DictWriter(file, [column for column in COLUMNS if dated or column != 'gameDate'])
+        writer.writeheader()
+        for number, (date, home, away, home_goals, away_goals) in enumerate(GAMES, 1):
+            row = {'abbrev': home, 'away_abbrev': away, 'home_goals': home_goals, 'away_away_goals': away_goals,
+                   'hits': 20, 'away_hits': 18, 'blocks': 12, 'away_blocks': 10, 'pim': 6, 'away_pim': 8,
+                   'faceoffWinningPctg': 0.5, 'away_faceoffWinningPctg': 0.5,
+                   'powerPlayConversion': '1/4', 'away_powerPlayConversion': '0/3'}
+            if number <= dated:
+                row['gameDate'] = date
+            writer.writerow(row)
+
+def test_features_on_a_game_date_are_the_form_going_into_it(tmp_path):
+    write_games(tmp_path)
+    store = feature_store.FeatureStore(str(tmp_path))
+
+    features = store.features('TOR', '2023-10-14')
+    assert features['games_played'] == 1
+    assert features['rest_days'] == 3
+    assert features['last_5']['goals_for'] == 4.0
+    assert features['home']['games'] == 1 and features['road']['games'] == 0
+
+def test_features_after_the_last_game_are_the_current_form(tmp_path):
+    write_games(tmp_path)
+    store = feature_store.FeatureStore(str(tmp_path))
+
+    features = store.features('TOR', '2023-10-20')
+    assert features['games_played'] == 3
+    assert features['rest_days'] == 4
+    assert features['last_5']['wins'] == 2
+    assert features['last_5']['goals_for'] == round(10 / 3, 3)
+    assert features['last_5']['goals_against'] == round(5 / 3, 3)
+    # Between two games the latest game before the date counts
+    assert store.features('TOR', '2023-10-15')['games_played'] == 2
+
+def test_features_before_the_first_game_are_missing(tmp_path):
+    write_games(tmp_path)
+    store = feature_store.FeatureStore(str(tmp_path))
+
+    assert store.features('TOR', '2023-10-01') is None
+    assert store.features('MTL', '2023-10-20') is None
+    assert store.dated_games == 3
+
+def test_undated_game_results_cannot_be_looked_up_by_date(tmp_path):
+    write_games(tmp_path, dated=0)
+    store = feature_store.FeatureStore(str(tmp_path))
+
+    assert len(store) == 3
+    assert store.dated_games == 0
+    assert store.features('TOR', '2023-10-20') is None
+    assert store.features_for_game('TOR', '20232024', 3)['games_played'] == 2
+
+def test_undated_games_after_the_last_dated_one_are_left_out(tmp_path):
+    write_games(tmp_path, dated=2)
+    store = feature_store.FeatureStore(str(tmp_path))
+
+    assert store.dated_games == 2
+    features = store.features('TOR', '2023-10-20')
+    assert features['games_played'] == 2
+    assert features['rest_days'] == 6
+    assert store.features('TOR', '2023-10-12')['games_played'] == 1
@@ -0,0 +1,26 @@
+"""Tests for loading the cache file in src/NHL/prediction_cache.py."""
+
+import json
+import time
+from NHL.prediction_cache import PredictionCache
+
+def test_malformed_entries_are_skipped(tmp_path):
+    file_path = tmp_path / 'predictions.json'
+    file_path.write_text(json.dumps({
+        'good': {'prediction': '[]', 'standings': 'abc', 'stored_at': time.time()},
+        'no stored_at': {'prediction': '[]', 'standings': 'abc'},
+        'no prediction': {'standings': 'abc', 'stored_at': time.time()},
+        'text stored_at': {'prediction': '[]', 'standings': 'abc', 'stored_at': 'yesterday'},
+        'not a dict': ['[]'],
+    }), encoding='utf-8')
+
+    cache = PredictionCache(file_path=str(file_path))
+    assert cache.get('good') == '[]'
+    assert cache.get('no stored_at') is None
+    assert cache.get('not a dict') is None
+
+def test_a_cache_file_that_is_not_an_object_is_ignored(tmp_path):
+    file_path = tmp_path / 'predictions.json'
+    file_path.write_text('["not", "a", "cache"]', encoding='utf-8')
+
+    assert PredictionCache(file_path=str(file_path)).get('not') is None
@@ -0,0 +1,21 @@
+"""Tests for src/NHL/simulation.py."""
+
+from NHL import simulation
+
+def test_a_games_results_do_not_depend_on_the_rest_of_the_slate():
+    alone = simulation.simulate_rates([3.1], [2.9], trials=20000, keys=['2023020001'])
+    on_a_slate = simulation.simulate_rates([2.4, 3.1, 3.6], [3.3, 2.9, 2.2], trials=20000,
+                                           keys=['2023020002', '2023020001', '2023020003'])
+    assert on_a_slate[1] == alone[0]
+
+def test_games_without_keys_are_seeded_from_their_rates():
+    alone = simulation.simulate_rates([3.1], [2.9], trials=20000)
+    on_a_slate = simulation.simulate_rates([2.4, 3.1], [3.3, 2.9], trials=20000)
+    assert on_a_slate[1] == alone[0]
+
+def test_results_add_up():
+    result = simulation.simulate_rates([3.4], [2.6], trials=20000, keys=['game'])[0]
+    assert result.home_win_pctg + result.away_win_pctg == 1
+    assert result.home_win_pctg > 0.5
+    assert result.likely_score[0] > result.likely_score[1]
+    assert 0 < result.shootout_pctg < result.overtime_pctg < 1
@@ -0,0 +1,114 @@
+"""Tests for the incremental builds of scripts/training_pipeline.py."""
+
+import os
+import shutil
+import training_pipeline
+
+DATA_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+RAW_DIRECTORY = os.path.join(DATA_DIRECTORY, 'raw')
+TRAINING_DIRECTORY = os.path.join(DATA_DIRECTORY, 'training_data')
+SOURCE_FILES = (
+    '20182019_Anaheim_Ducks_game_results_Processed.jsonl',
+    '20182019_Arizona_Coyotes_game_results_Processed.jsonl',
+    '20182019_Boston_Bruins_game_results_Processed.jsonl',
+)
+
+def copy_sources(directory, games=20):
+    """Copy the first games of a few training files into directory."""
+    os.makedirs(directory)
+    for file_name in SOURCE_FILES:
+        with open(os.path.join(TRAINING_DIRECTORY, file_name), 'r', encoding='utf-8') as source, \
+                open(os.path.join(directory, file_name), 'w', encoding='utf-8') as target:
+            target.writelines(line for _, line in zip(range(games), source))
+
+def read_bytes(file_path):
+    with open(file_path, 'rb') as file:
+        return file.read()
+
+def full_build(input_directory, output_path):
+    training_pipeline.run_pipeline('training', 'final', input_directory, output_path)
+    return read_bytes(output_path)
+
+def test_incremental_matches_full_build_when_first_file_changes(tmp_path):
+    input_directory = str(tmp_path / 'training')
+    output_path = str(tmp_path / 'final.jsonl')
+    manifest_path = str(tmp_path / 'manifest.json')
+    copy_sources(input_directory)
+
+    assert training_pipeline.run_incremental('training', 'final', input_directory, output_path,
+                                             manifest_path) == {'final': (3, 3)}
+    assert read_bytes(output_path) == full_build(input_directory, str(tmp_path / 'expected.jsonl'))
+
+    # Change the first file only: the later segments are copied from the existing file
+    first_file = os.path.join(input_directory, SOURCE_FILES[0])
+    with open(first_file, 'r', encoding='utf-8') as file:
+        lines = file.readlines()
+    with open(first_file, 'w', encoding='utf-8') as file:
+        file.writelines(lines[:-5])
+
+    assert training_pipeline.run_incremental('training', 'final', input_directory, output_path,
+                                             manifest_path) == {'final': (1, 3)}
+    assert read_bytes(output_path) == full_build(input_directory, str(tmp_path / 'expected.jsonl'))
+
+def test_incremental_rebuilds_a_missing_final_file(tmp_path):
+    input_directory = str(tmp_path / 'training')
+    output_path = str(tmp_path / 'out' / 'final.jsonl')
+    manifest_path = str(tmp_path / 'manifest.json')
+    copy_sources(input_directory)
+
+    training_pipeline.run_incremental('training', 'final', input_directory, output_path, manifest_path)
+    shutil.rmtree(tmp_path / 'out')
+
+    assert training_pipeline.run_incremental('training', 'final', input_directory, output_path,
+                                             manifest_path) == {'final': (3, 3)}
+    assert read_bytes(output_path) == full_build(input_directory, str(tmp_path / 'expected.jsonl'))
+
+def copy_raw(directory, file_names):
+    """Copy raw game results files into directory."""
+    os.makedirs(directory)
+    for file_name in file_names:
+        shutil.copy(os.path.join(RAW_DIRECTORY, file_name), directory)
+
+def test_another_input_directory_leaves_earlier_outputs_alone(tmp_path):
+    first_directory = str(tmp_path / 'raw')
+    second_directory = str(tmp_path / 'sub')
+    output_directory = str(tmp_path / 'processed')
+    manifest_path = str(tmp_path / 'manifest.json')
+    copy_raw(first_directory, ['20182019_Anaheim_Ducks_game_results.csv', '20182019_Arizona_Coyotes_game_results.csv'])
+    copy_raw(second_directory, ['20182019_Boston_Bruins_game_results.csv'])
+
+    training_pipeline.run_incremental('raw', 'processed', first_directory, output_directory, manifest_path)
+    first_outputs = sorted(os.listdir(output_directory))
+    assert len(first_outputs) == 2
+
+    assert training_pipeline.run_incremental('raw', 'processed', second_directory, output_directory,
+                                             manifest_path) == {'processed': (1, 1)}
+    assert set(first_outputs) < set(os.listdir(output_directory))
+    # The first directory's record is kept, so going back to it rebuilds nothing
+    assert training_pipeline.run_incremental('raw', 'processed', first_directory, output_directory,
+                                             manifest_path) == {'processed': (0, 2)}
+
+def test_outputs_of_removed_inputs_are_removed(tmp_path):
+    input_directory = str(tmp_path / 'raw')
+    output_directory = str(tmp_path / 'processed')
+    manifest_path = str(tmp_path / 'manifest.json')
+    copy_raw(input_directory, ['20182019_Anaheim_Ducks_game_results.csv', '20182019_Arizona_Coyotes_game_results.csv'])
+
+    training_pipeline.run_incremental('raw', 'processed', input_directory, output_directory, manifest_path)
+    os.remove(os.path.join(input_directory, '20182019_Arizona_Coyotes_game_results.csv'))
+    training_pipeline.run_incremental('raw', 'processed', input_directory, output_directory, manifest_path)
+
+    assert os.listdir(output_directory) == ['20182019_Anaheim_Ducks_game_results_Processed.csv']
+
+def test_final_segments_are_not_reused_from_another_input_directory(tmp_path):
+    first_directory = str(tmp_path / 'training')
+    second_directory = str(tmp_path / 'other')
+    output_path = str(tmp_path / 'final.jsonl')
+    manifest_path = str(tmp_path / 'manifest.json')
+    copy_sources(first_directory)
+    copy_sources(second_directory, games=10)
+
+    training_pipeline.run_incremental('training', 'final', first_directory, output_path, manifest_path)
+    assert training_pipeline.run_incremental('training', 'final', second_directory, output_path,
+                                             manifest_path) == {'final': (3, 3)}
+    assert read_bytes(output_path) == full_build(second_directory, str(tmp_path / 'expected.jsonl'))